@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+
+# ------------------------------------------------------------------------------
+# Copyright Commvault Systems, Inc.
+# See LICENSE.txt in the project root for
+# license information.
+# ------------------------------------------------------------------------------
+
+"""File for caching the email alias of the users looked up in ENGWEBDB.
+
+The same few hundred developers are the receivers of nearly every form, so their
+email aliases are kept in memory and in a json file on the local disk. Entries older
+than the time to live are looked up in ENGWEBDB again.
+
+AliasCache:
+
+    __init__()  -- Initialize instance of the AliasCache class and loads the cache file
+
+    lookup()    -- Returns the cached aliases of given users and the users not cached
+
+    update()    -- Adds the aliases looked up in ENGWEBDB to the cache
+
+    save()      -- Writes the cache entries within the time to live to the cache file
+"""
+
+import json
+import os
+import threading
+import time
+from constants import ALIAS_CACHE_PATH
+from constants import ALIAS_CACHE_TTL_HOURS
+
+
+class AliasCache:
+    """Class for the in memory and on disk cache of users email aliases."""
+
+    def __init__(self, cache_file=ALIAS_CACHE_PATH, ttl_hours=ALIAS_CACHE_TTL_HOURS):
+        """ Initialize instances of the AliasCache class
+
+            Args:
+                cache_file(str) -- Json file where the cache is persisted.
+
+                ttl_hours(int)  -- Hours after which an alias is looked up again.
+        """
+        self.cache_file = cache_file
+        self.ttl = ttl_hours * 60 * 60
+        self.__lock = threading.Lock()
+        self.__entries = {}
+        try:
+            with open(self.cache_file) as cache:
+                self.__entries = json.load(cache)
+        except (OSError, ValueError):
+            pass
+
+    def lookup(self, users):
+        """ Returns the cached aliases of given users.
+
+            Args:
+                users(list) -- ProdcertName of the users.
+
+            Returns:
+                tuple - dict of user to list of aliases and list of users not cached
+        """
+        cutoff = time.time() - self.ttl
+        aliases = {}
+        missing = []
+        with self.__lock:
+            for user in users:
+                entry = self.__entries.get(user.lower())
+                if entry and entry[1] >= cutoff:
+                    aliases[user] = entry[0]
+                else:
+                    missing.append(user)
+        return aliases, missing
+
+    def update(self, aliases):
+        """ Adds the aliases looked up in ENGWEBDB to the cache.
+
+            Args:
+                aliases(dict)   -- User to list of aliases.
+        """
+        now = time.time()
+        with self.__lock:
+            for user, user_aliases in aliases.items():
+                self.__entries[user.lower()] = [user_aliases, now]
+
+    def save(self):
+        """ Writes the cache entries within the time to live to the cache file"""
+        cutoff = time.time() - self.ttl
+        with self.__lock:
+            self.__entries = {user: entry for user, entry in self.__entries.items()
+                              if entry[1] >= cutoff}
+            entries = dict(self.__entries)
+        os.makedirs(os.path.dirname(self.cache_file), exist_ok=True)
+        temp_file = "{0}.{1}.{2}.tmp".format(self.cache_file, os.getpid(),
+                                             threading.get_ident())
+        with open(temp_file, "w") as cache:
+            json.dump(entries, cache)
+        os.replace(temp_file, self.cache_file)
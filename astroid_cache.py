@@ -0,0 +1,254 @@
+# -*- coding: utf-8 -*-
+
+# ------------------------------------------------------------------------------
+# Copyright Commvault Systems, Inc.
+# See LICENSE.txt in the project root for
+# license information.
+# ------------------------------------------------------------------------------
+
+"""File for sharing the astroid trees of the cvpysdk and AutomationUtils modules across runs.
+
+Almost every file of a form imports cvpysdk and AutomationUtils, so most of the time
+of the in-process pylint engine goes into building the astroid trees of those base
+modules from the mount path. AstroidCache persists the trees built while linting a
+form, so the runs of the other forms of the same build load them instead of
+building them again:
+
+    a. the trees are pickled to a file per mount path, pylint version and python
+       version on the local disk
+
+    b. every tree is stored with the content hash of its source file and is only
+       loaded while the file is unchanged
+
+    c. trees held in memory by a long running process, ex. the daemon, are dropped
+       when a form of another build or with changed base modules is linted
+
+Inference tips registered by the astroid brain plugins are local functions and can
+not be pickled, they are registered again by running the astroid transforms over
+every loaded tree.
+
+AstroidCache:
+
+    __init__()  -- Initialize instance of the AstroidCache class
+
+    load()      -- Loads the cached trees of the base modules of the mount of given files
+
+    save()      -- Stores the trees of the base modules built while linting
+
+tools_root()    -- Returns the tools folder of the mount holding given python file
+
+clear_trees()   -- Drops all the module trees held in memory by astroid
+"""
+
+import hashlib
+import io
+import os
+import pickle
+import sys
+import threading
+from constants import ASTROID_CACHE_PATH
+from constants import ASTROID_BASE_PACKAGES
+from result_cache import content_hash
+
+# source file and content hash of the base module trees held in memory by this process
+MODULE_DIGESTS = {}
+
+# pickling recurses over the depth of the trees, hence it runs in a thread of its own
+PICKLE_STACK_SIZE = 256 * 1024 * 1024
+PICKLE_RECURSION_LIMIT = 50000
+
+
+def tools_root(path):
+    """ Returns the tools folder of the mount holding given python file.
+
+        Args:
+            path(str)   -- Python file under the Automation or cvpysdk tree.
+
+        Returns:
+            str - Normalized tools folder, ex. f:/pc/mount/vaultcx/source/tools/, None if
+                  the file is outside the tools folder
+    """
+    normalized = os.path.normcase(os.path.abspath(path)).replace('\\', '/')
+    position = normalized.find('/tools/')
+    return normalized[:position + len('/tools/')] if position >= 0 else None
+
+
+def clear_trees():
+    """ Drops all the module trees held in memory by astroid and the module files it
+        found, along with the content hashes recorded for the base modules"""
+    import astroid
+
+    astroid.MANAGER.clear_cache()
+    MODULE_DIGESTS.clear()
+
+
+class _TreePickler(pickle.Pickler):
+    """Pickler storing other modules by name and dropping the local functions."""
+
+    def __init__(self, file, modules):
+        super().__init__(file, protocol=pickle.HIGHEST_PROTOCOL)
+        self.modules = modules
+
+    def persistent_id(self, obj):
+        """ Returns the reference stored instead of given object, None to pickle it"""
+        if callable(obj) and '<locals>' in getattr(obj, '__qualname__', ''):
+            return ('local',)
+        name = getattr(obj, 'name', None)
+        if type(obj).__name__ == 'Module' and name not in self.modules:
+            return ('module', name)
+        return None
+
+
+class _TreeUnpickler(pickle.Unpickler):
+    """Unpickler resolving the references stored by _TreePickler."""
+
+    def __init__(self, file, manager):
+        super().__init__(file)
+        self.manager = manager
+
+    def persistent_load(self, pid):
+        """ Returns the object of given reference"""
+        if pid[0] == 'module':
+            return self.manager.ast_from_module_name(pid[1])
+        return None
+
+
+class AstroidCache:
+    """Class for persisting the astroid trees of the base modules of a build."""
+
+    def __init__(self, logger, cache_dir=ASTROID_CACHE_PATH, packages=ASTROID_BASE_PACKAGES):
+        """ Initialize instances of the AstroidCache class
+
+            Args:
+                logger(object)  -- Logger object of the current run.
+
+                cache_dir(str)  -- Directory where the pickled trees are stored.
+
+                packages(tuple) -- Top level packages of the base modules.
+        """
+        self.logger = logger
+        self.cache_dir = cache_dir
+        self.packages = packages
+        self.root = None
+        self.loaded = set()
+
+    def __is_base(self, name):
+        """ Checks whether the module is part of the base packages"""
+        return any(name == package or name.startswith(package + '.')
+                   for package in self.packages)
+
+    def __cache_file(self):
+        """ Returns the pickle file of the mount of the current run"""
+        import astroid
+        import pylint
+
+        key = hashlib.sha256("{0}|{1}|{2}|{3}".format(
+            self.root, pylint.__version__, astroid.__version__, sys.version).encode())
+        return os.path.join(self.cache_dir, key.hexdigest() + '.pickle')
+
+    def __is_current(self, name, module):
+        """ Checks whether the tree was built from the current content of its source
+            file, and records its content hash. Trees of the files under the tools
+            folder of another mount are never current, ex. cvpysdk installed in the
+            site-packages is shared by all the mounts."""
+        source = module.file
+        if not source or tools_root(source) not in (None, self.root):
+            return False
+        try:
+            digest = content_hash(source)
+        except OSError:
+            return False
+        recorded = MODULE_DIGESTS.get(name)
+        if recorded is not None and recorded != (source, digest):
+            return False
+        MODULE_DIGESTS[name] = (source, digest)
+        return True
+
+    def load(self, paths):
+        """ Loads the cached trees of the base modules of the mount given files are
+            under, and drops the trees held in memory which are not current.
+
+            Args:
+                paths(list) -- Python files to be linted.
+        """
+        import astroid
+
+        roots = {tools_root(path) for path in paths} - {None}
+        if len(roots) != 1:
+            self.root = None
+            return
+        self.root = roots.pop()
+        manager = astroid.MANAGER
+        dropped = [name for name, module in list(manager.astroid_cache.items())
+                   if self.__is_base(name) and not self.__is_current(name, module)]
+        if dropped:
+            # astroid caches the module files found for the previous mount as well,
+            # hence all its caches are cleared
+            clear_trees()
+        try:
+            with open(self.__cache_file(), 'rb') as cache_file:
+                cached = _TreeUnpickler(cache_file, manager).load()
+        except FileNotFoundError:
+            cached = {}
+        except Exception as load_excep:
+            self.logger.error("Failed to load astroid cache: %s", load_excep)
+            cached = {}
+        loaded = 0
+        for name, (source, digest, module) in cached.items():
+            if name in manager.astroid_cache:
+                continue
+            MODULE_DIGESTS[name] = (source, digest)
+            if not self.__is_current(name, module):
+                MODULE_DIGESTS.pop(name, None)
+                continue
+            manager.visit_transforms(module)
+            manager.astroid_cache[name] = module
+            loaded += 1
+        self.loaded = {name for name in manager.astroid_cache if self.__is_base(name)}
+        self.logger.info("Astroid cache loaded %s of %s base modules, dropped %s stale",
+                         loaded, len(cached), len(dropped))
+
+    def save(self):
+        """ Stores the trees of the base modules held in memory if any of them was built
+            while linting, the pickle file is replaced atomically."""
+        import astroid
+
+        if self.root is None:
+            return
+        modules = {name: module for name, module in astroid.MANAGER.astroid_cache.items()
+                   if self.__is_base(name) and self.__is_current(name, module)}
+        if set(modules) <= self.loaded:
+            return
+        entries = {name: MODULE_DIGESTS[name] + (module,) for name, module in modules.items()}
+        errors = []
+        thread_stack = threading.stack_size(PICKLE_STACK_SIZE)
+        try:
+            writer = threading.Thread(target=self.__write, args=(entries, errors),
+                                      name="AstroidCache")
+            writer.start()
+        finally:
+            threading.stack_size(thread_stack)
+        writer.join()
+        if errors:
+            self.logger.error("Failed to save astroid cache: %s", errors[0])
+            return
+        self.loaded = set(modules)
+        self.logger.info("Astroid cache saved with %s base modules", len(modules))
+
+    def __write(self, entries, errors):
+        """ Pickles the trees to the cache file of the mount"""
+        limit = sys.getrecursionlimit()
+        sys.setrecursionlimit(max(limit, PICKLE_RECURSION_LIMIT))
+        try:
+            content = io.BytesIO()
+            _TreePickler(content, entries).dump(entries)
+            os.makedirs(self.cache_dir, exist_ok=True)
+            cache_file = self.__cache_file()
+            temp_file = "{0}.{1}.tmp".format(cache_file, os.getpid())
+            with open(temp_file, 'wb') as pickled:
+                pickled.write(content.getvalue())
+            os.replace(temp_file, cache_file)
+        except Exception as save_excep:
+            errors.append(save_excep)
+        finally:
+            sys.setrecursionlimit(limit)
@@ -0,0 +1,402 @@
+# -*- coding: utf-8 -*-
+
+# ------------------------------------------------------------------------------
+# Copyright Commvault Systems, Inc.
+# See LICENSE.txt in the project root for
+# license information.
+# ------------------------------------------------------------------------------
+
+r"""File for benchmarking the CVEmailPylint pipeline without the production services.
+
+A synthetic form of the given number of python files is generated, the files vary
+in length and in the number of pylint messages they raise. UCHelper.execute runs
+over the form end to end, with local stand-ins for the production services:
+
+    a. UpdateCenter and ENGWEBDB are served from a SQLite database holding the
+       form files, the form receivers and their email alias
+
+    b. devshare is a temporary directory, set through CVEMAIL_PYLINT_PATH
+
+    c. mail.commvault.com is a local SMTP sink accepting and dropping the emails,
+       set through CVEMAIL_PYLINT_MAIL_SERVER
+
+    d. the caches and the import graph are kept in the temporary directory, set
+       through CVEMAIL_PYLINT_HOME, so every benchmark starts cold
+
+The form is run several times as consecutive builds, optionally changing a part of
+the files between the builds to measure the cache and incremental modes. The stage
+timings of every run are read from pylint_timings.jsonl of the form and reported
+along with the files linted per second. The medians of the runs are appended to the
+benchmark history and compared with the earlier benchmarks of the same form size and
+options, a drop of the throughput beyond BENCHMARK_REGRESSION is reported as a
+regression and fails the benchmark.
+
+SmtpSink:
+
+    __init__()  -- Initialize instance of the SmtpSink class listening on a free port
+
+    start()     -- Starts accepting emails in a background thread
+
+    close()     -- Stops accepting emails
+
+generate_form()     -- Writes the python files of a synthetic form
+
+create_database()   -- Creates the SQLite stand-in for UpdateCenter and ENGWEBDB
+
+run_benchmark()     -- Runs the form builds and returns the stage timings of each run
+
+compare_history()   -- Appends the benchmark to the history and checks it for regressions
+
+    Usage:
+
+    Lint a form of 50 files three times in parallel mode:
+    >>python benchmark.py -files 50 -runs 3 -parallel
+
+    Change 10% of the files between the builds to measure the incremental mode:
+    >>python benchmark.py -files 200 -runs 3 -change 10 -incremental -engine inprocess
+
+    Arguments not known to the benchmark are passed to UCHelper, ex. -cache.
+"""
+
+import argparse
+import functools
+import json
+import os
+import random
+import shutil
+import socketserver
+import sqlite3
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+FORMID = "90000"
+BUILDID = 1000
+SOURCE_DIR = "vaultcx/Source/tools/Automation/Benchmark/"
+RECEIVERS = ("benchowner", "benchdev", "benchreviewer")
+
+CLEAN_FUNCTION = '''
+
+def scale_{index}(value, factor={index}):
+    """ Returns the value scaled by the factor.
+
+        Args:
+            value(int)  -- Value to be scaled.
+
+            factor(int) -- Factor of the scaling.
+    """
+    if value is None:
+        return None
+    return value * factor
+'''
+
+DIRTY_FUNCTION = '''
+
+def Scale{index}(a,b = [], *args):
+    import os
+    unused = {index}
+    if a == None: return b
+    try:
+        return a+b+len(os.environ)
+    except:
+        pass
+'''
+
+
+class SmtpSink(socketserver.ThreadingTCPServer):
+    """Class for a local SMTP server accepting and dropping the emails."""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self):
+        """ Initialize instances of the SmtpSink class on a free local port"""
+        super().__init__(("127.0.0.1", 0), SmtpSinkHandler)
+        self.messages = 0
+        self.lock = threading.Lock()
+        self.__thread = threading.Thread(target=self.serve_forever, name="SmtpSink",
+                                         daemon=True)
+
+    @property
+    def address(self):
+        """ Returns the host:port of the sink to be used as the mail server"""
+        return "{0}:{1}".format(*self.server_address)
+
+    def start(self):
+        """ Starts accepting emails in a background thread"""
+        self.__thread.start()
+
+    def close(self):
+        """ Stops accepting emails"""
+        self.shutdown()
+        self.server_close()
+
+
+class SmtpSinkHandler(socketserver.StreamRequestHandler):
+    """Class for answering the SMTP commands of a single session."""
+
+    def handle(self):
+        """ Answers the commands of the session and counts the received emails"""
+        self.reply("220 localhost SMTP sink")
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode("ascii", "replace")[:4].upper()
+            if command == "DATA":
+                self.reply("354 End data with <CR><LF>.<CR><LF>")
+                for data in iter(self.rfile.readline, b""):
+                    if data.rstrip(b"\r\n") == b".":
+                        break
+                with self.server.lock:
+                    self.server.messages += 1
+                self.reply("250 OK")
+            elif command == "QUIT":
+                self.reply("221 Bye")
+                return
+            else:
+                self.reply("250 OK")
+
+    def reply(self, text):
+        """ Sends a reply line to the client"""
+        self.wfile.write(text.encode("ascii") + b"\r\n")
+
+
+def generate_form(mount_path, files, min_functions, max_functions, seed, names=None):
+    """ Writes the python files of a synthetic form under the mount path. Every file
+        is given a share of functions raising pylint messages, so the files vary
+        from clean to heavily reported.
+
+        Args:
+            mount_path(str)     -- Directory where the form files are mounted.
+
+            files(int)          -- Number of python files of the form.
+
+            min_functions(int)  -- Minimum number of functions in a file.
+
+            max_functions(int)  -- Maximum number of functions in a file.
+
+            seed(int)           -- Seed of the generated content.
+
+            names(list)         -- Source file names to be written again, all the files
+                                   of the form are written if not given.
+
+        Returns:
+            list - Source file names of the form, relative to the mount path
+    """
+    generator = random.Random(seed)
+    sources = names or ["{0}module_{1:04d}.py".format(SOURCE_DIR, index)
+                        for index in range(files)]
+    os.makedirs(os.path.join(mount_path, SOURCE_DIR), exist_ok=True)
+    for source in sources:
+        dirty_share = generator.random()
+        content = ['"""Synthetic module of the CVEmailPylint benchmark."""\n']
+        for index in range(generator.randint(min_functions, max_functions)):
+            template = DIRTY_FUNCTION if generator.random() < dirty_share else CLEAN_FUNCTION
+            content.append(template.format(index=index))
+        with open(os.path.join(mount_path, source), "w") as source_file:
+            source_file.write("".join(content))
+    return sources
+
+
+def create_database(db_file, sources, builds):
+    """ Creates the SQLite stand-in for the UpdateCenter and ENGWEBDB tables queried
+        by UCHelper, holding the form files and receivers of every build.
+
+        Args:
+            db_file(str)    -- SQLite database file.
+
+            sources(list)   -- Source file names of the form.
+
+            builds(list)    -- Build ids of the form.
+    """
+    connection = sqlite3.connect(db_file)
+    try:
+        connection.executescript(
+            "create table MapFormToSourceFiles(nFormID integer, nBuildID integer, "
+            "sSourceFileName text);"
+            "create table FormProperties(nFormID integer, nBuildID integer, "
+            "sPropertyName text, spropertyvalue text);"
+            "create table MapRestrictedRulesToFormCodeReviewers(nFormID integer, "
+            "nBuildID integer, sReviewerAlias text);"
+            "create table forminfo(nFormID integer, nBuildID integer, sCreatedBy text);"
+            "create table vwUsers(ProdcertName text, emailAlias text, isDeleted integer);")
+        owner, developer, reviewer = RECEIVERS
+        for buildid in builds:
+            # a file outside the python trees is filtered out by validate_files
+            connection.executemany("insert into MapFormToSourceFiles values (?, ?, ?)",
+                                   [(FORMID, buildid, source) for source in
+                                    sources + ["vaultcx/Source/common/benchmark.cpp"]])
+            connection.execute("insert into FormProperties values (?, ?, 'DevOwner', ?)",
+                               (FORMID, buildid, owner))
+            connection.execute("insert into MapRestrictedRulesToFormCodeReviewers "
+                               "values (?, ?, ?)", (FORMID, buildid, reviewer))
+            connection.execute("insert into forminfo values (?, ?, ?)",
+                               (FORMID, buildid, developer))
+        connection.executemany("insert into vwUsers values (?, ?, 0)",
+                               [(user, user) for user in RECEIVERS])
+        connection.commit()
+    finally:
+        connection.close()
+
+
+def run_benchmark(arguments, options):
+    """ Runs the synthetic form as consecutive builds against the local stand-ins.
+
+        Args:
+            arguments(object)   -- Parsed arguments of the benchmark.
+
+            options(list)       -- UCHelper arguments applied to every run.
+
+        Returns:
+            list - Stage timings of every run as recorded in pylint_timings.jsonl
+    """
+    workdir = tempfile.mkdtemp(prefix="cvemail_benchmark_")
+    sink = SmtpSink()
+    sink.start()
+    os.environ["CVEMAIL_PYLINT_PATH"] = os.path.join(workdir, "share")
+    os.environ["CVEMAIL_PYLINT_HOME"] = os.path.join(workdir, "state")
+    os.environ["CVEMAIL_PYLINT_MAIL_SERVER"] = sink.address
+    # imported once the environment points the package to the stand-ins
+    from uc_helper import UCHelper
+    from db_pool import ConnectionPool
+    from alias_cache import AliasCache
+    from mail_dispatcher import get_dispatcher
+    from constants import PATH
+    from constants import MAIL_SERVER
+    from constants import TIMINGS_NAME
+
+    mount_path = os.path.join(workdir, "mount")
+    db_file = os.path.join(workdir, "updatecenter.db")
+    generator = random.Random(arguments.Seed)
+    builds = [BUILDID + run for run in range(arguments.Runs)]
+    sources = generate_form(mount_path, arguments.Files, arguments.MinFunctions,
+                            arguments.MaxFunctions, arguments.Seed)
+    create_database(db_file, sources, builds)
+    os.makedirs(os.path.join(PATH, FORMID), exist_ok=True)
+    pool = ConnectionPool(functools.partial(sqlite3.connect, db_file, check_same_thread=False))
+    alias_cache = AliasCache(os.path.join(workdir, "state", "aliases.json"))
+    timings = []
+    try:
+        for run, buildid in enumerate(builds):
+            if run and arguments.Change:
+                changed = generator.sample(sources,
+                                           max(1, len(sources) * arguments.Change // 100))
+                generate_form(mount_path, len(changed), arguments.MinFunctions,
+                              arguments.MaxFunctions, generator.random(), changed)
+            helper = UCHelper(pool, pool, alias_cache)
+            helper.execute(['-formid', FORMID, '-buildid', str(buildid),
+                            '-mountpath', mount_path] + options)
+            with open(os.path.join(PATH, FORMID, TIMINGS_NAME)) as timings_file:
+                timings.append(json.loads(timings_file.readlines()[-1]))
+        get_dispatcher(MAIL_SERVER).close()
+        print("Emails received by the SMTP sink:", sink.messages)
+    finally:
+        pool.close()
+        sink.close()
+        if arguments.Keep:
+            print("Benchmark files kept in", workdir)
+        else:
+            shutil.rmtree(workdir, ignore_errors=True)
+    return timings
+
+
+def compare_history(history_file, record, threshold):
+    """ Appends the benchmark to the history and compares its throughput with the
+        median of the last five benchmarks of the same form size and options.
+
+        Args:
+            history_file(str)   -- File holding a json line per benchmark.
+
+            record(dict)        -- Medians of the benchmark.
+
+            threshold(float)    -- Drop of the throughput reported as a regression.
+
+        Returns:
+            bool - True if the throughput dropped beyond the threshold
+    """
+    earlier = []
+    try:
+        with open(history_file) as history:
+            for line in history:
+                entry = json.loads(line)
+                if entry["config"] == record["config"]:
+                    earlier.append(entry["files_per_second"])
+    except (OSError, ValueError, KeyError):
+        pass
+    os.makedirs(os.path.dirname(history_file), exist_ok=True)
+    with open(history_file, "a") as history:
+        history.write(json.dumps(record) + "\n")
+    if not earlier:
+        print("No earlier benchmark of this configuration in", history_file)
+        return False
+    baseline = statistics.median(earlier[-5:])
+    change = (record["files_per_second"] - baseline) / baseline
+    print("Throughput {0:.2f} files/s, {1:+.1%} against the median of the last {2} "
+          "benchmarks".format(record["files_per_second"], change, len(earlier[-5:])))
+    if change < -threshold:
+        print("REGRESSION: throughput dropped by more than {0:.0%}".format(threshold))
+        return True
+    return False
+
+
+def main():
+    """ Runs the benchmark as per the command line arguments and returns the exit code"""
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-files', help='Number of python files of the form', dest='Files',
+                        type=int, default=20)
+    parser.add_argument('-minfunctions', help='Minimum number of functions in a file',
+                        dest='MinFunctions', type=int, default=5)
+    parser.add_argument('-maxfunctions', help='Maximum number of functions in a file',
+                        dest='MaxFunctions', type=int, default=60)
+    parser.add_argument('-runs', help='Number of builds of the form to be run', dest='Runs',
+                        type=int, default=3)
+    parser.add_argument('-change', help='Percentage of the files changed between builds',
+                        dest='Change', type=int, default=0)
+    parser.add_argument('-seed', help='Seed of the generated files', dest='Seed', type=int,
+                        default=0)
+    parser.add_argument('-history', help='File holding the earlier benchmarks',
+                        dest='History')
+    parser.add_argument('-keep', help='Keep the generated files of the benchmark',
+                        dest='Keep', action='store_true')
+    # remaining arguments are the UCHelper options, ex. -parallel -engine inprocess
+    arguments, options = parser.parse_known_args()
+
+    timings = run_benchmark(arguments, options)
+    failed = [timing["buildid"] for timing in timings if timing["status"] != "completed"]
+    stages = sorted({stage for timing in timings for stage in timing["stages"]})
+    print("{0:<8} {1:>10} {2:>10}".format("build", "seconds", "files/s"))
+    for timing in timings:
+        print("{0:<8} {1:>10.3f} {2:>10.2f} {3}".format(
+            timing["buildid"], timing["total_seconds"],
+            timing["files"] / timing["total_seconds"], timing["status"]))
+    print("{0:<24} {1:>12} {2:>8}".format("stage", "median s", "calls"))
+    medians = {}
+    for stage in stages:
+        runs = [timing["stages"].get(stage, {"seconds": 0, "count": 0}) for timing in timings]
+        medians[stage] = statistics.median(run["seconds"] for run in runs)
+        print("{0:<24} {1:>12.4f} {2:>8}".format(stage, medians[stage],
+                                                 runs[-1]["count"]))
+    if failed:
+        print("Builds failed:", failed)
+        return 1
+
+    from constants import BENCHMARK_HISTORY_PATH
+    from constants import BENCHMARK_REGRESSION
+    record = {"date": time.strftime("%Y-%m-%dT%H:%M:%S"),
+              "config": {"files": arguments.Files, "functions": [arguments.MinFunctions,
+                                                                 arguments.MaxFunctions],
+                         "runs": arguments.Runs, "change": arguments.Change,
+                         "seed": arguments.Seed, "options": options},
+              "files_per_second": round(statistics.median(
+                  timing["files"] / timing["total_seconds"] for timing in timings), 3),
+              "stages": {stage: round(seconds, 4) for stage, seconds in medians.items()}}
+    regressed = compare_history(arguments.History or BENCHMARK_HISTORY_PATH, record,
+                                BENCHMARK_REGRESSION)
+    return 1 if regressed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
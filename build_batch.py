@@ -0,0 +1,250 @@
+# -*- coding: utf-8 -*-
+
+# ------------------------------------------------------------------------------
+# Copyright Commvault Systems, Inc.
+# See LICENSE.txt in the project root for
+# license information.
+# ------------------------------------------------------------------------------
+
+r"""File for running CVEmailPylint over all the forms of a build in one process.
+
+The forms of a build often touch the same Automation and cvpysdk files, which are
+linted once per form when every form is run by its own UCHelper process. BuildBatch
+runs the forms of a build together:
+
+    a. the python files of all the forms are fetched from MapFormToSourceFiles in a
+       single query
+
+    b. the forms are run by UCHelper in a pool of threads, each form still gets its
+       own report files, html report and email under PATH\<formid>
+
+    c. every unique file of the mount is linted once through SharedLint, the forms
+       sharing a file wait for the form linting it and reuse its result
+
+SharedLint:
+
+    __init__()  -- Initialize instance of the SharedLint class
+
+    lint()      -- Lints the files not claimed by another form and returns the results
+                   of all the given files
+
+BuildBatch:
+
+    __init__()          -- Initialize instance of the BuildBatch class
+
+    get_form_files()    -- Fetches the python files of the forms of the build
+
+    execute()           -- Runs UCHelper for every form of the build and returns whether
+                           all of them completed
+
+    Usage:
+
+    Lint all the forms of a build:
+    >>python build_batch.py -buildid 1100080 -mountpath F:\PC\test-mount -parallel
+
+    Lint the given forms of a build:
+    >>python build_batch.py -buildid 1100080 -mountpath F:\PC\test-mount
+        -formids 50888 50890 -jobs 4 -engine inprocess
+
+    Arguments not known to the batch are passed to UCHelper of every form, ex. -cache.
+    The batch exits with 1 if any form failed.
+"""
+
+import argparse
+import functools
+import shutil
+import sys
+import tempfile
+import threading
+from concurrent.futures import Future
+from concurrent.futures import ThreadPoolExecutor
+import pyodbc
+from uc_helper import UCHelper
+from uc_helper import source_file_filter
+from db_pool import ConnectionPool
+from alias_cache import AliasCache
+from constants import UC_CONNECTION
+from constants import ENGWEB_CONNECTION
+from constants import FORM_QUERY_CHUNK
+from constants import SOURCE_FILE_PREFIXES
+
+
+class SharedLint:
+    """Class for linting every file shared by the forms of a build once."""
+
+    def __init__(self, spool_dir=None):
+        """ Initialize instances of the SharedLint class
+
+            Args:
+                spool_dir(str)  -- Spool folder shared by the forms in streaming mode, the
+                                   spool files must outlive the form linting them.
+        """
+        self.spool_dir = spool_dir
+        self.linted = 0
+        self.reused = 0
+        self.__results = {}
+        self.__lock = threading.Lock()
+
+    def lint(self, linter, paths, spool_files):
+        """ Lints the files not claimed by another form through the CvemailPylint of
+            the form, then waits for the files claimed by the other forms.
+
+            Args:
+                linter(object)      -- CvemailPylint of the form.
+
+                paths(list)         -- Python files to be linted.
+
+                spool_files(list)   -- Spool file of every file in streaming mode.
+
+            Returns:
+                list - (output, PylintResult) of every file in the order of paths
+        """
+        owned = []
+        with self.__lock:
+            for path, spool_file in zip(paths, spool_files):
+                if path not in self.__results:
+                    self.__results[path] = Future()
+                    owned.append((path, spool_file))
+            self.linted += len(owned)
+            self.reused += len(paths) - len(owned)
+        if owned:
+            # the claimed files are linted before waiting on the other forms, so the
+            # forms never wait on each other in a cycle
+            try:
+                linted = linter.lint_results([path for path, _ in owned],
+                                             [spool_file for _, spool_file in owned])
+            except Exception as lint_excep:
+                for path, _ in owned:
+                    self.__results[path].set_exception(lint_excep)
+                raise
+            for (path, _), result in zip(owned, linted):
+                self.__results[path].set_result(result)
+        return [self.__results[path].result() for path in paths]
+
+
+class BuildBatch:
+    """Class for running CVEmailPylint over the forms of a build."""
+
+    def __init__(self, buildid, mountpath, formids=None, max_jobs=4, options=None,
+                 prefixes=SOURCE_FILE_PREFIXES):
+        """ Initialize instances of the BuildBatch class
+
+            Args:
+                buildid(str)    -- Build id of the forms.
+
+                mountpath(str)  -- Mount path of the build.
+
+                formids(list)   -- Forms to be run, all the forms of the build if not given.
+
+                max_jobs(int)   -- Maximum number of forms run at a time.
+
+                options(list)   -- UCHelper arguments applied to every form,
+                                   ex. ['-parallel', '-cache'].
+
+                prefixes(tuple) -- Folders of the source files linted, relative to the
+                                   mount path.
+        """
+        self.buildid = buildid
+        self.mountpath = mountpath
+        self.formids = formids
+        self.max_jobs = max_jobs
+        self.prefixes = tuple(prefixes)
+        self.options = (options or []) + ['-prefixes'] + list(self.prefixes)
+        self.uc_pool = ConnectionPool(functools.partial(pyodbc.connect, UC_CONNECTION),
+                                      max_jobs)
+        self.engweb_pool = ConnectionPool(functools.partial(pyodbc.connect, ENGWEB_CONNECTION),
+                                          max_jobs)
+        self.alias_cache = AliasCache()
+
+    def get_form_files(self):
+        """ Fetches the python files of the forms of the build in a single query, the
+            given forms are fetched in chunks of FORM_QUERY_CHUNK.
+
+            Returns:
+                dict - formid to the list of its source file rows
+        """
+        condition, params = source_file_filter(self.prefixes)
+        query = ("select nFormID, sSourceFileName from MapFormToSourceFiles where "
+                 "nBuildID = ? and " + condition)
+        queries = [(query, [self.buildid] + params)]
+        if self.formids:
+            queries = []
+            for start in range(0, len(self.formids), FORM_QUERY_CHUNK):
+                chunk = [int(formid) for formid in self.formids[start:start + FORM_QUERY_CHUNK]]
+                queries.append((query + " and nFormID in ({0})".format(", ".join("?" * len(chunk))),
+                                [self.buildid] + params + chunk))
+        form_files = {str(formid): [] for formid in self.formids or []}
+        with self.uc_pool.connection() as conn:
+            cursor = conn.cursor()
+            for chunk_query, params in queries:
+                cursor.execute(chunk_query, params)
+                for formid, source_file in cursor:
+                    form_files.setdefault(str(formid), []).append((source_file,))
+        return form_files
+
+    def execute(self):
+        """ Runs UCHelper for every form of the build, the files shared by the forms
+            are linted once.
+
+            Returns:
+                bool - True if all the forms completed, the failed forms are printed
+        """
+        form_files = self.get_form_files()
+        print("Forms of build", self.buildid, ":", sorted(form_files))
+        # spool files of the streaming mode are read by all the forms sharing a file
+        spool_dir = tempfile.mkdtemp(prefix="cvemail_batch_")
+        shared_lint = SharedLint(spool_dir)
+        futures = {}
+        try:
+            with ThreadPoolExecutor(max_workers=self.max_jobs) as executor:
+                for formid, source_files in sorted(form_files.items()):
+                    helper = UCHelper(self.uc_pool, self.engweb_pool, self.alias_cache,
+                                      shared_lint, source_files)
+                    futures[formid] = executor.submit(
+                        helper.execute, ['-formid', formid, '-buildid', str(self.buildid),
+                                         '-mountpath', self.mountpath] + self.options)
+        finally:
+            shutil.rmtree(spool_dir, ignore_errors=True)
+            self.uc_pool.close()
+            self.engweb_pool.close()
+        failed = []
+        for formid, future in sorted(futures.items()):
+            try:
+                if not future.result():
+                    print("Form", formid, "failed, see the log of the form")
+                    failed.append(formid)
+            except Exception as form_excep:
+                print("Form", formid, "failed with error:", form_excep)
+                failed.append(formid)
+        print("Files linted:", shared_lint.linted, "reused from other forms:", shared_lint.reused)
+        if failed:
+            print("Forms failed:", failed)
+        return not failed
+
+
+def main():
+    """ Runs the forms of a build as per the command line arguments.
+
+        Returns:
+            int - Exit code of the batch, 1 if any form failed
+    """
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-buildid', help='Build id to be processed', dest='Buildid',
+                        required=True)
+    parser.add_argument('-mountpath', help='Mount path of the build', dest='Mountpath',
+                        required=True)
+    parser.add_argument('-formids', help='Forms to be processed, all forms of the build '
+                        'if not given', dest='Formids', nargs='+')
+    parser.add_argument('-jobs', help='Number of forms processed at a time', dest='Jobs',
+                        type=int, default=4)
+    parser.add_argument('-prefixes', help='Folders of the source files linted',
+                        dest='Prefixes', nargs='+', default=list(SOURCE_FILE_PREFIXES))
+    # remaining arguments are the UCHelper options, ex. -parallel -engine inprocess
+    arguments, options = parser.parse_known_args()
+    completed = BuildBatch(arguments.Buildid, arguments.Mountpath, arguments.Formids,
+                           arguments.Jobs, options, arguments.Prefixes).execute()
+    return 0 if completed else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
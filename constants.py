@@ -16,10 +16,93 @@ This file consists of the constants for:
 
     cvemail_pylint file
 
+    result_cache file
+
+    html_report file
+
+    uc_helper file
+
+    alias_cache file
+
+    pylint_daemon file
+
+    incremental and import_graph files
+
+    mail_dispatcher file
+
+    pylint_cleanup_script file
+
+    timing file
+
+    benchmark file
+
+    astroid_cache file
+
+    build_batch file
+
+    result_store file
+
+    lint_shard file
+
+    report_archive file
+
+    db_pool file
+
+    pylint_parser file
 
 
 """
 
-PATH = r"\\devshare\devl\CoreAutomation\Pylint"
+import os
+
+# the environment overrides point a run to local stand-ins, ex. in benchmark.py
+PATH = os.environ.get("CVEMAIL_PYLINT_PATH", r"\\devshare\devl\CoreAutomation\Pylint")
 PYLINT_EXT = "_pylint.txt"
+REPORT_ARCHIVE_NAME = "pylint_reports.zip"
 LOGCONSTANT = "pylint_generator.log"
+LOG_BATCH_SIZE = 200
+STATE_PATH = os.environ.get("CVEMAIL_PYLINT_HOME",
+                            os.path.join(os.path.expanduser("~"), ".cvemail_pylint"))
+MAIL_SERVER = os.environ.get("CVEMAIL_PYLINT_MAIL_SERVER", "mail.commvault.com")
+
+CACHE_PATH = os.path.join(STATE_PATH, "cache")
+CACHE_MAX_SIZE_MB = 512
+CACHE_MAX_AGE_DAYS = 30
+REPORT_MAX_SIZE = 1024 * 1024
+UC_CONNECTION = ("DRIVER={SQL Server};SERVER=UpdateCenter;"
+                 "DATABASE=ProdUpdateCenter;"
+                 "UID=umsuser;PWD=umsuser")
+ENGWEB_CONNECTION = (r"DRIVER={SQL Server};SERVER=ENGWEBAGL\ENGWEBDB;"
+                     r"DATABASE=Resources;"
+                     r"UID=readonly;PWD=readonly")
+ALIAS_CACHE_PATH = os.path.join(STATE_PATH, "aliases.json")
+ALIAS_CACHE_TTL_HOURS = 24
+SPOOL_PATH = os.path.join(STATE_PATH, "spool")
+DAEMON_POLL_SECONDS = 5
+DAEMON_STALE_SECONDS = 10 * 60
+MANIFEST_NAME = "pylint_manifest.json"
+IMPORT_GRAPH_PATH = os.path.join(STATE_PATH, "imports.json")
+IMPORT_GRAPH_MAX_ENTRIES = 50000
+MAIL_QUEUE_SIZE = 100
+MAIL_RETRIES = 3
+MAIL_BACKOFF_SECONDS = 2
+CLEANUP_INDEX_PATH = os.path.join(STATE_PATH, "devshare_index.json")
+FORM_QUERY_CHUNK = 1000
+# source files of a form linted by default, overridden by the -prefixes argument
+SOURCE_FILE_PREFIXES = ("vaultcx/Source/tools/Automation/", "vaultcx/Source/tools/cvpysdk/")
+SOURCE_FILE_EXT = ".py"
+TIMINGS_NAME = "pylint_timings.jsonl"
+PROMETHEUS_FILE_NAME = "cvemail_pylint.prom"
+# benchmark history is kept in the user's folder even when STATE_PATH is overridden
+BENCHMARK_HISTORY_PATH = os.path.join(os.path.expanduser("~"), ".cvemail_pylint",
+                                      "benchmark_history.jsonl")
+BENCHMARK_REGRESSION = 0.2
+ASTROID_CACHE_PATH = os.path.join(STATE_PATH, "astroid")
+ASTROID_BASE_PACKAGES = ("cvpysdk", "AutomationUtils")
+RESULT_STORE_PATH = os.path.join(STATE_PATH, "results.db")
+SHARD_POLL_SECONDS = 1
+SHARD_STALE_SECONDS = 600
+# idle pooled connections are checked before reuse, ex. dropped by a firewall
+POOL_PING_SECONDS = 60
+# messages of every category kept per file in streaming mode, the counts are complete
+STREAM_MAX_MESSAGES = 1000
@@ -15,7 +15,7 @@ r""" File for Running Pylint on given Python files, check the file existence, st
 
         a. initializing json_data dictionary to accept
 
-        b. initializing msg variable to send Email
+        b. initializing html report and msg variable to send Email
 
         c. initializing logger objects for logger messages
 
@@ -37,197 +37,445 @@ CvemailPylint:
 
     run_pylint()        -- Runs the pylint on given python file and store it in variable.
 
-    pylint_text()       -- Creates text file and stores the pylint output in it.
+    lint_results()      -- Runs the pylint on given python files and returns the parsed results.
 
-    store_pylint()      -- Stores pylint output in a variable in html format
+    lint_files()        -- Runs the pylint on given python files with the selected engine.
+
+    lint_file()         -- Runs the pylint subprocess on a single python file.
+
+    pylint_text()       -- Queues the pylint output of every file to be written in a text file.
+
+    store_pylint()      -- Adds parsed pylint output of a file to the html report
+
+    record_results()    -- Records the results of the form build in the result store
 
     mail_pylint()       -- Sends html format pylint output through email
 
+    lint()              -- Runs the pylint over the files and writes the report files.
+
+    close()             -- Releases the logger of the run.
+
     execute()           -- Main method which contains all the methods inside.
                            Starts the CvemailPylint execution.
     """
 
 from email.mime.text import MIMEText
 from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import io
 import sys
 import os
 import os.path
+import shutil
+import sqlite3
 import subprocess
-import smtplib
-import re
+import tempfile
+import time
 from constants import PATH
 from constants import PYLINT_EXT
+from constants import REPORT_ARCHIVE_NAME
 from logger import Logger
+from inprocess_pylint import InProcessPylint
+from astroid_cache import AstroidCache
+from result_cache import ResultCache
+from result_cache import content_hash
+from result_store import ResultStore
+from pylint_parser import parse_pylint_output
+from pylint_parser import SpoolingParser
+from report_writer import ReportWriter
+from report_archive import ReportArchive
+from html_report import HtmlReport
+from incremental import IncrementalLint
+from mail_dispatcher import get_dispatcher
+from timing import StageTimer
+from timing import timed
 
 
 class CvemailPylint:
     """ Main controller class for running Pylint over given python files"""
 
-    def __init__(self, formid=None):
-        """ Initialize instances of the CvemailPylint class"""
+    def __init__(self, formid=None, parallel=False, workers=None, engine="subprocess",
+                 cache=False, incremental=False, buildid=None, digest_window=0, timer=None,
+                 stream=False, astroid_cache=False, shared_lint=None, shard=None,
+                 archive=False):
+        """ Initialize instances of the CvemailPylint class
+
+            Args:
+                formid(str)     -- Update form id for which pylint is run.
+
+                parallel(bool)  -- Runs pylint over the files through a pool of workers.
+
+                workers(int)    -- Maximum number of pylint processes running at a time,
+                                   defaults to the number of cores.
+
+                engine(str)     -- "subprocess" runs one pylint process per file,
+                                   "inprocess" lints all files in the current process.
+
+                cache(bool)     -- Reuses the pylint output of files whose content did not
+                                   change since they were last linted.
+
+                incremental(bool) -- Reuses the results of the previous build of the form
+                                     for the files unchanged since then.
+
+                buildid(str)    -- Build id for which pylint is run.
+
+                digest_window(int) -- Seconds the email is held to be merged with the
+                                      emails of other builds of the form, 0 sends it
+                                      right away.
+
+                timer(object)   -- StageTimer timing the stages of the run.
+
+                stream(bool)    -- Parses the pylint output of every file while it is
+                                   written to a local spool file, which is copied to the
+                                   report file, instead of holding it in memory.
+
+                astroid_cache(bool) -- Shares the astroid trees of the cvpysdk and
+                                       AutomationUtils modules across the runs of a build
+                                       in the in-process engine.
+
+                shared_lint(object) -- SharedLint of a build batch, the files shared with
+                                       the other forms of the batch are linted once.
+
+                shard(object)   -- ShardedLint linting the files through the workers of
+                                   a shard spool directory.
+
+                archive(bool)   -- Writes the report files of the form into a single
+                                   compressed archive instead of a file per report.
+        """
         self.json_data = {}
-        self.logger = Logger(formid).get_log()
+        # files of the form not found on the mount path, reported without being linted
+        self.missing_files = []
+        self.parallel = parallel
+        self.workers = workers or os.cpu_count() or 1
+        self.log = Logger(formid)
+        self.logger = self.log.get_log()
+        self.engine = None
+        if engine == "inprocess":
+            self.engine = InProcessPylint(
+                self.logger, astroid_cache=AstroidCache(self.logger) if astroid_cache else None)
+        self.cache = ResultCache(self.logger) if cache else None
+        self.writer = None
         # self.logger.initialize_logger()
-        self.msg = ("<html>"
-                    "<body>"
-                    "<style> "
-                    "#tbl{ width:20%; border: 2px solid black;"
-                    "padding: 8px; font-size:15px; font-family: Georgia;}"
-                    "#td1{background-color: #b3c6ff; font-family: Georgia;}"
-                    "#td2{border: 1px solid #b3c6ff; font-family: Georgia;}"
-                    "</style>"
-                    "<p style="'font-size:20px; font-family: Georgia;'">"
-                    "Hi,<br>  The output of running "
-                    "pylint over the list of files shared is:</p></body>"
-                    "</html>")
+        self.report = HtmlReport(mark_fresh=incremental)
+        self.msg = None
         self.form_id = formid
-
+        self.build_id = buildid
+        self.digest_window = digest_window
+        self.timer = timer or StageTimer()
+        self.stream = stream
+        self.spool_dir = None
+        self.shared_lint = shared_lint
+        self.shard = shard
+        self.archive_reports = archive
+        self.archive = None
+        self.result_store = ResultStore()
+        self.previous_scores = {}
+        self.durations = {}
+        self.incremental = None
+        if incremental:
+            self.incremental = IncrementalLint(self.logger, os.path.join(PATH, formid), buildid)
+
+    @timed("run_pylint")
     def run_pylint(self):
-        """ It runs the pylint on given python file and stores it in a list"""
-        std_output = []
+        """ It runs the pylint on given python file and stores it in a list.
+            Files found in the result cache are not linted again, in incremental
+            mode the results of the previous build are reused for the files
+            unchanged since then. The output keeps the order of json_data["path"].
+            In streaming mode the output of every file is held in a spool file, so
+            only the parsed results of the form are kept in memory."""
+        paths = self.json_data["path"]
+        reused, dependents = {}, set()
+        if self.incremental:
+            reused, dependents = self.incremental.plan(paths)
+        std_output = [None] * len(paths)
+        pending = []
+        for index, path in enumerate(paths):
+            if path in reused:
+                std_output[index] = (None,) + reused[path]
+                continue
+            # dependents of changed files are linted again even if their content is cached
+            spool_file = self.__spool_file(index)
+            cached = (self.cache.get(path, spool_file)
+                      if self.cache and path not in dependents else None)
+            if cached:
+                self.logger.info("Pylint output reused from cache for file: %s", path)
+                std_output[index] = (cached['output'], cached['result'], None)
+            else:
+                pending.append(index)
+
+        pending_paths = [paths[index] for index in pending]
+        spool_files = [self.__spool_file(index) for index in pending]
+        if self.shared_lint:
+            linted = self.shared_lint.lint(self, pending_paths, spool_files)
+        else:
+            linted = self.lint_results(pending_paths, spool_files)
+        for index, (output, result) in zip(pending, linted):
+            std_output[index] = (output, result, None)
+            if self.cache and self.stream:
+                self.cache.put(paths[index], None, result, output)
+            elif self.cache:
+                self.cache.put(paths[index], output, result)
+        if self.cache:
+            self.cache.log_stats()
+            self.cache.evict()
+
         try:
-            for path in self.json_data["path"]:
-                process = subprocess.run(['pylint', path, '-r', 'y'], stdout=subprocess.PIPE)
-                std_output.append(process.stdout.decode())
-                self.logger.info("Pylint output created for file: %s", path)
+            self.previous_scores = self.result_store.previous_scores(paths, self.build_id)
+        except sqlite3.Error as store_excep:
+            self.logger.error("Failed to read previous scores from result store: %s",
+                              store_excep)
+        pylint_output = deque(std_output)
+        self.pylint_text(pylint_output)
+        self.record_results(paths, std_output)
+        if self.incremental:
+            results = {path: (result, reused_build or self.build_id)
+                       for path, (_, result, reused_build) in zip(paths, std_output)}
+            self.writer.write(self.incremental.manifest_file, self.incremental.manifest(results))
+
+    def __spool_file(self, index):
+        """ Returns the spool file of the output of the index-th file in streaming mode"""
+        if not self.stream:
+            return None
+        return os.path.join(self.spool_dir, "{0}_{1}.txt".format(self.form_id, index))
+
+    def lint_results(self, paths, spool_files):
+        """ Runs the pylint on given python files and returns the output, or the spool
+            file holding it in streaming mode, and the parsed result of every file.
+            With a shard spool the files are linted by its workers.
+
+            Args:
+                paths(list)         -- Python files to be linted.
+
+                spool_files(list)   -- Spool file of every file in streaming mode.
+
+            Returns:
+                list - (output, PylintResult) of every file in the order of paths
+        """
+        if self.shard:
+            return self.shard.lint(self, paths, spool_files)
+        if self.stream:
+            return list(zip(spool_files, self.lint_files(paths, spool_files)))
+        return [(output, parse_pylint_output(output)) for output in self.lint_files(paths)]
+
+    def lint_files(self, paths, spool_files=None):
+        """ Runs the pylint on given python files and returns the output in the same order.
+            In parallel mode at most self.workers pylint processes run at a time.
+            The in-process engine lints all the files one after another in the
+            current interpreter. With spool files the output of every file is
+            streamed to its spool file and the parsed results are returned."""
+        spool_files = spool_files or [None] * len(paths)
+        try:
+            if self.engine:
+                self.logger.info("Running pylint in process over %s files", len(paths))
+                outputs = []
+                with self.timer.stage("astroid_cache"):
+                    self.engine.load_cache(paths, self.build_id)
+                for path, spool_file in zip(paths, spool_files):
+                    with self.timer.stage("lint_file"):
+                        outputs.append(self.__lint_timed(path, spool_file))
+                with self.timer.stage("astroid_cache"):
+                    self.engine.save_cache()
+                return outputs
+            if self.parallel and len(paths) > 1:
+                self.logger.info("Running pylint in parallel with %s workers", self.workers)
+                with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                    return list(executor.map(self.__lint_timed, paths, spool_files))
+            return [self.__lint_timed(path, spool_file)
+                    for path, spool_file in zip(paths, spool_files)]
         except OSError as fail_pylint:
             self.logger.error("Failed to create pylint output.\n %s", str(fail_pylint))
             raise Exception(str(fail_pylint))
 
-        pylint_output = deque(std_output)
-        self.pylint_text(pylint_output)
-
+    def __lint_timed(self, path, spool_file):
+        """ Lints given python file with the selected engine and records the duration"""
+        start = time.perf_counter()
+        try:
+            if self.engine:
+                return self.engine.lint_file(path, spool_file, self.build_id)
+            return self.lint_file(path, spool_file)
+        finally:
+            self.durations[path] = time.perf_counter() - start
+
+    @timed("lint_file")
+    def lint_file(self, path, spool_file=None):
+        """ Runs the pylint subprocess on given python file and returns its output. With
+            a spool file the output is read line by line as pylint prints it, written
+            to the spool file and parsed, and the parsed result is returned."""
+        if spool_file is None:
+            # pylint exits non zero whenever it reports messages
+            process = subprocess.run(['pylint', path, '-r', 'y'], stdout=subprocess.PIPE,
+                                     check=False)
+            self.logger.info("Pylint output created for file: %s", path)
+            return process.stdout.decode()
+        with open(spool_file, 'w', encoding='utf-8') as spool, \
+                subprocess.Popen(['pylint', path, '-r', 'y'], stdout=subprocess.PIPE) as process:
+            parser = SpoolingParser(spool)
+            for line in io.TextIOWrapper(process.stdout, encoding='utf-8'):
+                parser.write(line)
+            parser.close()
+        self.logger.info("Pylint output streamed for file: %s", path)
+        return parser.result
+
+    @timed("pylint_text")
     def pylint_text(self, pylint_output):
-        """ Creates text file within given formid folder name,
-            check if folder is exist then store the text file in it and if
-            it's not exist then creates the folder with formid and storing
-            text file by writing the pylint output in it."""
+        """ Creates text file within given formid folder name, the folder is
+            created if it does not exist. The text files are written by the report
+            writer in background while the html message is generated from the
+            pylint output already in memory. In archive mode the text files are
+            packed into the report archive of the form."""
         try:
-            directory = PATH + "\\" + self.form_id
-            if os.path.exists(directory):
-                for path in self.json_data["path"]:
-                    save_path = PATH + "\\" + self.form_id
-                    file_name = os.path.splitext(os.path.basename(path))[0]
-                    combine_path = file_name + PYLINT_EXT
-                    pylint_file = os.path.join(save_path, combine_path)
-                    with open(pylint_file, "w") as text_file:
-                        self.logger.info("Text file created successfully")
-                        text_file.write(str(pylint_output.popleft()))
-                        self.logger.info("Wrote Pylint output in text file as %s", pylint_file)
-                        text_file.close()
-                        self.store_pylint(pylint_file, path)
-            else:
+            directory = os.path.join(PATH, self.form_id)
+            if not os.path.exists(directory):
                 os.makedirs(directory)
                 self.logger.info("Directory created as %s", directory)
-                for path in self.json_data["path"]:
-                    save_path = PATH + "\\" + self.form_id
-                    file_name = os.path.splitext(os.path.basename(path))[0]
-                    combine_path = file_name + PYLINT_EXT
-                    pylint_file = os.path.join(save_path, combine_path)
-                    with open(pylint_file, "w") as text_file:
-                        self.logger.info("Text file created successfully")
-                        text_file.write(str(pylint_output.popleft()))
-                        self.logger.info("Wrote Pylint output in text file as %s", pylint_file)
-                        text_file.close()
-                        self.store_pylint(pylint_file, path)
-
-            self.msg += ("<body><html><h4 style='font-family: Georgia;'>Thanks,<br>"
-                         "Commvault Automation Team</h4></body></html>")
+            for path in self.json_data["path"]:
+                file_name = os.path.splitext(os.path.basename(path))[0]
+                pylint_file = os.path.join(directory, file_name + PYLINT_EXT)
+                output, result, reused_build = pylint_output.popleft()
+                # report file of a reused result is in place since its build
+                if self.archive is not None:
+                    self.__archive_report(os.path.basename(pylint_file), output,
+                                          reused_build)
+                elif output is not None and self.stream:
+                    self.writer.copy(pylint_file, output)
+                elif output is not None:
+                    self.writer.write(pylint_file, output)
+                self.store_pylint(result, path, pylint_file, reused_build)
+            # files missing on the mount path are not linted and get no report file
+            for path in self.missing_files:
+                self.store_pylint(None, path, None)
+
+            self.msg = self.report.render()
 
         except FileExistsError as file_excep:
             raise Exception("Failed to create pylint output file with error: " + str(file_excep))
 
-    def store_pylint(self, pylint_file, path):
-        """ Determines the pylint score from the output and generates the html message out of it."""
-        with open(pylint_file) as subfile:
-            file = subfile.read()
-            pylint_score = re.search(r'(.*)Your code has been rated at (.*)\(previous run:(.*)',
-                                     file, re.DOTALL)
-            convention_object = re.search(r'(.*)convention \|(.*?)\|(.*)', file, re.DOTALL)
-            refactor_object = re.search(r'(.*)refactor   \|(.*?)\|(.*)', file, re.DOTALL)
-            warning_object = re.search(r'(.*)warning    \|(.*?)\|(.*)', file, re.DOTALL)
-            error_object = re.search(r'(.*)error      \|(.*?)\|(.*)', file, re.DOTALL)
-            errors_list_object = re.findall(r'(.*)E:(.*?)\)(.*)', file)
-            basefile_name = os.path.basename(pylint_file)
-            path_to_textfile = (PATH + "\\{0}\\{1}"
-                                .format(self.form_id, basefile_name))
-
-            self.msg += ("<!DOCTYPE html><body><h4 style='font-family: Georgia;'>"
-                         "<ul><li style='font-family:Georgia;color:#b30000;'>"
-                         + path + "</li></ul><table id= 'tbl'>")
-
-            # Check python file existence
-            if not os.path.exists(path):
-                self.msg += "<h4>Given python file does not exist</h4>"
-            else:
-                if pylint_score is not None:
-                    if '6' <= pylint_score.group(2) < '8':
-                        self.msg += ("<tr><td id='td1'>Pylint Score</td><td id='td2' "
-                                     "style='background-color:#ff944d;'>" +
-                                     str(pylint_score.group(2))+"</td></tr>")
-                    elif pylint_score.group(2) < '6':
-                        self.msg += ("<tr><td id='td1'>Pylint Score</td><td id='td2' "
-                                     "style='background-color:#ff6666;'>" +
-                                     str(pylint_score.group(2))+"</td></tr>")
-                    else:
-                        self.msg += ("<tr><td id='td1'>Pylint Score</td><td id='td2'>" +
-                                     str(pylint_score.group(2)) + "</td></tr>")
-
-                if convention_object is not None:
-                    self.msg += ("<tr><td id='td1'>Convention</td><td id='td2'>" +
-                                 str(convention_object.group(2).rstrip())+"</td></tr>")
-
-                if refactor_object is not None:
-                    self.msg += ("<tr><td id='td1'>Refactor</td><td id='td2'>" +
-                                 str(refactor_object.group(2).rstrip())+"</td></tr>")
-
-                if warning_object is not None:
-                    self.msg += ("<tr><td id='td1'>Warning</td><td id='td2'>" +
-                                 str(warning_object.group(2).rstrip())+"</td></tr>")
-
-                if error_object is not None:
-                    if error_object.group(2).rstrip() > '0':
-                        self.msg += ("<tr><td id='td1'>Error</td><td id='td2'"
-                                     "style='background-color:#ff6666;'>" +
-                                     str(error_object.group(2)) + "</td></tr></table>")
-                    else:
-                        self.msg += ("<tr><td id='td1'>Error</td><td id='td2' "
-                                     "style='background-color:#5cd65c;'>" +
-                                     str(error_object.group(2)) + "</td></tr></table>")
-
-                if errors_list_object:
-                    self.msg += "<h4>Errors:</h4>"
-                    for element in errors_list_object:
-                        if element[1] is not None:
-                            self.msg += "<h4>E:" + str(element[1])+")</h4><br>"
-                        else:
-                            self.msg += "<h4>Errors:None</h4>"
-
-            self.msg += ("<h4><a href=\"" + path_to_textfile + "\">"
-                         + path_to_textfile + "</a></h4><br></body></html>")
+    def __archive_report(self, name, output, reused_build):
+        """ Queues the report of a file to be added to the report archive, the report
+            of a reused result is taken from the archive of its build"""
+        if output is None:
+            if reused_build is not None:
+                self.writer.reuse(self.archive, name)
+        elif self.stream:
+            self.writer.add(self.archive, name, spool_file=output)
+        else:
+            self.writer.add(self.archive, name, text=output)
+
+    @timed("store_pylint")
+    def store_pylint(self, result, path, pylint_file, reused_build=None):
+        """ Adds the parsed pylint output of given file to the html report, reused_build
+            is the build the result is reused from in incremental mode. The result and
+            the report file of a file missing on the mount path are None."""
+        if pylint_file is None:
+            path_to_textfile = None
+        elif self.archive is None:
+            path_to_textfile = os.path.join(PATH, self.form_id, os.path.basename(pylint_file))
+        else:
+            # path of the report inside the archive, opened by Windows Explorer
+            path_to_textfile = os.path.join(PATH, self.form_id, REPORT_ARCHIVE_NAME,
+                                            os.path.basename(pylint_file))
+        self.report.add_file(path, result, path_to_textfile, reused_build,
+                             self.previous_scores.get(path))
+
+    @timed("record_results")
+    def record_results(self, paths, std_output):
+        """ Records the result of every file of the form build in the result store, a
+            failure to record is logged and does not fail the run.
+
+            Args:
+                paths(list)         -- Python files of the form.
+
+                std_output(list)    -- (output, PylintResult, reused build) of every file.
+        """
+        hashes = self.incremental.hashes if self.incremental else {}
+        results = []
+        for path, (_, result, reused_build) in zip(paths, std_output):
+            digest = hashes.get(path)
+            if digest is None and result is not None:
+                try:
+                    digest = content_hash(path)
+                except OSError:
+                    digest = None
+            results.append((path, digest, result, self.durations.get(path), reused_build))
+        try:
+            self.result_store.record(self.form_id, self.build_id, results)
+        except (sqlite3.Error, OSError) as store_excep:
+            self.logger.error("Failed to record results in result store: %s", store_excep)
 
+    @timed("mail_pylint")
     def mail_pylint(self):
         """ Sends email through given server with subject,From,To,Bcc and
-            body part containing msg and footer variable content in html format"""
+            body part containing msg and footer variable content in html format.
+            The email is sent through the SMTP session shared in the process, in
+            digest mode it is merged with the other builds of the form sent to the
+            same receivers within the digest window."""
         try:
             body = MIMEText(self.msg, "html")
             body['Subject'] = 'Pylint Score'
             body['From'] = self.json_data["Email"]["From"]
             body['To'] = self.json_data["Email"]["To"]
             body['Bcc'] = self.json_data["Email"]["Bcc"]
-            sms = self.json_data["Email"]["Server"]
-            sim = smtplib.SMTP(sms)
-            sim.send_message(body)
+            dispatcher = get_dispatcher(self.json_data["Email"]["Server"])
+            if self.digest_window:
+                future = dispatcher.send(body, (self.form_id, body['To']), self.digest_window)
+                future.add_done_callback(self.__log_digest)
+                self.logger.info("Email held for digest of form %s", self.form_id)
+                return
+            dispatcher.send(body).result()
             self.logger.info("Email sent successfully")
-        except Exception:
-            self.logger.error("Failed to send an email")
+        except Exception as mail_excep:
+            self.logger.error("Failed to send an email: %s", mail_excep)
             raise Exception("Failed to send an email")
 
+    def __log_digest(self, future):
+        """ Logs the delivery of the digest email holding this run's report"""
+        if future.exception():
+            self.logger.error("Failed to send digest email: %s", future.exception())
+        else:
+            self.logger.info("Digest email sent successfully")
+
+    def lint(self):
+        """ Runs the pylint over the files and waits till all the report files are written,
+            in archive mode the archive is published once all the reports are packed. The
+            links to the report files which could not be written are dropped from the
+            email."""
+        self.writer = ReportWriter(self.logger, self.timer)
+        # spool folder of a build batch is shared by its forms and removed by the batch
+        owned_spool = self.stream and self.spool_dir is None
+        if owned_spool:
+            self.spool_dir = tempfile.mkdtemp(prefix="cvemail_pylint_")
+        if self.archive_reports:
+            self.archive = ReportArchive(os.path.join(PATH, self.form_id, REPORT_ARCHIVE_NAME),
+                                         self.logger)
+        linted = False
+        try:
+            self.run_pylint()
+            linted = True
+        finally:
+            failed = self.writer.close()
+            if self.archive is not None:
+                with self.timer.stage("publish_archive"):
+                    self.archive.close(publish=linted)
+            if owned_spool:
+                shutil.rmtree(self.spool_dir, ignore_errors=True)
+        # the email must not link to the report files missing on devshare
+        if failed and self.report.drop_links(failed):
+            self.logger.error("Report files not written, dropped from the email: %s", failed)
+            self.msg = self.report.render()
+
+    def close(self):
+        """ Releases the logger of the run, the log file is written once the other
+            users of the form logger release it too"""
+        self.log.close()
+
     def execute(self):
         """ Method which contains all the methods inside.
             Starts the CvemailPylint execution."""
-        self.run_pylint()
-        self.mail_pylint()
+        try:
+            self.lint()
+            self.mail_pylint()
+        finally:
+            self.close()
 
 
 if __name__ == "__main__":
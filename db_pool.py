@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+
+# ------------------------------------------------------------------------------
+# Copyright Commvault Systems, Inc.
+# See LICENSE.txt in the project root for
+# license information.
+# ------------------------------------------------------------------------------
+
+"""File for pooling the database connections used by CVEmailPylint package.
+
+Opening a connection to UpdateCenter or ENGWEBDB costs a TCP and login handshake,
+which is more than the queries run by CVEmailPylint take. ConnectionPool keeps the
+opened connections and hands them out again to the following queries.
+
+The pool is created with the callable opening a new connection, hence any DB-API
+module can be used behind it, e.g.:
+
+    ConnectionPool(functools.partial(pyodbc.connect, UC_CONNECTION))
+
+    ConnectionPool(functools.partial(sqlite3.connect, "uc.db", check_same_thread=False))
+
+A connection idle for POOL_PING_SECONDS is checked with a trivial query before it is
+handed out again, connections dropped by the server or a firewall meanwhile, ex. in
+the daemon between jobs, are closed and replaced by a new connection.
+
+ConnectionPool:
+
+    __init__()      -- Initialize instance of the ConnectionPool class
+
+    connection()    -- Context manager handing out a pooled connection
+
+    close()         -- Closes all the idle connections of the pool
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from constants import POOL_PING_SECONDS
+
+
+class ConnectionPool:
+    """Class for reusing database connections across queries."""
+
+    def __init__(self, connect, max_size=4, ping_seconds=POOL_PING_SECONDS):
+        """ Initialize instances of the ConnectionPool class
+
+            Args:
+                connect(callable)   -- Returns a new DB-API connection when called.
+
+                max_size(int)       -- Maximum number of connections opened at a time.
+
+                ping_seconds(int)   -- Seconds a connection is idle after which it is
+                                       checked before being handed out again.
+        """
+        self.connect = connect
+        self.ping_seconds = ping_seconds
+        self.__idle = []
+        self.__lock = threading.Lock()
+        self.__slots = threading.BoundedSemaphore(max_size)
+
+    @contextmanager
+    def connection(self):
+        """ Hands out an idle connection of the pool or opens a new one. The connection
+            goes back to the pool when the block exits and is closed if the block raised,
+            ex. KeyboardInterrupt, as it may be broken. Idle connections which are not
+            alive any more are closed and replaced.
+
+            Yields:
+                object - DB-API connection
+        """
+        self.__slots.acquire()
+        conn = None
+        returned = False
+        try:
+            conn = self.__checkout()
+            if conn is None:
+                conn = self.connect()
+            yield conn
+            with self.__lock:
+                self.__idle.append((conn, time.time()))
+            returned = True
+        finally:
+            try:
+                if conn is not None and not returned:
+                    conn.close()
+            finally:
+                self.__slots.release()
+
+    def __checkout(self):
+        """ Returns the most recently used idle connection which is alive, the broken
+            ones are closed.
+
+            Returns:
+                object - DB-API connection, None if no idle connection is alive
+        """
+        while True:
+            with self.__lock:
+                if not self.__idle:
+                    return None
+                conn, idle_since = self.__idle.pop()
+            if time.time() - idle_since < self.ping_seconds or self.__is_alive(conn):
+                return conn
+            try:
+                conn.close()
+            except Exception:
+                # the connection is broken already
+                pass
+
+    @staticmethod
+    def __is_alive(conn):
+        """ Checks whether the connection still answers a trivial query"""
+        try:
+            cursor = conn.cursor()
+            cursor.execute("select 1")
+            cursor.fetchall()
+            cursor.close()
+        except Exception:
+            # error classes differ per DB-API module, ex. pyodbc.Error, sqlite3.Error
+            return False
+        return True
+
+    def close(self):
+        """ Closes all the idle connections of the pool"""
+        with self.__lock:
+            idle, self.__idle = self.__idle, []
+        for conn, _ in idle:
+            conn.close()
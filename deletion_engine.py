@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+
+# ------------------------------------------------------------------------------
+# Copyright Commvault Systems, Inc.
+# See LICENSE.txt in the project root for
+# license information.
+# ------------------------------------------------------------------------------
+
+r"""File for deleting the form folders from devshare in parallel.
+
+Deleting a folder over SMB is dominated by the round trips to the filer, so the
+folders are deleted by a pool of threads. The rate at which folders are started
+is capped, so that the cleanup does not swamp the filer after a big release.
+The size of every folder is summed before it is deleted to report the reclaimed
+space, in dry run mode the folders are only sized.
+
+DeletionEngine:
+
+    __init__()      -- Initialize instance of the DeletionEngine class
+
+    delete()        -- Deletes given folders and returns the summary of the deletion
+
+folder_size()       -- Returns the total size of the files under a folder
+"""
+
+import os
+import shutil
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+def folder_size(path):
+    """ Returns the total size in bytes of the files under given folder"""
+    total = 0
+    with os.scandir(path) as entries:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                total += folder_size(entry.path)
+            else:
+                total += entry.stat(follow_symlinks=False).st_size
+    return total
+
+
+class DeletionEngine:
+    """Class for deleting folders through a rate limited pool of threads."""
+
+    def __init__(self, workers=8, max_rate=0, dry_run=False):
+        """ Initialize instances of the DeletionEngine class
+
+            Args:
+                workers(int)        -- Number of folders deleted at a time.
+
+                max_rate(float)     -- Maximum number of folders started per second,
+                                       0 for no limit.
+
+                dry_run(bool)       -- Only sizes the folders without deleting them.
+        """
+        self.workers = workers
+        self.max_rate = max_rate
+        self.dry_run = dry_run
+        self.__lock = threading.Lock()
+        self.__next_start = 0
+
+    def delete(self, folders):
+        """ Deletes given folders.
+
+            Args:
+                folders(list)   -- Folders to be deleted.
+
+            Returns:
+                dict - deleted folders, reclaimed bytes and folders failed with their error
+        """
+        summary = {"deleted": [], "bytes": 0, "failed": {}}
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            for folder, outcome in zip(folders, executor.map(self.__delete_folder, folders)):
+                if isinstance(outcome, OSError):
+                    summary["failed"][folder] = str(outcome)
+                else:
+                    summary["deleted"].append(folder)
+                    summary["bytes"] += outcome
+        return summary
+
+    def __delete_folder(self, folder):
+        """ Sizes and deletes a single folder once the rate limit allows it.
+
+            Returns:
+                int - Size of the folder, OSError if it could not be deleted
+        """
+        self.__throttle()
+        try:
+            size = folder_size(folder)
+            if not self.dry_run:
+                shutil.rmtree(folder)
+            return size
+        except OSError as delete_excep:
+            return delete_excep
+
+    def __throttle(self):
+        """ Waits till the next folder may be started as per the rate limit"""
+        if not self.max_rate:
+            return
+        with self.__lock:
+            now = time.time()
+            start = max(now, self.__next_start)
+            self.__next_start = start + 1.0 / self.max_rate
+        time.sleep(start - now)
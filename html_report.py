@@ -0,0 +1,211 @@
+# -*- coding: utf-8 -*-
+
+# ------------------------------------------------------------------------------
+# Copyright Commvault Systems, Inc.
+# See LICENSE.txt in the project root for
+# license information.
+# ------------------------------------------------------------------------------
+
+"""File for building the html pylint report sent over email.
+
+HtmlReport collects one record per python file of the form and renders all of them
+once through the templates below into a single html document. Forms producing
+thousands of errors are kept under the size limit of the report by dropping the
+error lists of the remaining files first and then the remaining files themselves,
+the report mentions what was left out.
+
+HtmlReport:
+
+    __init__()      -- Initialize instance of the HtmlReport class
+
+    add_file()      -- Adds the pylint result of a python file to the report
+
+    drop_links()    -- Replaces the links to the report files which were not written
+
+    render()        -- Renders the report into a html document
+"""
+
+import html
+import os
+from string import Template
+from constants import REPORT_MAX_SIZE
+
+PAGE_TEMPLATE = Template(
+    "<!DOCTYPE html><html><head><style>"
+    "#tbl{ width:20%; border: 2px solid black;"
+    "padding: 8px; font-size:15px; font-family: Georgia;}"
+    "#td1{background-color: #b3c6ff; font-family: Georgia;}"
+    "#td2{border: 1px solid #b3c6ff; font-family: Georgia;}"
+    "</style></head><body>"
+    "<p style='font-size:20px; font-family: Georgia;'>"
+    "Hi,<br>  The output of running pylint over the list of files shared is:</p>"
+    "${files}${truncated}"
+    "<h4 style='font-family: Georgia;'>Thanks,<br>"
+    "Commvault Automation Team</h4></body></html>")
+
+FILE_TEMPLATE = Template(
+    "<h4 style='font-family: Georgia;'><ul>"
+    "<li style='font-family:Georgia;color:#b30000;'>${path}${status}</li></ul></h4>"
+    "${details}${link}<br>")
+
+LINK_TEMPLATE = Template("<h4><a href=\"${link}\">${link}</a></h4>")
+
+UNWRITTEN_REPORT = ("<h4>The text file of the pylint output could not be written, "
+                    "see the log of the form.</h4>")
+
+TABLE_TEMPLATE = Template(
+    "<table id='tbl'>${score}"
+    "<tr><td id='td1'>Convention</td><td id='td2'>${convention}</td></tr>"
+    "<tr><td id='td1'>Refactor</td><td id='td2'>${refactor}</td></tr>"
+    "<tr><td id='td1'>Warning</td><td id='td2'>${warning}</td></tr>"
+    "<tr><td id='td1'>Error</td><td id='td2' style='background-color:${error_color};'>"
+    "${error}</td></tr></table>")
+
+SCORE_TEMPLATE = Template(
+    "<tr><td id='td1'>Pylint Score</td><td id='td2'${style}>${score}</td></tr>")
+
+PREVIOUS_TEMPLATE = Template(" (previous build: ${score}/10)")
+
+ERROR_TEMPLATE = Template("<h4>E: ${line},${column}: ${text}</h4>")
+
+MISSING_FILE = "<h4>Given python file does not exist</h4>"
+
+FRESH_STATUS = " (linted for this build)"
+
+REUSED_TEMPLATE = Template(" (unchanged, result reused from build ${buildid})")
+
+TRUNCATED_TEMPLATE = Template(
+    "<h4 style='font-family: Georgia;'>Report truncated: errors of "
+    "${without_errors} file(s) and ${omitted} more file(s) are not listed, "
+    "see the text files of the form for the complete output.</h4>")
+
+
+class HtmlReport:
+    """Class for collecting per file pylint results and rendering them into html."""
+
+    def __init__(self, max_size=REPORT_MAX_SIZE, mark_fresh=False):
+        """ Initialize instances of the HtmlReport class
+
+            Args:
+                max_size(int)       -- Maximum number of characters of the rendered report.
+
+                mark_fresh(bool)    -- Marks the results linted for this build, used when
+                                       results of earlier builds are reused.
+        """
+        self.max_size = max_size
+        self.mark_fresh = mark_fresh
+        self.records = []
+
+    def add_file(self, path, result, report_file, reused_build=None, previous_score=None):
+        """ Adds the pylint result of a python file to the report.
+
+            Args:
+                path(str)           -- Python file which was linted.
+
+                result(object)      -- PylintResult of the file, None if the
+                                       file does not exist.
+
+                report_file(str)    -- Text file holding the pylint output of the file,
+                                       None if the file does not exist.
+
+                reused_build(str)   -- Build the result is reused from, None if the
+                                       file was linted for this build.
+
+                previous_score(float) -- Score of the file in its previous build.
+        """
+        if reused_build is not None:
+            status = REUSED_TEMPLATE.substitute(buildid=html.escape(str(reused_build)))
+        else:
+            status = FRESH_STATUS if self.mark_fresh else ""
+        self.records.append((path, result, report_file, status, previous_score))
+
+    def drop_links(self, report_files):
+        """ Replaces the links to given report files by a note, as they could not be
+            written.
+
+            Args:
+                report_files(list)  -- Report files, or their names, which were not written.
+
+            Returns:
+                int - Number of links dropped
+        """
+        names = {os.path.basename(report_file) for report_file in report_files}
+        dropped = 0
+        for index, record in enumerate(self.records):
+            if record[2] is not None and os.path.basename(record[2]) in names:
+                self.records[index] = record[:2] + (None,) + record[3:]
+                dropped += 1
+        return dropped
+
+    def render(self):
+        """ Renders all the records into a single html document within the size limit.
+
+            Returns:
+                str - html report
+        """
+        budget = self.max_size - len(PAGE_TEMPLATE.template) - len(TRUNCATED_TEMPLATE.template)
+        files = []
+        size = 0
+        without_errors = 0
+        omitted = 0
+        for record in self.records:
+            result = record[1]
+            block = self.__render_file(record, True)
+            errors_dropped = False
+            if size + len(block) > budget and result is not None and result.errors():
+                block = self.__render_file(record, False)
+                errors_dropped = True
+            if size + len(block) > budget:
+                omitted += 1
+                continue
+            if errors_dropped:
+                without_errors += 1
+            files.append(block)
+            size += len(block)
+
+        truncated = ""
+        if without_errors or omitted:
+            truncated = TRUNCATED_TEMPLATE.substitute(without_errors=without_errors,
+                                                      omitted=omitted)
+        return PAGE_TEMPLATE.substitute(files="".join(files), truncated=truncated)
+
+    @staticmethod
+    def __render_file(record, with_errors):
+        """ Renders the record of a single python file"""
+        path, result, report_file, status, previous_score = record
+        if result is None:
+            details = MISSING_FILE
+        else:
+            score = ""
+            if result.score is not None:
+                style = ""
+                if result.score < 6:
+                    style = " style='background-color:#ff6666;'"
+                elif result.score < 8:
+                    style = " style='background-color:#ff944d;'"
+                score_text = "{0:.2f}/10".format(result.score)
+                if previous_score is not None:
+                    score_text += PREVIOUS_TEMPLATE.substitute(
+                        score="{0:.2f}".format(previous_score))
+                score = SCORE_TEMPLATE.substitute(style=style, score=score_text)
+            details = TABLE_TEMPLATE.substitute(
+                score=score,
+                convention=result.counts['convention'],
+                refactor=result.counts['refactor'],
+                warning=result.counts['warning'],
+                error=result.counts['error'],
+                error_color='#ff6666' if result.counts['error'] > 0 else '#5cd65c')
+            errors = result.errors()
+            if with_errors and errors:
+                details += "<h4>Errors:</h4>" + "".join(
+                    ERROR_TEMPLATE.substitute(line=error.line, column=error.column,
+                                              text=html.escape(error.text))
+                    for error in errors)
+        # a missing file was not linted, hence it has no report file to link to
+        link = ""
+        if report_file is not None:
+            link = LINK_TEMPLATE.substitute(link=html.escape(report_file))
+        elif result is not None:
+            link = UNWRITTEN_REPORT
+        return FILE_TEMPLATE.substitute(path=html.escape(path), status=status, details=details,
+                                        link=link)
@@ -0,0 +1,189 @@
+# -*- coding: utf-8 -*-
+
+# ------------------------------------------------------------------------------
+# Copyright Commvault Systems, Inc.
+# See LICENSE.txt in the project root for
+# license information.
+# ------------------------------------------------------------------------------
+
+"""File for determining the import dependencies between the python files of a form.
+
+The modules imported by a file are read from its syntax tree and cached in a json
+file on the local disk by the content hash and module name of the file, so only new
+or changed files are parsed again. The cache keeps the IMPORT_GRAPH_MAX_ENTRIES
+entries used last, every run loads the whole cache file.
+
+Module names are derived from the location of a file in the Automation and cvpysdk
+trees, ex.:
+
+    vaultcx/Source/tools/Automation/AutomationUtils/machine.py  -- AutomationUtils.machine
+
+    vaultcx/Source/tools/cvpysdk/cvpysdk/instances/informixinstance.py
+                                                    -- cvpysdk.instances.informixinstance
+
+module_name()   -- Returns the module name of given python file
+
+ImportGraph:
+
+    __init__()      -- Initialize instance of the ImportGraph class and loads the cache file
+
+    imports()       -- Returns the modules imported by given python file
+
+    dependents()    -- Returns the files importing the changed files directly or indirectly
+
+    save()          -- Writes the cached imports of the files seen in this run to the cache file
+"""
+
+import ast
+import json
+import os
+import threading
+import time
+from constants import IMPORT_GRAPH_PATH
+from constants import IMPORT_GRAPH_MAX_ENTRIES
+
+SOURCE_ROOTS = ('/tools/Automation/', '/tools/cvpysdk/')
+
+
+def module_name(path):
+    """ Returns the module name of given python file.
+
+        Args:
+            path(str)   -- Python file under the Automation or cvpysdk tree.
+
+        Returns:
+            str - Dotted module name, None if the file is outside both trees
+    """
+    normalized = path.replace('\\', '/')
+    for root in SOURCE_ROOTS:
+        position = normalized.find(root)
+        if position >= 0:
+            relative = os.path.splitext(normalized[position + len(root):])[0]
+            parts = relative.split('/')
+            if parts[-1] == '__init__':
+                parts.pop()
+            return '.'.join(parts)
+    return None
+
+
+class ImportGraph:
+    """Class for the cached import dependencies of python files."""
+
+    def __init__(self, cache_file=IMPORT_GRAPH_PATH, max_entries=IMPORT_GRAPH_MAX_ENTRIES):
+        """ Initialize instances of the ImportGraph class
+
+            Args:
+                cache_file(str)     -- Json file where the imports of the files are cached.
+
+                max_entries(int)    -- Maximum number of files kept in the cache file.
+        """
+        self.cache_file = cache_file
+        self.max_entries = max_entries
+        self.__cached = {}
+        self.__used = {}
+        try:
+            with open(self.cache_file) as cache:
+                self.__cached = self.__entries(json.load(cache))
+        except (OSError, ValueError):
+            pass
+
+    @staticmethod
+    def __entries(content):
+        """ Returns the entries of a cache file, the entries of the files written
+            before the last use was recorded are taken as the oldest"""
+        return {key: entry if isinstance(entry, dict) else {"imports": entry, "used": 0}
+                for key, entry in content.items()}
+
+    def imports(self, path, digest):
+        """ Returns the modules imported by given python file.
+
+            Args:
+                path(str)   -- Python file.
+
+                digest(str) -- Content hash of the file.
+
+            Returns:
+                list - Dotted names of the imported modules
+        """
+        # relative imports resolve differently for the same content at another location
+        key = "{0}:{1}".format(digest, module_name(path))
+        if key in self.__cached:
+            imported = self.__cached[key]["imports"]
+        else:
+            imported = self.__parse_imports(path)
+        self.__used[key] = {"imports": imported, "used": time.time()}
+        return imported
+
+    @staticmethod
+    def __parse_imports(path):
+        """ Reads the imported modules from the syntax tree of given python file"""
+        try:
+            with open(path, 'rb') as source:
+                tree = ast.parse(source.read(), path)
+        except (OSError, SyntaxError, ValueError):
+            return []
+        module = module_name(path) or ''
+        package = module.split('.')
+        if not path.endswith('__init__.py'):
+            package = package[:-1]
+        imported = set()
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Import):
+                imported.update(alias.name for alias in node.names)
+            elif isinstance(node, ast.ImportFrom):
+                base = node.module or ''
+                if node.level:
+                    parent = package[:len(package) - node.level + 1]
+                    base = '.'.join(parent + ([base] if base else []))
+                if base:
+                    imported.add(base)
+                imported.update('{0}.{1}'.format(base, alias.name) if base else alias.name
+                                for alias in node.names if alias.name != '*')
+        return sorted(imported)
+
+    def dependents(self, modules, changed):
+        """ Returns the files which import a changed file directly or through other files.
+
+            Args:
+                modules(dict)   -- File to the list of modules it imports.
+
+                changed(list)   -- Files whose content changed.
+
+            Returns:
+                set - Files depending on the changed files, the changed files excluded
+        """
+        names = {path: module_name(path) for path in modules}
+        stale = set(changed)
+        pending = list(changed)
+        while pending:
+            changed_module = names.get(pending.pop())
+            if not changed_module:
+                continue
+            for path, imported in modules.items():
+                if path in stale:
+                    continue
+                if any(name == changed_module or name.startswith(changed_module + '.')
+                       for name in imported):
+                    stale.add(path)
+                    pending.append(path)
+        return stale - set(changed)
+
+    def save(self):
+        """ Writes the imports of the files seen in this run to the cache file, merged
+            with the entries of the files seen by earlier runs. The entries used last
+            are kept up to max_entries."""
+        try:
+            with open(self.cache_file) as cache:
+                entries = self.__entries(json.load(cache))
+        except (OSError, ValueError):
+            entries = {}
+        entries.update(self.__used)
+        if len(entries) > self.max_entries:
+            latest = sorted(entries.items(), key=lambda item: item[1]["used"], reverse=True)
+            entries = dict(latest[:self.max_entries])
+        os.makedirs(os.path.dirname(self.cache_file), exist_ok=True)
+        temp_file = "{0}.{1}.{2}.tmp".format(self.cache_file, os.getpid(),
+                                             threading.get_ident())
+        with open(temp_file, 'w') as cache:
+            json.dump(entries, cache)
+        os.replace(temp_file, self.cache_file)
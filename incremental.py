@@ -0,0 +1,132 @@
+# -*- coding: utf-8 -*-
+
+# ------------------------------------------------------------------------------
+# Copyright Commvault Systems, Inc.
+# See LICENSE.txt in the project root for
+# license information.
+# ------------------------------------------------------------------------------
+
+r"""File for linting only the files of a form changed since its previous build.
+
+The result of every file linted for a form is recorded in a manifest under the form
+folder PATH\<formid>, along with the content hash of the file and the build it was
+linted for. On the next build of the form only the following files are linted again:
+
+    a. files whose content changed or which were not part of the previous build
+
+    b. files importing a changed file directly or through other files of the form,
+       determined through the cached ImportGraph
+
+The results of all the other files are reused from the manifest, their report files
+are already present in the form folder. Every build is mounted at another mount path,
+hence the files are recorded by their path under the tools folder of the mount, ex.
+Automation/AutomationUtils/machine.py.
+
+IncrementalLint:
+
+    __init__()  -- Initialize instance of the IncrementalLint class
+
+    plan()      -- Determines the results to be reused and the files to be linted again
+
+    manifest()  -- Returns the manifest content recording the results of this build
+
+manifest_key()  -- Returns the key of a python file in the manifest
+"""
+
+import json
+import os
+from constants import MANIFEST_NAME
+from import_graph import ImportGraph
+from pylint_parser import PylintResult
+from result_cache import content_hash
+
+
+def manifest_key(path):
+    """ Returns the key of given python file in the manifest, its path under the tools
+        folder of the mount, which is the same for all the builds of the form.
+
+        Args:
+            path(str)   -- Python file of the form.
+
+        Returns:
+            str - Path of the file under the tools folder, the normalized path for the
+                  files outside the tools folder
+    """
+    normalized = path.replace('\\', '/')
+    position = normalized.find('/tools/')
+    return normalized[position + len('/tools/'):] if position >= 0 else normalized
+
+
+class IncrementalLint:
+    """Class for reusing the results of files unchanged since the previous build of a form."""
+
+    def __init__(self, logger, directory, buildid, graph=None):
+        """ Initialize instances of the IncrementalLint class
+
+            Args:
+                logger(object)  -- Logger object of the current run.
+
+                directory(str)  -- Form folder holding the manifest of the previous build.
+
+                buildid(str)    -- Build id of the current run.
+
+                graph(object)   -- ImportGraph of the files, loaded from its cache
+                                   file if not given.
+        """
+        self.logger = logger
+        self.buildid = buildid
+        self.manifest_file = os.path.join(directory, MANIFEST_NAME)
+        self.graph = graph or ImportGraph()
+        self.hashes = {}
+
+    def plan(self, paths):
+        """ Determines the results to be reused and the files to be linted again.
+
+            Args:
+                paths(list) -- Python files of the form.
+
+            Returns:
+                tuple - dict of path to (PylintResult, buildid) of the reused results and
+                        set of the unchanged files to be linted again as dependents
+        """
+        try:
+            with open(self.manifest_file) as manifest:
+                previous = json.load(manifest)["files"]
+        except (OSError, ValueError, KeyError):
+            previous = {}
+        self.hashes = {path: content_hash(path) for path in paths if os.path.isfile(path)}
+        keys = {path: manifest_key(path) for path in paths}
+        changed = [path for path in paths
+                   if path not in self.hashes or keys[path] not in previous
+                   or previous[keys[path]]["hash"] != self.hashes[path]]
+        modules = {path: self.graph.imports(path, digest)
+                   for path, digest in self.hashes.items()}
+        dependents = self.graph.dependents(modules, changed)
+        try:
+            self.graph.save()
+        except OSError as graph_excep:
+            self.logger.error("Failed to save import graph cache: %s", graph_excep)
+        reused = {}
+        for path in paths:
+            if path not in changed and path not in dependents:
+                entry = previous[keys[path]]
+                reused[path] = (PylintResult.from_dict(entry["result"]), entry["buildid"])
+        self.logger.info("Incremental run: %s changed, %s dependent and %s reused files",
+                         len(changed), len(dependents), len(reused))
+        return reused, dependents
+
+    def manifest(self, results):
+        """ Returns the manifest content recording the results of this build.
+
+            Args:
+                results(dict)   -- Path to (PylintResult, buildid the result was linted for).
+
+            Returns:
+                str - Json content of the manifest
+        """
+        files = {}
+        for path, (result, buildid) in results.items():
+            if path in self.hashes:
+                files[manifest_key(path)] = {"hash": self.hashes[path], "buildid": buildid,
+                                             "result": result.to_dict()}
+        return json.dumps({"buildid": self.buildid, "files": files})
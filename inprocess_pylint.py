@@ -0,0 +1,140 @@
+# -*- coding: utf-8 -*-
+
+# ------------------------------------------------------------------------------
+# Copyright Commvault Systems, Inc.
+# See LICENSE.txt in the project root for
+# license information.
+# ------------------------------------------------------------------------------
+
+"""File for running pylint on the python files of a form inside the current interpreter.
+
+Running pylint as one subprocess per file pays for the interpreter start, the
+pylint/astroid import, plugin loading and the astroid inference of the shared
+cvpysdk/Automation modules for every file. InProcessPylint runs all the files of a
+form through pylint's programmatic API in one process, so the astroid cache built
+for the first file is reused by all the following files.
+
+Each file gets its own TextReporter, hence the output for a file is the same text
+that `pylint <file> -r y` prints on stdout. Pylint keeps global state while it runs,
+so the runs of all the InProcessPylint objects of a process are serialized.
+
+The astroid trees are kept in memory by module name, hence the trees of a build are
+dropped before a file of another build or mount path is linted, else a long running
+process, ex. the daemon or a shard worker, lints the file against the modules of an
+earlier build.
+
+InProcessPylint:
+
+    __init__()      -- Initialize instance of the InProcessPylint class
+
+    lint_file()     -- Runs pylint over a single python file and returns its output, or
+                       streams it to a spool file while parsing it
+
+    load_cache()    -- Loads the astroid trees of the base modules of the files' build
+
+    save_cache()    -- Stores the astroid trees of the base modules built while linting
+"""
+
+import io
+import os
+import threading
+from astroid_cache import clear_trees
+from astroid_cache import tools_root
+from pylint_parser import SpoolingParser
+
+
+class InProcessPylint:
+    """Class for running pylint through its programmatic API in the current process."""
+
+    lint_lock = threading.Lock()
+
+    # mount path and build of the module trees held in memory by astroid
+    trees_key = None
+
+    def __init__(self, logger, pylint_args=None, astroid_cache=None):
+        """ Initialize instances of the InProcessPylint class
+
+            Args:
+                logger(object)          -- Logger object of the current run.
+
+                pylint_args(list)       -- Arguments passed to pylint after the file name,
+                                           defaults to ['-r', 'y'].
+
+                astroid_cache(object)   -- AstroidCache sharing the trees of the base
+                                           modules across runs.
+        """
+        self.logger = logger
+        self.pylint_args = pylint_args or ['-r', 'y']
+        self.astroid_cache = astroid_cache
+
+    def load_cache(self, paths, build=None):
+        """ Loads the cached astroid trees of the base modules of the build given
+            python files are part of, if the astroid cache is enabled.
+
+            Args:
+                paths(list) -- Python files to be linted.
+
+                build(str)  -- Build the files are part of.
+        """
+        if self.astroid_cache and paths:
+            with self.lint_lock:
+                self.__use_trees(paths[0], build)
+                self.astroid_cache.load(paths)
+
+    def save_cache(self):
+        """ Stores the astroid trees of the base modules built while linting, if the
+            astroid cache is enabled."""
+        if self.astroid_cache:
+            with self.lint_lock:
+                self.astroid_cache.save()
+
+    def lint_file(self, path, spool_file=None, build=None):
+        """ Runs pylint over given python file with a reporter of its own.
+
+            Args:
+                path(str)       -- Python file to be linted.
+
+                spool_file(str) -- File the output is written to while being parsed,
+                                   instead of being returned.
+
+                build(str)      -- Build the file is part of.
+
+            Returns:
+                str - Pylint output of the file, PylintResult if a spool file is given
+        """
+        if spool_file is not None:
+            with open(spool_file, 'w', encoding='utf-8') as spool:
+                parser = SpoolingParser(spool)
+                self.__run(path, parser, build)
+                parser.close()
+            return parser.result
+        output = io.StringIO()
+        self.__run(path, output, build)
+        return output.getvalue()
+
+    def __use_trees(self, path, build):
+        """ Drops the module trees held in memory by astroid if they were built for
+            another mount path or build than given file's, called with lint_lock held"""
+        key = (tools_root(path) or os.path.dirname(os.path.abspath(path)), build)
+        if InProcessPylint.trees_key == key:
+            return
+        if InProcessPylint.trees_key is not None:
+            clear_trees()
+            self.logger.info("Dropped the astroid trees of the previous build")
+        InProcessPylint.trees_key = key
+
+    def __run(self, path, output, build):
+        """ Runs pylint over given python file with its report written to output"""
+        # pylint is imported here so that the subprocess mode does not need it
+        # to be importable from the interpreter running CVEmailPylint.
+        from pylint.lint import Run
+        from pylint.reporters.text import TextReporter
+
+        try:
+            with self.lint_lock:
+                self.__use_trees(path, build)
+                Run([path] + self.pylint_args, reporter=TextReporter(output), exit=False)
+        except SystemExit as lint_exit:
+            # pylint exits for fatal configuration errors even with exit=False
+            self.logger.error("Pylint exited with code %s for file: %s", lint_exit.code, path)
+        self.logger.info("Pylint output created for file: %s", path)
@@ -0,0 +1,460 @@
+# -*- coding: utf-8 -*-
+
+# ------------------------------------------------------------------------------
+# Copyright Commvault Systems, Inc.
+# See LICENSE.txt in the project root for
+# license information.
+# ------------------------------------------------------------------------------
+
+r"""File for sharding the pylint runs of a form over worker processes on several hosts.
+
+The files of a form are linted by the build machine running the form while the
+other build agents are idle. With a shard spool directory, a folder on a share
+reachable from all the agents, the files of the form are queued as tasks in the
+directory and linted by any number of ShardWorker processes:
+
+    a. the coordinator, CvemailPylint of the form, writes a task file
+       <run>_<index>.task per file holding the file path and the build, a task
+       becomes visible once it is complete
+
+    b. a worker claims a task by renaming it to <run>_<index>.<claim>.running,
+       the rename succeeds for one worker only, the claim is unique per attempt
+
+    c. the worker writes the pylint output to <run>_<index>.<claim>.out and then
+       the marker <run>_<index>.<claim>.done with the lint duration or the error
+
+    d. the coordinator reads the outputs, parses them and writes the report
+       files, the html report and the email of the form as before
+
+While waiting the coordinator lints the tasks of its run not claimed by any worker
+yet, hence a form completes even when no worker is running. Tasks claimed by a
+worker which did not complete them within SHARD_STALE_SECONDS are queued again,
+and the tasks a worker failed to lint are linted by the coordinator. The output of
+a claim is removed by the coordinator only, hence a worker completing a task after
+it was queued again never removes the output of the next claim being collected.
+
+The workers lint the file paths of the tasks as they are, the mount path of the
+build has to be reachable under the same path from every agent, ex. a UNC path.
+A worker with the in-process engine drops the astroid trees held in memory before
+it lints a task of another build or mount path.
+
+ShardedLint:
+
+    __init__()  -- Initialize instance of the ShardedLint class
+
+    lint()      -- Queues given files as tasks and returns their results
+
+ShardWorker:
+
+    __init__()      -- Initialize instance of the ShardWorker class
+
+    run()           -- Processes the queued tasks till the worker is stopped or idle
+
+    stop()          -- Stops the worker after the running tasks complete
+
+    process_task()  -- Lints the file of a claimed task and writes back its output
+
+    Usage:
+
+    Start a worker on every build agent sharing the spool directory:
+    >>python lint_shard.py -spool \\devshare\PylintShard -jobs 4
+
+    Run a form with its files linted by the workers:
+    >>PylintBatch.bat -formid 50888 -buildid 1100080 -mountpath \\buildshare\test-mount
+        -shard \\devshare\PylintShard
+"""
+
+import argparse
+import json
+import logging
+import os
+import shutil
+import socket
+import subprocess
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from inprocess_pylint import InProcessPylint
+from pylint_parser import PylintOutputParser
+from pylint_parser import parse_pylint_output
+from constants import SHARD_POLL_SECONDS
+from constants import STREAM_MAX_MESSAGES
+from constants import SHARD_STALE_SECONDS
+
+
+def _write_atomic(file_name, text):
+    """ Writes given text to the file through a temporary file, so that the file is
+        never seen half written"""
+    temp_file = "{0}.{1}.{2}.tmp".format(file_name, os.getpid(), threading.get_ident())
+    with open(temp_file, 'w', encoding='utf-8') as content:
+        content.write(text)
+    os.replace(temp_file, file_name)
+
+
+def _claim(task_file, worker):
+    """ Claims given task file for the worker, the claim is named by the worker and a
+        unique id so that the output of every attempt on a task has a name of its own.
+
+        Returns:
+            str - Path of the claimed task file, None if claimed by another worker
+    """
+    running_file = "{0}.{1}-{2}.running".format(task_file[:-len(".task")], worker,
+                                                uuid.uuid4().hex[:8])
+    try:
+        os.rename(task_file, running_file)
+    except OSError:
+        return None
+    # the claim time is the modification time of the claimed file
+    os.utime(running_file)
+    return running_file
+
+
+class ShardedLint:
+    """Class for linting the files of a form through the workers of a shard spool."""
+
+    def __init__(self, shard_dir, logger, poll_interval=SHARD_POLL_SECONDS,
+                 stale_seconds=SHARD_STALE_SECONDS):
+        """ Initialize instances of the ShardedLint class
+
+            Args:
+                shard_dir(str)      -- Spool directory shared with the workers.
+
+                logger(object)      -- Logger object of the current run.
+
+                poll_interval(int)  -- Seconds to wait for the workers between the checks.
+
+                stale_seconds(int)  -- Seconds after which a task claimed by a worker
+                                       and not completed is queued again.
+        """
+        self.shard_dir = shard_dir
+        self.logger = logger
+        self.poll_interval = poll_interval
+        self.stale_seconds = stale_seconds
+        self.worker = "{0}-{1}".format(socket.gethostname(), os.getpid())
+        self.linted = 0
+        self.sharded = 0
+        os.makedirs(self.shard_dir, exist_ok=True)
+
+    def lint(self, linter, paths, spool_files):
+        """ Queues given files as tasks of the shard spool and waits for their results,
+            the tasks not claimed by a worker are linted through the CvemailPylint
+            of the form.
+
+            Args:
+                linter(object)      -- CvemailPylint of the form.
+
+                paths(list)         -- Python files to be linted.
+
+                spool_files(list)   -- Spool file of every file in streaming mode.
+
+            Returns:
+                list - (output, PylintResult) of every file in the order of paths
+        """
+        if not paths:
+            return []
+        run = "{0}_{1}".format(linter.form_id, uuid.uuid4().hex[:12])
+        tasks = [os.path.join(self.shard_dir, "{0}_{1}".format(run, index))
+                 for index in range(len(paths))]
+        results = [None] * len(paths)
+        try:
+            for task, path in zip(tasks, paths):
+                _write_atomic(task + ".task", json.dumps({"path": path,
+                                                               "build": linter.build_id}))
+            self.logger.info("Queued %s files as tasks %s_* of shard spool %s",
+                             len(paths), run, self.shard_dir)
+            pending = set(range(len(paths)))
+            while pending:
+                progressed = False
+                done_files = self.__done_files(run)
+                for index in sorted(pending):
+                    done_file = done_files.get(os.path.basename(tasks[index]))
+                    if done_file is not None:
+                        results[index] = self.__collect(linter, done_file, paths[index],
+                                                        spool_files[index])
+                        pending.discard(index)
+                        progressed = True
+                for index in sorted(pending):
+                    if self.__lint_local(linter, tasks[index], paths[index],
+                                         spool_files[index], results, index):
+                        pending.discard(index)
+                        progressed = True
+                        break
+                if pending and not progressed:
+                    self.__requeue_stale(run)
+                    time.sleep(self.poll_interval)
+        finally:
+            self.__remove(run)
+        self.logger.info("Shard spool linted %s files locally, %s by the workers",
+                         self.linted, self.sharded)
+        return results
+
+    def __lint_local(self, linter, task, path, spool_file, results, index):
+        """ Lints the file of a task not claimed by any worker through the linter of
+            the form.
+
+            Returns:
+                bool - True if the task was claimed and linted
+        """
+        running_file = _claim(task + ".task", self.worker)
+        if running_file is None:
+            return False
+        results[index] = self.__lint_file(linter, path, spool_file)
+        os.remove(running_file)
+        return True
+
+    def __lint_file(self, linter, path, spool_file):
+        """ Lints a file through the linter of the form.
+
+            Returns:
+                tuple - (output, PylintResult) of the file, the output is the spool file
+                        holding it in streaming mode
+        """
+        self.linted += 1
+        if spool_file is None:
+            output = linter.lint_files([path])[0]
+            return output, parse_pylint_output(output)
+        return spool_file, linter.lint_files([path], [spool_file])[0]
+
+    def __done_files(self, run):
+        """ Returns the done marker of every task of the run completed by a worker,
+            keyed by the task name, with a single listing of the spool"""
+        done_files = {}
+        with os.scandir(self.shard_dir) as entries:
+            for entry in entries:
+                if entry.name.startswith(run + "_") and entry.name.endswith(".done"):
+                    done_files.setdefault(entry.name.split(".", 1)[0], entry.path)
+        return done_files
+
+    def __collect(self, linter, done_file, path, spool_file):
+        """ Reads the output written back by the worker of a task and parses it, the
+            file is linted locally if the worker failed or its output is gone.
+
+            Returns:
+                tuple - (output, PylintResult) of the file, the output is the spool file
+                        holding it in streaming mode
+        """
+        out_file = done_file[:-len(".done")] + ".out"
+        try:
+            with open(done_file, encoding='utf-8') as done_content:
+                done = json.load(done_content)
+            if done.get("error"):
+                self.logger.error("Worker %s failed to lint file %s with error: %s, linting "
+                                  "it locally", done.get("worker"), path, done["error"])
+                return self.__lint_file(linter, path, spool_file)
+            if spool_file is None:
+                with open(out_file, encoding='utf-8') as output_file:
+                    output = output_file.read()
+                result = output, parse_pylint_output(output)
+            else:
+                shutil.move(out_file, spool_file)
+                parser = PylintOutputParser(STREAM_MAX_MESSAGES)
+                with open(spool_file, encoding='utf-8') as output_file:
+                    for line in output_file:
+                        parser.feed(line)
+                result = spool_file, parser.result
+        except (OSError, ValueError) as collect_excep:
+            self.logger.error("Failed to read the output of file %s from the shard spool "
+                              "with error: %s, linting it locally", path, collect_excep)
+            return self.__lint_file(linter, path, spool_file)
+        finally:
+            for result_file in (out_file, done_file):
+                try:
+                    os.remove(result_file)
+                except OSError:
+                    continue
+        linter.durations[path] = done.get("seconds")
+        self.logger.info("Pylint output of file %s linted by worker %s", path, done.get("worker"))
+        self.sharded += 1
+        return result
+
+    def __requeue_stale(self, run):
+        """ Queues again the tasks of the run claimed by a worker which did not complete
+            them in time"""
+        stale_time = time.time() - self.stale_seconds
+        with os.scandir(self.shard_dir) as entries:
+            for entry in entries:
+                if not (entry.name.startswith(run + "_") and entry.name.endswith(".running")):
+                    continue
+                try:
+                    if entry.stat().st_mtime > stale_time:
+                        continue
+                    task = entry.name.split(".", 1)[0]
+                    os.rename(entry.path, os.path.join(self.shard_dir, task + ".task"))
+                    self.logger.info("Task %s of a stale worker queued again", task)
+                except OSError:
+                    # completed or queued again by another process meanwhile
+                    continue
+
+    def __remove(self, run):
+        """ Removes the files of the run left in the shard spool, the workers still
+            linting a removed task drop their output"""
+        with os.scandir(self.shard_dir) as entries:
+            for entry in entries:
+                if entry.name.startswith(run + "_"):
+                    try:
+                        os.remove(entry.path)
+                    except OSError:
+                        continue
+
+
+class ShardWorker:
+    """Class for linting the tasks queued in a shard spool directory."""
+
+    def __init__(self, shard_dir, max_jobs=1, engine="subprocess", idle_seconds=0,
+                 poll_interval=SHARD_POLL_SECONDS, stale_seconds=SHARD_STALE_SECONDS):
+        """ Initialize instances of the ShardWorker class
+
+            Args:
+                shard_dir(str)      -- Spool directory shared with the coordinators.
+
+                max_jobs(int)       -- Maximum number of tasks processed at a time.
+
+                engine(str)         -- "subprocess" runs one pylint process per file,
+                                       "inprocess" lints the files in the worker process.
+
+                idle_seconds(int)   -- Seconds without any task after which the worker
+                                       stops, 0 runs the worker till it is stopped.
+
+                poll_interval(int)  -- Seconds to wait when no task is queued.
+
+                stale_seconds(int)  -- Seconds after which the output of a task not
+                                       collected by its coordinator is removed.
+        """
+        self.shard_dir = shard_dir
+        self.max_jobs = max_jobs
+        self.idle_seconds = idle_seconds
+        self.poll_interval = poll_interval
+        self.stale_seconds = stale_seconds
+        self.worker = "{0}-{1}".format(socket.gethostname(), os.getpid())
+        self.logger = logging.getLogger("cvemail_pylint.shard")
+        self.engine = InProcessPylint(self.logger) if engine == "inprocess" else None
+        self.processed = 0
+        self.__stopped = threading.Event()
+        self.__slots = threading.BoundedSemaphore(max_jobs)
+        self.__count_lock = threading.Lock()
+        os.makedirs(self.shard_dir, exist_ok=True)
+
+    def run(self):
+        """ Claims the queued tasks oldest first and processes at most max_jobs of them
+            at a time till the worker is stopped or idle."""
+        self.logger.info("CVEmailPylint shard worker %s started on spool: %s", self.worker,
+                         self.shard_dir)
+        idle_since = time.time()
+        with ThreadPoolExecutor(max_workers=self.max_jobs) as executor:
+            try:
+                while not self.__stopped.is_set():
+                    running_file = self.__claim_task()
+                    if running_file is not None:
+                        idle_since = time.time()
+                        executor.submit(self.process_task, running_file)
+                        continue
+                    if self.idle_seconds and time.time() - idle_since >= self.idle_seconds:
+                        break
+                    self.__remove_orphans()
+                    self.__stopped.wait(self.poll_interval)
+            except KeyboardInterrupt:
+                self.stop()
+        self.logger.info("CVEmailPylint shard worker stopped after %s tasks", self.processed)
+
+    def stop(self):
+        """ Stops claiming new tasks, run() returns once the running tasks complete"""
+        self.__stopped.set()
+
+    def __claim_task(self):
+        """ Waits for a free slot and claims the oldest queued task.
+
+            Returns:
+                str - Path of the claimed task file, None if no task is queued
+        """
+        self.__slots.acquire()
+        tasks = []
+        with os.scandir(self.shard_dir) as entries:
+            for entry in entries:
+                if entry.name.endswith(".task"):
+                    try:
+                        tasks.append((entry.stat().st_mtime, entry.path))
+                    except OSError:
+                        continue
+        for _, task_file in sorted(tasks):
+            running_file = _claim(task_file, self.worker)
+            if running_file is not None:
+                return running_file
+        self.__slots.release()
+        return None
+
+    def __remove_orphans(self):
+        """ Removes the outputs not collected within stale_seconds, written for tasks
+            whose coordinator completed or gave up on them meanwhile"""
+        stale_time = time.time() - self.stale_seconds
+        with os.scandir(self.shard_dir) as entries:
+            for entry in entries:
+                if not entry.name.endswith((".out", ".done")):
+                    continue
+                try:
+                    if entry.stat().st_mtime <= stale_time:
+                        os.remove(entry.path)
+                except OSError:
+                    # collected by the coordinator meanwhile
+                    continue
+
+    def process_task(self, running_file):
+        """ Lints the file of a claimed task, writes its output and the done marker and
+            releases the claim.
+
+            Args:
+                running_file(str)   -- Path of the claimed task file.
+        """
+        claim = running_file[:-len(".running")]
+        done = {"worker": self.worker}
+        try:
+            with open(running_file, encoding='utf-8') as task_file:
+                task = json.load(task_file)
+            path = task["path"]
+            start = time.perf_counter()
+            if self.engine:
+                # the astroid trees of the tasks of other builds are dropped first
+                _write_atomic(claim + ".out", self.engine.lint_file(path,
+                                                                    build=task.get("build")))
+            else:
+                # pylint exits non zero whenever it reports messages
+                with open(claim + ".out", 'w', encoding='utf-8') as output_file:
+                    subprocess.run(['pylint', path, '-r', 'y'], stdout=output_file, check=False)
+            done["seconds"] = time.perf_counter() - start
+            self.logger.info("Linted file: %s in %.2f s", path, done["seconds"])
+        except Exception as task_excep:
+            self.logger.error("Failed to process task %s with error: %s", running_file,
+                              task_excep)
+            done["error"] = str(task_excep)
+        try:
+            _write_atomic(claim + ".done", json.dumps(done))
+            os.remove(running_file)
+        except OSError:
+            # the coordinator gave up on the task or queued it again for another worker,
+            # the output of this claim is removed by the coordinator or as an orphan
+            self.logger.warning("Task %s was released before it completed", running_file)
+        finally:
+            with self.__count_lock:
+                self.processed += 1
+            self.__slots.release()
+
+
+def main():
+    """ Starts a shard worker as per the command line arguments"""
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-spool', help='Shard spool directory shared with the coordinators',
+                        dest='Spool', required=True)
+    parser.add_argument('-jobs', help='Number of tasks processed at a time', dest='Jobs',
+                        type=int, default=1)
+    parser.add_argument('-engine', help='Pylint engine to be used', dest='Engine',
+                        choices=['subprocess', 'inprocess'], default='subprocess')
+    parser.add_argument('-idle', help='Seconds without tasks after which the worker stops, '
+                        '0 runs it till interrupted', dest='Idle', type=int, default=0)
+    arguments = parser.parse_args()
+    logging.basicConfig(level=logging.INFO,
+                        format='%(asctime)-25s  %(levelname)-8s %(message)s')
+    ShardWorker(arguments.Spool, arguments.Jobs, arguments.Engine, arguments.Idle).run()
+
+
+if __name__ == "__main__":
+    main()
@@ -8,36 +8,103 @@
 """" Main file initializes logger of CVEmailPylint package.
 
 This module handles the initialization of logger object for the log files.
+
+Every form is logged through a logger of its own, so the runs of several forms in
+one process, ex. in the daemon, do not interleave in each other's log file. The
+logger of a form is shared by all the Logger objects of the form and the log file
+gets a single handler however many times the logger is initialized in a run.
+
+Logging does not wait on the share, the records are queued and written by a
+listener thread. The listener buffers the records and appends them to the log file
+in batches of LOG_BATCH_SIZE, errors and closing the logger write the buffer right
+away.
+
 Logger:
         __init__(self,formid)             -- Initializes logger of Logger class
 
         __initialize_logger(self, formid) -- Initializes the logger for CVemailPylint package
 
-        get_log()                          -- Returns the log object for current thread
-                                             if exists else create a new standalone logger
-                                             for current thread
+        get_log()                          -- Returns the logger of the form
+
+        close()                            -- Releases the logger of the form, the log
+                                             file is written and closed once all the
+                                             Logger objects of the form are closed
+
+BatchFileHandler:
+        __init__()      -- Initializes the handler and checks the log file can be opened
+
+        shouldFlush()   -- Checks whether the buffered records are to be written
+
+        flush()         -- Appends the buffered records to the log file in one write
 """
 
 import logging
+import logging.handlers
 import os
+import queue
+import threading
 from constants import PATH
 from constants import LOGCONSTANT
+from constants import LOG_BATCH_SIZE
+
+
+class BatchFileHandler(logging.handlers.BufferingHandler):
+    """Handler appending the buffered records to the log file in batches."""
+
+    def __init__(self, filename, capacity=LOG_BATCH_SIZE, flush_level=logging.ERROR):
+        """ Initializes the handler, the log file is opened once to fail early if the
+            form folder is not reachable"""
+        super().__init__(capacity)
+        self.filename = filename
+        self.flush_level = flush_level
+        open(self.filename, "a").close()
+
+    def shouldFlush(self, record):
+        """ Checks whether the buffer is full or the record is an error"""
+        return len(self.buffer) >= self.capacity or record.levelno >= self.flush_level
+
+    def flush(self):
+        """ Appends the buffered records to the log file in one write"""
+        self.acquire()
+        try:
+            if not self.buffer:
+                return
+            try:
+                text = "".join(self.format(record) + "\n" for record in self.buffer)
+                with open(self.filename, "a") as log_file:
+                    log_file.write(text)
+            except Exception:
+                self.handleError(self.buffer[0])
+            self.buffer = []
+        finally:
+            self.release()
 
 
 class Logger:
     """"Logger class for CVEmailPylint package."""
 
+    loggers = {}
+    loggers_lock = threading.Lock()
+
     def __init__(self, formid):
-        self.__initialize_logger(formid)
+        self.formid = formid
+        self.__closed = False
+        with self.loggers_lock:
+            if formid not in self.loggers:
+                self.loggers[formid] = self.__initialize_logger(formid)
+            self.loggers[formid]["users"] += 1
+        self.__logger = self.loggers[formid]["logger"]
 
-    def __initialize_logger(self, formid):
+    @staticmethod
+    def __initialize_logger(formid):
         """ Initialize the logger for the CvemailPylint run"""
         try:
-            logger = logging.getLogger()
+            logger = logging.getLogger("cvemail_pylint.{0}".format(formid))
             logger.setLevel(logging.INFO)
+            logger.propagate = False
             logpath = os.path.join(PATH, formid, LOGCONSTANT)
-            # Create File handler
-            handler = logging.FileHandler(logpath)
+            # Create batching File handler
+            handler = BatchFileHandler(logpath)
             handler.setLevel(logging.INFO)
 
             # Create logging format
@@ -46,17 +113,39 @@ class Logger:
                                           ' %(lineno)-6d  %(levelname)-15s %(message)s')
             handler.setFormatter(formatter)
 
-            # add handlers to logger
-            logger.addHandler(handler)
+            # records are handed to the listener thread writing the log file
+            log_queue = queue.Queue()
+            queue_handler = logging.handlers.QueueHandler(log_queue)
+            listener = logging.handlers.QueueListener(log_queue, handler)
+            listener.start()
+            logger.addHandler(queue_handler)
             logger.info("*" * 80)
             logger.info("%(boundary)s  %(message)s %(boundary)s",
                         {'boundary': "*" * 25,
                          'message': "CVEmail Execution Started"
                         })
             logger.info("*" * 80)
+            return {"logger": logger, "handler": handler, "queue_handler": queue_handler,
+                    "listener": listener, "users": 0}
         except Exception as excp:
             raise Exception("Failed to initialize logger with error: {0}".format(excp))
 
     def get_log(self):
-        return logging.getLogger()
+        """ Returns the logger of the form"""
+        return self.__logger
 
+    def close(self):
+        """ Releases the logger of the form, once released by all the Logger objects of
+            the form the queued records are written and the log file is closed"""
+        with self.loggers_lock:
+            if self.__closed:
+                return
+            self.__closed = True
+            entry = self.loggers[self.formid]
+            entry["users"] -= 1
+            if entry["users"]:
+                return
+            del self.loggers[self.formid]
+            entry["logger"].removeHandler(entry["queue_handler"])
+        entry["listener"].stop()
+        entry["handler"].close()
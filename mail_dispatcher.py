@@ -0,0 +1,221 @@
+# -*- coding: utf-8 -*-
+
+# ------------------------------------------------------------------------------
+# Copyright Commvault Systems, Inc.
+# See LICENSE.txt in the project root for
+# license information.
+# ------------------------------------------------------------------------------
+
+"""File for sending the emails of CVEmailPylint package through one SMTP session.
+
+Opening an SMTP connection per email adds a connection setup per form build and
+leaks sockets on the mail server when the connection is not closed. MailDispatcher
+keeps a single SMTP session per mail server for the life of the process, which is
+reopened when the server drops it:
+
+    a. emails are queued in a bounded queue and sent by a single sender thread
+
+    b. failed sends are retried with exponential backoff
+
+    c. emails sent with a digest key are held for the digest window, the emails
+       with the same key received in the window are merged into one email
+
+The dispatchers are closed when the process exits and closing sends the held
+digests right away. Hence digests only merge the emails of a process running
+several form builds, ex. pylint_daemon.py or build_batch.py, a single form run
+through PylintBatch.bat sends its email when it exits whatever the digest window.
+
+MailDispatcher:
+
+    __init__()      -- Initialize instance of the MailDispatcher class and starts the
+                       sender thread
+
+    send()          -- Queues an email and returns a future of its delivery
+
+    close()         -- Sends the held digests and the queued emails and quits the session
+
+get_dispatcher()    -- Returns the MailDispatcher of given mail server shared in the process
+"""
+
+import atexit
+import queue
+import re
+import smtplib
+import threading
+import time
+from concurrent.futures import Future
+from email.mime.text import MIMEText
+from constants import MAIL_QUEUE_SIZE
+from constants import MAIL_RETRIES
+from constants import MAIL_BACKOFF_SECONDS
+
+BODY_PATTERN = re.compile(r'<body[^>]*>(.*)</body>', re.DOTALL)
+HEAD_PATTERN = re.compile(r'<head>.*</head>', re.DOTALL)
+
+DISPATCHERS = {}
+DISPATCHERS_LOCK = threading.Lock()
+
+
+def get_dispatcher(server):
+    """ Returns the MailDispatcher of given mail server shared in the process, the
+        dispatcher is closed when the process exits.
+
+        Args:
+            server(str) -- Mail server to send the emails through.
+
+        Returns:
+            object - MailDispatcher of the server
+    """
+    with DISPATCHERS_LOCK:
+        if server not in DISPATCHERS:
+            DISPATCHERS[server] = MailDispatcher(server)
+            atexit.register(DISPATCHERS[server].close)
+        return DISPATCHERS[server]
+
+
+class MailDispatcher:
+    """Class for sending emails through a reusable SMTP session."""
+
+    def __init__(self, server, max_queue=MAIL_QUEUE_SIZE, retries=MAIL_RETRIES,
+                 backoff=MAIL_BACKOFF_SECONDS, smtp_factory=smtplib.SMTP):
+        """ Initialize instances of the MailDispatcher class
+
+            Args:
+                server(str)             -- Mail server to send the emails through.
+
+                max_queue(int)          -- Maximum number of emails waiting to be sent,
+                                           send() blocks when the queue is full.
+
+                retries(int)            -- Number of times a failed send is retried.
+
+                backoff(int)            -- Seconds to wait before the first retry, doubled
+                                           for every following retry.
+
+                smtp_factory(callable)  -- Opens the SMTP session for given server.
+        """
+        self.server = server
+        self.retries = retries
+        self.backoff = backoff
+        self.smtp_factory = smtp_factory
+        self.__session = None
+        self.__digests = {}
+        self.__queue = queue.Queue(max_queue)
+        self.__closed = False
+        self.__lock = threading.Lock()
+        self.__thread = threading.Thread(target=self.__run, name="MailDispatcher", daemon=True)
+        self.__thread.start()
+
+    def send(self, message, digest_key=None, digest_window=0):
+        """ Queues an email to be sent.
+
+            Args:
+                message(object)     -- MIMEText email to be sent.
+
+                digest_key(tuple)   -- Emails with the same key sent within the digest
+                                       window are merged into one email.
+
+                digest_window(int)  -- Seconds the email is held for merging.
+
+            Returns:
+                object - Future resolved once the email is sent
+        """
+        future = Future()
+        with self.__lock:
+            if self.__closed:
+                future.set_exception(Exception("Mail dispatcher is closed"))
+                return future
+            self.__queue.put((message, digest_key if digest_window else None,
+                              digest_window, future))
+        return future
+
+    def close(self):
+        """ Sends the held digests and the queued emails and quits the SMTP session"""
+        with self.__lock:
+            if self.__closed:
+                return
+            self.__closed = True
+            self.__queue.put(None)
+        self.__thread.join()
+
+    def __run(self):
+        """ Sends the queued emails and the digests whose window is over"""
+        while True:
+            timeout = None
+            if self.__digests:
+                deadline = min(digest[0] for digest in self.__digests.values())
+                timeout = max(deadline - time.time(), 0)
+            try:
+                item = self.__queue.get(timeout=timeout)
+            except queue.Empty:
+                item = False
+            if item is None:
+                for key in list(self.__digests):
+                    self.__send_digest(key)
+                self.__quit()
+                return
+            if item:
+                message, digest_key, digest_window, future = item
+                if digest_key is None:
+                    self.__deliver(message, [future])
+                elif digest_key in self.__digests:
+                    self.__digests[digest_key][1].append((message, future))
+                else:
+                    self.__digests[digest_key] = (time.time() + digest_window,
+                                                  [(message, future)])
+            now = time.time()
+            for key in [key for key, digest in self.__digests.items() if digest[0] <= now]:
+                self.__send_digest(key)
+
+    def __send_digest(self, key):
+        """ Merges the emails held for given digest key into one email and sends it"""
+        _, held = self.__digests.pop(key)
+        messages = [message for message, _ in held]
+        futures = [future for _, future in held]
+        if len(messages) == 1:
+            self.__deliver(messages[0], futures)
+            return
+        bodies = []
+        head = None
+        for message in messages:
+            content = message.get_payload(decode=True).decode(
+                message.get_content_charset() or 'utf-8')
+            body = BODY_PATTERN.search(content)
+            bodies.append(body.group(1) if body else content)
+            head = head or HEAD_PATTERN.search(content)
+        merged = MIMEText("<!DOCTYPE html><html>{0}<body>{1}</body></html>"
+                          .format(head.group(0) if head else "", "<hr>".join(bodies)), "html")
+        for header in ('From', 'To', 'Bcc'):
+            if messages[-1][header]:
+                merged[header] = messages[-1][header]
+        merged['Subject'] = "{0} ({1} builds)".format(messages[-1]['Subject'], len(messages))
+        self.__deliver(merged, futures)
+
+    def __deliver(self, message, futures):
+        """ Sends the email through the SMTP session, reopening the session and retrying
+            with backoff if the send fails, and resolves the futures of the email"""
+        for attempt in range(self.retries + 1):
+            try:
+                if self.__session is None:
+                    self.__session = self.smtp_factory(self.server)
+                self.__session.send_message(message)
+                for future in futures:
+                    future.set_result(True)
+                return
+            except (smtplib.SMTPException, OSError) as send_excep:
+                self.__quit()
+                # refused recipients fail the same way on every retry
+                if attempt == self.retries or isinstance(send_excep,
+                                                         smtplib.SMTPRecipientsRefused):
+                    for future in futures:
+                        future.set_exception(send_excep)
+                    return
+                time.sleep(self.backoff * 2 ** attempt)
+
+    def __quit(self):
+        """ Quits the SMTP session if open"""
+        if self.__session is not None:
+            try:
+                self.__session.quit()
+            except (smtplib.SMTPException, OSError):
+                self.__session.close()
+            self.__session = None
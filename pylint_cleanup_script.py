@@ -7,47 +7,102 @@
 # ------------------------------------------------------------------------------
 
 r"""File that runs Cleanup Script for folders ie. removes folders from path after every 15 days
-    \\devshare\CoreAutomation\\Pylint\\ which are being official"""
+    \\devshare\CoreAutomation\\Pylint\\ which are being official
 
+    Usage:
+    >>python pylint_cleanup_script.py -retention 15 -workers 8 -maxrate 5 -dryrun
+"""
+
+import argparse
 import time
-import shutil
 import os
+import json
 import pyodbc
+from constants import PATH
+from constants import CLEANUP_INDEX_PATH
+from constants import UC_CONNECTION
+from constants import FORM_QUERY_CHUNK
+from deletion_engine import DeletionEngine
 
 
 class PylintCleanup:
     """Class for running script to clean up folders in devshare which are get official"""
-    def __init__(self):
+    def __init__(self, retention_days=15, workers=8, max_rate=5, dry_run=False):
+        """ Initialize instances of the PylintCleanup class
+
+            Args:
+                retention_days(int) -- Days a folder is kept after it is created.
+
+                workers(int)        -- Number of folders deleted at a time.
+
+                max_rate(float)     -- Maximum number of folders deleted per second, 0 for
+                                       no limit.
+
+                dry_run(bool)       -- Only reports the folders which would be deleted.
+        """
+        self.retention_days = retention_days
+        self.workers = workers
+        self.max_rate = max_rate
+        self.dry_run = dry_run
         self.dev = set()
         self.form_state_path = set()
         self.devshare_path = None
+        self.folder_ctimes = {}
 
     def check_path(self):
-        """ Check the folders from devshare."""
-        path = r"\\devshare\devl\CoreAutomation\Pylint"
-        file = []
-        for _, dirnames, filenames in os.walk(path):
-            # files = len(filenames)
-            # folders = len(dirnames)
-            file += dirnames
-        self.devshare_path = set(file)
+        """ Check the form folders from devshare. Only the top level folders named
+        by a formid are listed, the creation time of a folder is read from the index
+        of the earlier runs and only new folders are stat-ed. The folders due for
+        cleanup are stat-ed again before they are deleted, as they may have been
+        deleted and created again since they were indexed."""
+        index = {}
+        try:
+            with open(CLEANUP_INDEX_PATH) as index_file:
+                index = json.load(index_file)
+        except (OSError, ValueError):
+            pass
+        folders = {}
+        with os.scandir(PATH) as entries:
+            for entry in entries:
+                if entry.name.isdigit() and entry.is_dir(follow_symlinks=False):
+                    if entry.name in index:
+                        folders[entry.name] = index[entry.name]
+                    else:
+                        folders[entry.name] = entry.stat().st_ctime
+        print("New form folders:", len(folders.keys() - index.keys()))
+        self.folder_ctimes = folders
+        self.devshare_path = set(folders)
+        self.save_index()
         print("Devshare:", self.devshare_path)
 
+    def save_index(self):
+        """ Saves the creation time of the form folders known to be on devshare"""
+        try:
+            os.makedirs(os.path.dirname(CLEANUP_INDEX_PATH), exist_ok=True)
+            with open(CLEANUP_INDEX_PATH + ".tmp", "w") as index_file:
+                json.dump(self.folder_ctimes, index_file)
+            os.replace(CLEANUP_INDEX_PATH + ".tmp", CLEANUP_INDEX_PATH)
+        except OSError as index_excep:
+            print("Failed to save devshare folder index:", index_excep)
+
     def check_form_state(self):
-        """Checks only official folders from update center database"""
+        """Checks which of the form folders found on devshare are official in update
+        center database. The formids are looked up in chunks and the rows are
+        read from the cursor as they arrive."""
         connection = None
-        form_state = []
+        candidates = sorted(self.devshare_path)
         try:
-            connection = pyodbc.connect("DRIVER={SQL SERVER};SERVER=UpdateCenter;"
-                                        "DATABASE=ProdUpdateCenter;"
-                                        "UID=umsuser;PWD=umsuser")
+            connection = pyodbc.connect(UC_CONNECTION)
             cursor = connection.cursor()
-            cursor.execute("select nFormID from forminfo join CVFormState on "
-                           "forminfo.nFormStateID = CVFormState.nFormStateID AND "
-                           "sDisplayName= 'official'")
-            form_state = cursor.fetchall()
-            for onestate in range(len(form_state)):
-                self.form_state_path.add(str(form_state[onestate][0]))
+            for start in range(0, len(candidates), FORM_QUERY_CHUNK):
+                chunk = candidates[start:start + FORM_QUERY_CHUNK]
+                cursor.execute("select distinct forminfo.nFormID from forminfo join CVFormState "
+                               "on forminfo.nFormStateID = CVFormState.nFormStateID AND "
+                               "sDisplayName= 'official' where forminfo.nFormID in ({0})"
+                               .format(", ".join("?" * len(chunk))),
+                               [int(formid) for formid in chunk])
+                for form_state in cursor:
+                    self.form_state_path.add(str(form_state[0]))
 
             print("form state path:", self.form_state_path)
         except Exception as state_excep:
@@ -57,33 +112,61 @@ class PylintCleanup:
             if connection:
                 connection.close()
 
+    def expired_folders(self, formids, cutoff):
+        """ Returns the form folders created before the cutoff, the creation time of
+            every folder due as per the index is read again from devshare.
+
+            Args:
+                formids(set)    -- Official forms with a folder on devshare.
+
+                cutoff(float)   -- Folders created before this time are expired.
+
+            Returns:
+                list - formids of the expired folders
+        """
+        expired = []
+        for formid in sorted(formids):
+            if self.folder_ctimes.get(formid, cutoff) >= cutoff:
+                continue
+            try:
+                ctime = os.stat(os.path.join(PATH, formid)).st_ctime
+            except FileNotFoundError:
+                self.folder_ctimes.pop(formid, None)
+                continue
+            self.folder_ctimes[formid] = ctime
+            if ctime < cutoff:
+                expired.append(formid)
+            else:
+                print("Directory", os.path.join(PATH, formid), "was created again, kept")
+        return expired
+
     def cleanup_script(self):
         """Checks the official forms from devshare by comparing it with
-        forms from updatecenter and delete related directory if present."""
+        forms from updatecenter and delete related directory if it was created
+        before the retention window."""
         try:
             final_set = self.devshare_path & self.form_state_path
             print("Common elements:", final_set)
-            now = time.time()
-            cutoff = now - (1*300)
-            for one_element in final_set:
-                share_path = r"\\devshare\devl\CoreAutomation\Pylint"
-                join_path = share_path + "\\" + one_element
-                # print("Join path:", join_path)
-                # files = os.listdir(share_path)
-                # print("Files:", files)
-                if final_set:
-                    if os.path.isdir(join_path):
-                        time_file = os.stat(join_path)
-                        time_folder_creation = time_file.st_ctime
-                        if time_folder_creation < cutoff:
-                            shutil.rmtree(join_path, ignore_errors=False, onerror=None)
-                            print("Directory gets cleaned up as ", one_element)
-                        else:
-                            print("No directory is official yet")
+            cutoff = time.time() - self.retention_days * 24 * 60 * 60
+            expired = self.expired_folders(final_set, cutoff)
+            if not expired:
+                print("No any Official form folder found here")
+                return
+            engine = DeletionEngine(self.workers, self.max_rate, self.dry_run)
+            summary = engine.delete([os.path.join(PATH, formid) for formid in expired])
+            for folder in summary["deleted"]:
+                if self.dry_run:
+                    print("Dry run: directory", folder, "would be deleted")
                 else:
-                    print("No any Official form folder found here")
-        except FileNotFoundError as exception:
-            print(exception)
+                    print("Deleted directory", folder)
+                    self.folder_ctimes.pop(os.path.basename(folder), None)
+            for folder, error in summary["failed"].items():
+                print("Failed to clean up directory", folder, "with error:", error)
+            print("{0}Reclaimed {1} folders, {2:.2f} MB".format(
+                "Dry run: " if self.dry_run else "", len(summary["deleted"]),
+                summary["bytes"] / (1024 * 1024)))
+        finally:
+            self.save_index()
 
     def execute(self):
         """ Method which contains all the methods inside.
@@ -94,6 +177,17 @@ class PylintCleanup:
 
 
 if __name__ == "__main__":
+    PARSER = argparse.ArgumentParser()
+    PARSER.add_argument('-retention', help='Days a form folder is kept after it is created',
+                        dest='Retention', type=int, default=15)
+    PARSER.add_argument('-workers', help='Number of folders deleted at a time',
+                        dest='Workers', type=int, default=8)
+    PARSER.add_argument('-maxrate', help='Maximum folders deleted per second, 0 for no limit',
+                        dest='Maxrate', type=float, default=5)
+    PARSER.add_argument('-dryrun', help='Only report the folders which would be deleted',
+                        dest='Dryrun', action='store_true')
+    ARGUMENTS = PARSER.parse_args()
 
-    PYCLEANUP = PylintCleanup()
+    PYCLEANUP = PylintCleanup(ARGUMENTS.Retention, ARGUMENTS.Workers, ARGUMENTS.Maxrate,
+                              ARGUMENTS.Dryrun)
     PYCLEANUP.execute()
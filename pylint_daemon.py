@@ -0,0 +1,295 @@
+# -*- coding: utf-8 -*-
+
+# ------------------------------------------------------------------------------
+# Copyright Commvault Systems, Inc.
+# See LICENSE.txt in the project root for
+# license information.
+# ------------------------------------------------------------------------------
+
+r"""File for running CVEmailPylint as a resident service processing form build jobs.
+
+Every form build launching PylintBatch.bat starts a fresh process, which imports
+pyodbc and pylint again, connects to UpdateCenter and ENGWEBDB again and starts with
+empty caches. PylintDaemon keeps running and processes the jobs queued in a spool
+directory with warm caches and pooled connections:
+
+    a. connection pools to UpdateCenter and ENGWEBDB shared by all the jobs
+
+    b. email alias cache shared by all the jobs
+
+    c. astroid cache of the in-process pylint engine and the pylint version
+       lookup of the result cache, kept for the life of the process, the astroid
+       trees held in memory are dropped whenever a job of another build or mount
+       path is linted
+
+Every job is a json file <formid>_<buildid>.job in the spool directory. A job is
+claimed by renaming it to .running, hence several daemons can share a spool
+directory. Jobs which fail are renamed to .failed.
+
+The daemon touches the .running files of its jobs every poll interval, jobs left
+.running by a daemon which stopped without completing them, ex. a crashed daemon,
+are queued again once not touched for DAEMON_STALE_SECONDS.
+
+PylintDaemon:
+
+    __init__()      -- Initialize instance of the PylintDaemon class
+
+    submit()        -- Queues a job in the spool directory
+
+    run()           -- Processes the queued jobs till the daemon is stopped
+
+    stop()          -- Stops the daemon after the running jobs complete
+
+    process_job()   -- Runs UCHelper for a claimed job
+
+    Usage:
+
+    Start the daemon with the options applied to every job:
+    >>python pylint_daemon.py -spool D:\PylintSpool -jobs 4 -engine inprocess -cache
+
+    Queue a job, ex. from PylintBatch.bat:
+    >>python pylint_daemon.py -spool D:\PylintSpool -submit -formid 50888
+        -buildid 1100080 -mountpath F:\PC\test-mount
+"""
+
+import argparse
+import functools
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import pyodbc
+from uc_helper import UCHelper
+from db_pool import ConnectionPool
+from alias_cache import AliasCache
+from constants import SPOOL_PATH
+from constants import DAEMON_POLL_SECONDS
+from constants import DAEMON_STALE_SECONDS
+from constants import UC_CONNECTION
+from constants import ENGWEB_CONNECTION
+
+LOGGER = logging.getLogger("cvemail_pylint.daemon")
+
+
+class PylintDaemon:
+    """Class for processing form build jobs queued in a spool directory."""
+
+    def __init__(self, spool_dir=SPOOL_PATH, max_jobs=2, options=None,
+                 poll_interval=DAEMON_POLL_SECONDS, stale_seconds=DAEMON_STALE_SECONDS):
+        """ Initialize instances of the PylintDaemon class
+
+            Args:
+                spool_dir(str)      -- Directory where the jobs are queued.
+
+                max_jobs(int)       -- Maximum number of jobs processed at a time.
+
+                options(list)       -- UCHelper arguments applied to every job,
+                                       ex. ['-engine', 'inprocess', '-cache'].
+
+                poll_interval(int)  -- Seconds to wait when no job is queued.
+
+                stale_seconds(int)  -- Seconds after which a .running job not touched by
+                                       its daemon is queued again.
+        """
+        self.spool_dir = spool_dir
+        self.max_jobs = max_jobs
+        self.options = options or []
+        self.poll_interval = poll_interval
+        self.stale_seconds = stale_seconds
+        self.uc_pool = ConnectionPool(functools.partial(pyodbc.connect, UC_CONNECTION),
+                                      max_jobs)
+        self.engweb_pool = ConnectionPool(functools.partial(pyodbc.connect, ENGWEB_CONNECTION),
+                                          max_jobs)
+        self.alias_cache = AliasCache()
+        self.__stopped = threading.Event()
+        self.__slots = threading.BoundedSemaphore(max_jobs)
+        self.__running = set()
+        self.__running_lock = threading.Lock()
+        os.makedirs(self.spool_dir, exist_ok=True)
+
+    @staticmethod
+    def submit(spool_dir, formid, buildid, mountpath, options=None):
+        """ Queues a job in the spool directory.
+
+            Args:
+                spool_dir(str)  -- Directory where the jobs are queued.
+
+                formid(str)     -- Update form id of the job.
+
+                buildid(str)    -- Build id of the job.
+
+                mountpath(str)  -- Mount path of the job.
+
+                options(list)   -- UCHelper arguments applied to this job only.
+
+            Returns:
+                str - Path of the queued job file
+        """
+        os.makedirs(spool_dir, exist_ok=True)
+        job = {"formid": formid, "buildid": buildid, "mountpath": mountpath,
+               "options": options or []}
+        job_file = os.path.join(spool_dir, "{0}_{1}.job".format(formid, buildid))
+        temp_file = job_file + ".tmp"
+        with open(temp_file, "w") as job_content:
+            json.dump(job, job_content)
+        # the job becomes visible to the daemon only once it is complete
+        os.replace(temp_file, job_file)
+        return job_file
+
+    def run(self):
+        """ Claims the queued jobs oldest first and processes at most max_jobs of
+            them at a time till the daemon is stopped. The stale jobs of stopped
+            daemons are queued again on start and whenever no job is queued."""
+        LOGGER.info("CVEmailPylint daemon started on spool: %s", self.spool_dir)
+        self.__requeue_stale()
+        with ThreadPoolExecutor(max_workers=self.max_jobs) as executor:
+            try:
+                while not self.__stopped.is_set():
+                    self.__touch_running()
+                    job_file = self.__claim_job()
+                    if job_file is None:
+                        self.__requeue_stale()
+                        self.__stopped.wait(self.poll_interval)
+                        continue
+                    executor.submit(self.process_job, job_file)
+            except KeyboardInterrupt:
+                self.stop()
+        self.uc_pool.close()
+        self.engweb_pool.close()
+        LOGGER.info("CVEmailPylint daemon stopped")
+
+    def stop(self):
+        """ Stops claiming new jobs, run() returns once the running jobs complete"""
+        self.__stopped.set()
+
+    def __claim_job(self):
+        """ Waits for a free slot and claims the oldest queued job.
+
+            Returns:
+                str - Path of the claimed job file, None if no job is queued or no
+                      slot was freed within the poll interval
+        """
+        # the running jobs are touched by run() meanwhile, hence the wait is bounded
+        if not self.__slots.acquire(timeout=self.poll_interval):
+            return None
+        jobs = []
+        with os.scandir(self.spool_dir) as entries:
+            for entry in entries:
+                if not entry.name.endswith(".job"):
+                    continue
+                try:
+                    jobs.append((entry.stat().st_mtime, entry.path))
+                except FileNotFoundError:
+                    # claimed by another daemon sharing the spool directory
+                    continue
+        for _, job_file in sorted(jobs):
+            try:
+                os.rename(job_file, job_file + ".running")
+            except OSError:
+                # claimed by another daemon sharing the spool directory
+                continue
+            with self.__running_lock:
+                self.__running.add(job_file + ".running")
+            # the modification time of a running job is the last sign of its daemon
+            self.__touch_running()
+            return job_file + ".running"
+        self.__slots.release()
+        return None
+
+    def __touch_running(self):
+        """ Updates the modification time of the jobs run by this daemon"""
+        with self.__running_lock:
+            running = list(self.__running)
+        for job_file in running:
+            try:
+                os.utime(job_file)
+            except OSError:
+                continue
+
+    def __requeue_stale(self):
+        """ Queues again the running jobs not touched by their daemon for
+            stale_seconds, their daemon stopped without completing them"""
+        stale_time = time.time() - self.stale_seconds
+        with os.scandir(self.spool_dir) as entries:
+            stale = []
+            for entry in entries:
+                if not entry.name.endswith(".job.running"):
+                    continue
+                try:
+                    if entry.stat().st_mtime <= stale_time:
+                        stale.append(entry.path)
+                except FileNotFoundError:
+                    continue
+        for job_file in stale:
+            with self.__running_lock:
+                if job_file in self.__running:
+                    continue
+            try:
+                os.rename(job_file, job_file[:-len(".running")])
+                LOGGER.info("Stale job queued again: %s", job_file)
+            except OSError:
+                # completed or queued again by another daemon meanwhile
+                continue
+
+    def process_job(self, job_file):
+        """ Runs UCHelper for the claimed job and removes the job file once done, the
+            job file is renamed to .failed if the run failed.
+
+            Args:
+                job_file(str)   -- Path of the claimed job file.
+        """
+        try:
+            with open(job_file) as job_content:
+                job = json.load(job_content)
+            LOGGER.info("Processing form: %s build: %s", job["formid"], job["buildid"])
+            start = time.time()
+            helper = UCHelper(self.uc_pool, self.engweb_pool, self.alias_cache)
+            completed = helper.execute(['-formid', str(job["formid"]),
+                                        '-buildid', str(job["buildid"]),
+                                        '-mountpath', job["mountpath"]]
+                                       + self.options + job["options"])
+            if not completed:
+                raise Exception("form run failed, the failure was notified over email")
+            LOGGER.info("Processed form: %s in %s s", job["formid"],
+                        round(time.time() - start, 2))
+            os.remove(job_file)
+        except (Exception, SystemExit) as job_excep:
+            LOGGER.error("Failed to process job %s with error: %s", job_file, job_excep)
+            os.replace(job_file, job_file[:-len(".running")] + ".failed")
+        finally:
+            with self.__running_lock:
+                self.__running.discard(job_file)
+            self.__slots.release()
+
+
+def main():
+    """ Starts the daemon or queues a job as per the command line arguments"""
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-spool', help='Spool directory of the jobs', dest='Spool',
+                        default=SPOOL_PATH)
+    parser.add_argument('-jobs', help='Number of jobs processed at a time', dest='Jobs',
+                        type=int, default=2)
+    parser.add_argument('-submit', help='Queue a job instead of starting the daemon',
+                        dest='Submit', action='store_true')
+    parser.add_argument('-formid', help='Form id of the job to be queued', dest='Formid')
+    parser.add_argument('-buildid', help='Build id of the job to be queued', dest='Buildid')
+    parser.add_argument('-mountpath', help='Mount path of the job to be queued',
+                        dest='Mountpath')
+    # remaining arguments are the UCHelper options, ex. -engine inprocess -cache
+    arguments, options = parser.parse_known_args()
+    logging.basicConfig(level=logging.INFO,
+                        format='%(asctime)-25s  %(levelname)-8s %(message)s')
+    if arguments.Submit:
+        if not (arguments.Formid and arguments.Buildid and arguments.Mountpath):
+            parser.error("-submit requires -formid, -buildid and -mountpath")
+        LOGGER.info("Job queued as %s", PylintDaemon.submit(arguments.Spool, arguments.Formid,
+                                                           arguments.Buildid,
+                                                           arguments.Mountpath, options))
+        return
+    PylintDaemon(arguments.Spool, arguments.Jobs, options).run()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,219 @@
+# -*- coding: utf-8 -*-
+
+# ------------------------------------------------------------------------------
+# Copyright Commvault Systems, Inc.
+# See LICENSE.txt in the project root for
+# license information.
+# ------------------------------------------------------------------------------
+
+"""File for parsing the text output of pylint run with -r y into a PylintResult.
+
+The output is read line by line in a single pass, every line is matched against
+the pattern of the section it can belong to:
+
+    message lines   -- `path:line:column: E0602: text (symbol)` of current pylint
+                       versions and `E:  3, 0: text (symbol)` of pylint 1.x
+
+    category rows   -- `|convention |5      |...` of the "Messages by category" report
+
+    score line      -- `Your code has been rated at 7.50/10 (previous run: 6.00/10, +1.50)`
+
+PylintMessage is a namedtuple of category, line, column and text of a message.
+
+The messages kept in a result can be capped per category, the counts come from the
+report and are not affected. In streaming mode at most STREAM_MAX_MESSAGES messages
+of every category are kept per file, hence the errors listed in the email are kept
+while the memory held by the results of a form no longer grows with the conventions
+and warnings of its files.
+
+PylintResult:
+
+    __init__()      -- Initialize instance of the PylintResult class
+
+    errors()        -- Returns the messages of error category
+
+    to_dict()       -- Returns the result as a json serializable dictionary
+
+    from_dict()     -- Creates the result from a dictionary returned by to_dict()
+
+PylintOutputParser:
+
+    __init__()      -- Initialize instance of the PylintOutputParser class
+
+    feed()          -- Parses a single line of pylint output
+
+    result          -- PylintResult of the lines parsed so far
+
+SpoolingParser:
+
+    __init__()      -- Initialize instance of the SpoolingParser class
+
+    write()         -- Writes pylint output to the spool file and parses its complete lines
+
+    flush()         -- Flushes the spool file
+
+    close()         -- Parses the last line if it has no line break
+
+parse_pylint_output()   -- Parses complete pylint output into a PylintResult
+"""
+
+import re
+from collections import namedtuple
+from constants import STREAM_MAX_MESSAGES
+
+CATEGORIES = ('convention', 'refactor', 'warning', 'error')
+
+PylintMessage = namedtuple('PylintMessage', ['category', 'line', 'column', 'text'])
+
+MESSAGE_PATTERN = re.compile(r'^.+?:(\d+):(\d+): ([CRWEFI])\d{4}: (.*)$')
+OLD_MESSAGE_PATTERN = re.compile(r'^([CRWEFI]):\s*(\d+),\s*(\d+): (.*)$')
+CATEGORY_PATTERN = re.compile(r'^\|({0}) *\|(\d+)'.format('|'.join(CATEGORIES)))
+SCORE_PATTERN = re.compile(r'^Your code has been rated at (-?[\d.]+)/10'
+                           r'(?: \(previous run: (-?[\d.]+)/10)?')
+
+
+class PylintResult:
+    """Class holding the score, message counts and messages of a pylint run over a file."""
+
+    def __init__(self):
+        """ Initialize instances of the PylintResult class"""
+        self.score = None
+        self.previous_score = None
+        self.counts = dict.fromkeys(CATEGORIES, 0)
+        self.messages = []
+
+    def errors(self):
+        """ Returns the messages of error category"""
+        return [message for message in self.messages if message.category == 'E']
+
+    def to_dict(self):
+        """ Returns the result as a json serializable dictionary"""
+        return {'score': self.score,
+                'previous_score': self.previous_score,
+                'counts': dict(self.counts),
+                'messages': [list(message) for message in self.messages]}
+
+    @classmethod
+    def from_dict(cls, data):
+        """ Creates the result from a dictionary returned by to_dict()"""
+        result = cls()
+        result.score = data['score']
+        result.previous_score = data['previous_score']
+        result.counts.update(data['counts'])
+        result.messages = [PylintMessage(*message) for message in data['messages']]
+        return result
+
+
+class PylintOutputParser:
+    """Class for parsing pylint output line by line into a PylintResult."""
+
+    def __init__(self, max_messages=None):
+        """ Initialize instances of the PylintOutputParser class
+
+            Args:
+                max_messages(int)   -- Maximum number of messages of every category kept
+                                       in the result, the category counts are not
+                                       affected by it.
+        """
+        self.max_messages = max_messages
+        self.result = PylintResult()
+        self.__kept = {}
+
+    def feed(self, line):
+        """ Parses a single line of pylint output.
+
+            Args:
+                line(str)   -- Line of pylint output.
+        """
+        line = line.rstrip('\r\n')
+        if not line:
+            return
+        if line[0] == '|':
+            category = CATEGORY_PATTERN.match(line)
+            if category:
+                self.result.counts[category.group(1)] = int(category.group(2))
+        elif line.startswith('Your code has been rated'):
+            score = SCORE_PATTERN.match(line)
+            if score:
+                self.result.score = float(score.group(1))
+                if score.group(2) is not None:
+                    self.result.previous_score = float(score.group(2))
+        else:
+            message = MESSAGE_PATTERN.match(line)
+            if message:
+                self.__keep(PylintMessage(message.group(3), int(message.group(1)),
+                                          int(message.group(2)), message.group(4)))
+                return
+            message = OLD_MESSAGE_PATTERN.match(line)
+            if message:
+                self.__keep(PylintMessage(message.group(1), int(message.group(2)),
+                                          int(message.group(3)), message.group(4)))
+
+    def __keep(self, message):
+        """ Adds the message to the result unless max_messages of its category are
+            kept already"""
+        if self.max_messages is not None:
+            kept = self.__kept.get(message.category, 0)
+            if kept >= self.max_messages:
+                return
+            self.__kept[message.category] = kept + 1
+        self.result.messages.append(message)
+
+
+class SpoolingParser(PylintOutputParser):
+    """Class for parsing pylint output while writing it to a spool file, so the output
+    of a file is never held in memory as a whole. It can be used as the output stream
+    of a pylint reporter."""
+
+    def __init__(self, spool, max_messages=STREAM_MAX_MESSAGES):
+        """ Initialize instances of the SpoolingParser class
+
+            Args:
+                spool(object)       -- Text file the output is written to.
+
+                max_messages(int)   -- Maximum number of messages of every category
+                                       kept in the result.
+        """
+        super().__init__(max_messages)
+        self.spool = spool
+        self.__partial = ''
+
+    def write(self, text):
+        """ Writes pylint output to the spool file and parses its complete lines.
+
+            Args:
+                text(str)   -- Pylint output, lines may be split across the writes.
+        """
+        self.spool.write(text)
+        lines = (self.__partial + text).split('\n')
+        self.__partial = lines.pop()
+        for line in lines:
+            self.feed(line)
+
+    def flush(self):
+        """ Flushes the spool file"""
+        self.spool.flush()
+
+    def close(self):
+        """ Parses the last line of the output if it has no line break"""
+        if self.__partial:
+            self.feed(self.__partial)
+            self.__partial = ''
+
+
+def parse_pylint_output(output, max_messages=None):
+    """ Parses pylint output of a file into a PylintResult.
+
+        Args:
+            output(str)         -- Pylint output of a file run with -r y.
+
+            max_messages(int)   -- Maximum number of messages of every category kept
+                                   in the result.
+
+        Returns:
+            object - PylintResult of the output
+    """
+    parser = PylintOutputParser(max_messages)
+    for line in output.splitlines():
+        parser.feed(line)
+    return parser.result
@@ -0,0 +1,229 @@
+# -*- coding: utf-8 -*-
+
+# ------------------------------------------------------------------------------
+# Copyright Commvault Systems, Inc.
+# See LICENSE.txt in the project root for
+# license information.
+# ------------------------------------------------------------------------------
+
+r"""File for packing the pylint report files of a form into a single compressed archive.
+
+Every python file of a form gets a report file of its own under PATH\<formid>, with
+-r y these are hundreds of small text files per form, and creating small files is
+the most expensive operation on devshare. ReportArchive packs the reports of a form
+into a zip archive, PATH\<formid>\pylint_reports.zip:
+
+    a. the reports are deflate compressed into a local temporary archive while the
+       form is being linted
+
+    b. the complete archive is copied to devshare in one write and replaces the
+       archive of the previous build atomically
+
+    c. the central directory of the zip holds the offset of every report, so a
+       single report is read without reading the rest of the archive
+
+The email links to a report as <archive>\<report file name>, the path Windows
+Explorer opens inside the archive. The command line of this file shows, lists and
+extracts the reports of an archive given either path.
+
+ReportArchive:
+
+    __init__()  -- Initialize instance of the ReportArchive class
+
+    write()     -- Adds the text of a report to the archive
+
+    copy()      -- Adds the spool file holding a report to the archive
+
+    reuse()     -- Adds the report of the previous build of the form to the archive
+
+    close()     -- Publishes the archive to its location on devshare
+
+split_report_path() -- Splits the path of a report inside an archive
+
+read_report()       -- Returns the content of a report of an archive
+
+    Usage:
+
+    Print a report linked from the email:
+    >>python report_archive.py show \\devshare\...\50888\pylint_reports.zip\machine_pylint.txt
+
+    List the reports of a form, given its archive or its folder:
+    >>python report_archive.py list \\devshare\...\50888
+
+    Extract all the reports of a form to a folder:
+    >>python report_archive.py extract \\devshare\...\50888\pylint_reports.zip -out D:\reports
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import zipfile
+from constants import REPORT_ARCHIVE_NAME
+
+
+def split_report_path(path):
+    r""" Splits the path of a report inside an archive, ex. ...\50888\pylint_reports.zip\
+        machine_pylint.txt, into the archive and the report name.
+
+        Args:
+            path(str)   -- Path of an archive or of a report inside an archive.
+
+        Returns:
+            tuple - (archive file, report name), the report name is None for an archive
+    """
+    normalized = path.replace('\\', '/')
+    position = normalized.lower().find('.zip/')
+    if position < 0:
+        return path, None
+    return path[:position + len('.zip')], normalized[position + len('.zip/'):]
+
+
+def read_report(archive_file, name):
+    """ Returns the content of a report of an archive, only the report is read through
+        the offset in the central directory.
+
+        Args:
+            archive_file(str)   -- Report archive of a form.
+
+            name(str)           -- Report file name, ex. machine_pylint.txt.
+
+        Returns:
+            str - Content of the report
+    """
+    with zipfile.ZipFile(archive_file) as archive:
+        return archive.read(name).decode('utf-8')
+
+
+class ReportArchive:
+    """Class for packing the report files of a form into a zip archive."""
+
+    def __init__(self, archive_file, logger):
+        """ Initialize instances of the ReportArchive class
+
+            Args:
+                archive_file(str)   -- Archive of the form on devshare.
+
+                logger(object)      -- Logger object of the current run.
+        """
+        self.archive_file = archive_file
+        self.logger = logger
+        self.count = 0
+        handle, self.local_file = tempfile.mkstemp(prefix="cvemail_reports_", suffix=".zip")
+        os.close(handle)
+        self.__archive = zipfile.ZipFile(self.local_file, 'w', zipfile.ZIP_DEFLATED)
+        self.__previous = None
+
+    def write(self, name, text):
+        """ Adds the text of a report to the archive.
+
+            Args:
+                name(str)   -- Report file name.
+
+                text(str)   -- Content of the report.
+        """
+        self.__archive.writestr(name, text.encode('utf-8'))
+        self.count += 1
+
+    def copy(self, name, spool_file):
+        """ Adds the local spool file holding the content of a report to the archive.
+
+            Args:
+                name(str)       -- Report file name.
+
+                spool_file(str) -- Local file holding the content of the report.
+        """
+        self.__archive.write(spool_file, name)
+        self.count += 1
+
+    def reuse(self, name):
+        """ Adds the report of the previous build of the form to the archive, from its
+            archive or from the report file of a build which was not archived.
+
+            Args:
+                name(str)   -- Report file name.
+
+            Returns:
+                bool - True if the report of the previous build was found
+        """
+        if self.__previous is None and os.path.exists(self.archive_file):
+            self.__previous = zipfile.ZipFile(self.archive_file)
+        if self.__previous is not None and name in self.__previous.NameToInfo:
+            with self.__previous.open(name) as report, \
+                    self.__archive.open(name, 'w') as member:
+                shutil.copyfileobj(report, member)
+            self.count += 1
+            return True
+        report_file = os.path.join(os.path.dirname(self.archive_file), name)
+        if os.path.exists(report_file):
+            self.copy(name, report_file)
+            return True
+        return False
+
+    def close(self, publish=True):
+        """ Completes the archive and copies it to devshare in one write, the archive of
+            the previous build is replaced only once the copy is complete.
+
+            Args:
+                publish(bool)   -- False drops the archive of a failed run, the archive
+                                   of the previous build is kept.
+        """
+        try:
+            self.__archive.close()
+            if self.__previous is not None:
+                self.__previous.close()
+            if not publish:
+                return
+            temp_file = "{0}.{1}.{2}.tmp".format(self.archive_file, os.getpid(),
+                                                 threading.get_ident())
+            shutil.copyfile(self.local_file, temp_file)
+            os.replace(temp_file, self.archive_file)
+            self.logger.info("Wrote %s pylint reports in archive %s, %s bytes", self.count,
+                             self.archive_file, os.path.getsize(self.local_file))
+        finally:
+            os.remove(self.local_file)
+
+
+def main():
+    """ Shows, lists or extracts the reports of an archive as per the command line"""
+    parser = argparse.ArgumentParser()
+    commands = parser.add_subparsers(dest='Command')
+    show = commands.add_parser('show', help='Print a report of an archive')
+    show.add_argument('Path', help='Path of the report inside the archive, as linked in '
+                      'the email, or the archive')
+    show.add_argument('Name', help='Report file name if the archive is given', nargs='?')
+    listing = commands.add_parser('list', help='List the reports of an archive')
+    listing.add_argument('Path', help='Report archive or folder of a form')
+    extract = commands.add_parser('extract', help='Extract the reports of an archive')
+    extract.add_argument('Path', help='Report archive or folder of a form, or the path of a report '
+                         'inside it to extract only that report')
+    extract.add_argument('-out', help='Folder the reports are extracted to', dest='Out',
+                         default='.')
+    arguments = parser.parse_args()
+    if arguments.Command is None:
+        parser.print_help()
+        return
+    archive_file, name = split_report_path(arguments.Path)
+    if os.path.isdir(archive_file):
+        archive_file = os.path.join(archive_file, REPORT_ARCHIVE_NAME)
+    if arguments.Command == 'show':
+        name = name or arguments.Name
+        if name is None:
+            parser.error("show requires the report file name")
+        sys.stdout.write(read_report(archive_file, name))
+        return
+    with zipfile.ZipFile(archive_file) as archive:
+        if arguments.Command == 'list':
+            for info in archive.infolist():
+                print("{0:>10} {1:>10}  {2}".format(info.file_size, info.compress_size,
+                                                    info.filename))
+        else:
+            names = [name] if name else archive.namelist()
+            for member in names:
+                print("Extracted", archive.extract(member, arguments.Out))
+
+
+if __name__ == "__main__":
+    main()
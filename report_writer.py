@@ -0,0 +1,177 @@
+# -*- coding: utf-8 -*-
+
+# ------------------------------------------------------------------------------
+# Copyright Commvault Systems, Inc.
+# See LICENSE.txt in the project root for
+# license information.
+# ------------------------------------------------------------------------------
+
+"""File for writing the pylint report files to devshare off the critical path.
+
+Writing every report file over SMB while the html message is built makes the run
+wait on the share for every file. ReportWriter hands the writes to a background
+thread, which drains all the reports queued so far in one batch, so parsing the
+output and building the message continue while the files are being written.
+The reports packed into the archive of the form are compressed by the same thread.
+
+ReportWriter:
+
+    __init__()  -- Initialize instance of the ReportWriter class and starts the writer thread
+
+    write()     -- Queues the text to be written to given report file
+
+    copy()      -- Queues the spool file to be copied to given report file
+
+    add()       -- Queues the report to be added to a ReportArchive of the form
+
+    reuse()     -- Queues the report of the previous build to be added to a ReportArchive
+
+    close()     -- Waits till all the queued reports are written and stops the writer thread
+"""
+
+import queue
+import shutil
+import threading
+import zipfile
+from timing import timed
+
+
+class ReportWriter:
+    """Class for writing report files through a background thread."""
+
+    def __init__(self, logger, timer=None):
+        """ Initialize instances of the ReportWriter class
+
+            Args:
+                logger(object)  -- Logger object of the current run.
+
+                timer(object)   -- StageTimer of the run timing the writes.
+        """
+        self.logger = logger
+        self.timer = timer
+        self.failed = []
+        self.__queue = queue.Queue()
+        self.__thread = threading.Thread(target=self.__run, name="ReportWriter", daemon=True)
+        self.__thread.start()
+
+    def write(self, report_file, text):
+        """ Queues the text to be written to given report file.
+
+            Args:
+                report_file(str)    -- Path of the report file.
+
+                text(str)           -- Content of the report file.
+        """
+        self.__queue.put((report_file, self.__write, text))
+
+    def copy(self, report_file, spool_file):
+        """ Queues the spool file holding the report to be copied to given report file.
+
+            Args:
+                report_file(str)    -- Path of the report file.
+
+                spool_file(str)     -- Local file holding the content of the report.
+        """
+        self.__queue.put((report_file, self.__copy, spool_file))
+
+    def add(self, archive, name, text=None, spool_file=None):
+        """ Queues the report to be added to given report archive, from its text or from
+            the spool file holding it.
+
+            Args:
+                archive(object)     -- ReportArchive of the form.
+
+                name(str)           -- Report file name.
+
+                text(str)           -- Content of the report.
+
+                spool_file(str)     -- Local file holding the content of the report.
+        """
+        self.__queue.put((name, self.__add, archive, text, spool_file))
+
+    def reuse(self, archive, name):
+        """ Queues the report of the previous build of the form to be added to given
+            report archive.
+
+            Args:
+                archive(object)     -- ReportArchive of the form.
+
+                name(str)           -- Report file name.
+        """
+        self.__queue.put((name, self.__reuse, archive))
+
+    def close(self):
+        """ Waits till all the queued reports are written and stops the writer thread.
+
+            Returns:
+                list - Report files which could not be written
+        """
+        self.__queue.put(None)
+        self.__thread.join()
+        return self.failed
+
+    def __run(self):
+        """ Writes the queued reports batch by batch till close() is called, a report
+            failing with any error is recorded as failed and the thread goes on with
+            the following reports"""
+        while True:
+            batch = [self.__queue.get()]
+            while not self.__queue.empty():
+                batch.append(self.__queue.get())
+            for item in batch:
+                if item is None:
+                    return
+                report, function = item[0], item[1]
+                try:
+                    function(report, *item[2:])
+                except Exception as report_excep:
+                    self.logger.error("Failed to write pylint output %s with error: %s",
+                                      report, report_excep)
+                    self.failed.append(report)
+
+    @timed("write_report")
+    def __write(self, report_file, text):
+        """ Writes the text to given report file"""
+        try:
+            with open(report_file, "w", encoding='utf-8') as text_file:
+                text_file.write(text)
+            self.logger.info("Wrote Pylint output in text file as %s", report_file)
+        except OSError as write_excep:
+            self.logger.error("Failed to write pylint output file %s with error: %s",
+                              report_file, write_excep)
+            self.failed.append(report_file)
+
+    @timed("write_report")
+    def __copy(self, report_file, spool_file):
+        """ Copies the spool file to given report file"""
+        try:
+            shutil.copyfile(spool_file, report_file)
+            self.logger.info("Wrote Pylint output in text file as %s", report_file)
+        except OSError as copy_excep:
+            self.logger.error("Failed to write pylint output file %s with error: %s",
+                              report_file, copy_excep)
+            self.failed.append(report_file)
+
+    @timed("write_report")
+    def __add(self, name, archive, text, spool_file):
+        """ Adds the report to given report archive"""
+        try:
+            if spool_file is not None:
+                archive.copy(name, spool_file)
+            else:
+                archive.write(name, text)
+        except (OSError, ValueError) as add_excep:
+            self.logger.error("Failed to add pylint output %s to archive with error: %s",
+                              name, add_excep)
+            self.failed.append(name)
+
+    def __reuse(self, name, archive):
+        """ Adds the report of the previous build to given report archive"""
+        try:
+            if not archive.reuse(name):
+                self.logger.error("Pylint output %s of the previous build not found", name)
+                self.failed.append(name)
+        except (OSError, ValueError, zipfile.BadZipFile) as reuse_excep:
+            self.logger.error("Failed to reuse pylint output %s with error: %s",
+                              name, reuse_excep)
+            self.failed.append(name)
@@ -0,0 +1,233 @@
+# -*- coding: utf-8 -*-
+
+# ------------------------------------------------------------------------------
+# Copyright Commvault Systems, Inc.
+# See LICENSE.txt in the project root for
+# license information.
+# ------------------------------------------------------------------------------
+
+"""File for caching the pylint output of python files across the builds of a form.
+
+A form is usually rebuilt under a new buildid with most of its files unchanged.
+ResultCache keeps the pylint output of every linted file on the local disk, keyed by
+the content hash of the file, its name, the pylint version and the hash of the pylint
+rcfile, so an unchanged file is not linted again.
+
+Every entry is stored as two files in the cache directory:
+
+    <key>.txt   -- raw pylint output of the file
+
+    <key>.json  -- path the file was linted under and the parsed PylintResult
+
+ResultCache:
+
+    __init__()      -- Initialize instance of the ResultCache class
+
+    get()           -- Returns the cached entry of given python file if present
+
+    put()           -- Stores the pylint output of given python file in the cache
+
+    evict()         -- Removes the entries older than the age limit and the least
+                       recently used entries above the size limit
+
+    log_stats()     -- Logs the hit and miss counts of the current run
+
+content_hash()      -- Returns the sha256 hash of the content of a file
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import time
+from constants import CACHE_PATH
+from constants import CACHE_MAX_AGE_DAYS
+from constants import CACHE_MAX_SIZE_MB
+from pylint_parser import PylintResult
+
+# hash of pylint version and rcfile per rcfile, determined once per process
+LINT_KEYS = {}
+
+
+def content_hash(path):
+    """ Returns the sha256 hex digest of the content of given file"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as source:
+        digest.update(source.read())
+    return digest.hexdigest()
+
+
+class ResultCache:
+    """Class for the on disk cache of pylint output keyed by file content."""
+
+    def __init__(self, logger, cache_dir=CACHE_PATH, rcfile=None,
+                 max_size_mb=CACHE_MAX_SIZE_MB, max_age_days=CACHE_MAX_AGE_DAYS):
+        """ Initialize instances of the ResultCache class
+
+            Args:
+                logger(object)      -- Logger object of the current run.
+
+                cache_dir(str)      -- Directory where the cache entries are stored.
+
+                rcfile(str)         -- Pylint rcfile used for the run, determined the
+                                       same way as pylint does if not given.
+
+                max_size_mb(int)    -- Size limit of the cache directory in MB.
+
+                max_age_days(int)   -- Entries not used for more days are removed.
+        """
+        self.logger = logger
+        self.cache_dir = cache_dir
+        self.max_size = max_size_mb * 1024 * 1024
+        self.max_age = max_age_days * 24 * 60 * 60
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self.lint_key = self.__lint_key(rcfile)
+
+    def __lint_key(self, rcfile):
+        """ Returns the hash of the pylint version and the rcfile content"""
+        rcfile = rcfile or self.__find_rcfile()
+        if rcfile not in LINT_KEYS:
+            LINT_KEYS[rcfile] = self.__compute_lint_key(rcfile)
+        return LINT_KEYS[rcfile]
+
+    def __compute_lint_key(self, rcfile):
+        """ Computes the hash of the pylint version and the rcfile content"""
+        digest = hashlib.sha256()
+        try:
+            version = subprocess.run(['pylint', '--version'], stdout=subprocess.PIPE,
+                                     check=False)
+            digest.update(version.stdout)
+        except OSError as version_excep:
+            self.logger.error("Failed to determine pylint version: %s", version_excep)
+        if rcfile:
+            with open(rcfile, 'rb') as rc_content:
+                digest.update(rc_content.read())
+        return digest.hexdigest()
+
+    @staticmethod
+    def __find_rcfile():
+        """ Returns the rcfile pylint picks up when no --rcfile is passed"""
+        candidates = [os.environ.get('PYLINTRC', ''), 'pylintrc', '.pylintrc',
+                      os.path.join(os.path.expanduser('~'), '.pylintrc'),
+                      os.path.join(os.path.expanduser('~'), '.config', 'pylintrc')]
+        for candidate in candidates:
+            if candidate and os.path.isfile(candidate):
+                return candidate
+        return None
+
+    def __key(self, path):
+        """ Returns the cache key of given python file"""
+        digest = hashlib.sha256(content_hash(path).encode())
+        digest.update(os.path.basename(path).encode())
+        digest.update(self.lint_key.encode())
+        return digest.hexdigest()
+
+    def get(self, path, spool_file=None):
+        """ Returns the cached entry of given python file.
+
+            Args:
+                path(str)       -- Python file to be looked up.
+
+                spool_file(str) -- File the cached output is written to instead of
+                                   being returned.
+
+            Returns:
+                dict - output, or the spool file holding it, and parsed result of
+                       the file, None on a cache miss
+        """
+        try:
+            key = self.__key(path)
+            entry_path = os.path.join(self.cache_dir, key)
+            with open(entry_path + '.json') as meta_file:
+                entry = json.load(meta_file)
+            with open(entry_path + '.txt', encoding='utf-8') as output_file:
+                # messages in the output carry the path the file was linted under
+                if spool_file is None:
+                    entry['output'] = output_file.read().replace(entry['path'], path)
+                else:
+                    with open(spool_file, 'w', encoding='utf-8') as spool:
+                        for line in output_file:
+                            spool.write(line.replace(entry['path'], path))
+                    entry['output'] = spool_file
+        except (OSError, ValueError):
+            self.misses += 1
+            return None
+        now = time.time()
+        try:
+            os.utime(entry_path + '.json', (now, now))
+        except OSError:
+            # evicted by another run meanwhile, the entry read is still valid
+            pass
+        entry['result'] = PylintResult.from_dict(entry['result'])
+        self.hits += 1
+        return entry
+
+    def put(self, path, output, result, output_file=None):
+        """ Stores pylint output of given python file in the cache.
+
+            Args:
+                path(str)           -- Python file which was linted.
+
+                output(str)         -- Pylint output of the file.
+
+                result(object)      -- PylintResult parsed from the output.
+
+                output_file(str)    -- Spool file holding the output, copied to the
+                                       cache instead of the output text.
+        """
+        try:
+            entry_path = os.path.join(self.cache_dir, self.__key(path))
+            entry = {'path': path, 'result': result.to_dict()}
+            if output_file is None:
+                with open(entry_path + '.txt', 'w', encoding='utf-8') as cached_output:
+                    cached_output.write(output)
+            else:
+                shutil.copyfile(output_file, entry_path + '.txt')
+            with open(entry_path + '.json', 'w') as meta_file:
+                json.dump(entry, meta_file)
+        except OSError as cache_excep:
+            self.logger.error("Failed to cache pylint output of %s: %s", path, cache_excep)
+
+    def evict(self):
+        """ Removes the entries not used within the age limit, then the least
+            recently used entries till the cache fits in the size limit."""
+        entries = []
+        with os.scandir(self.cache_dir) as cache_entries:
+            for entry in cache_entries:
+                if not entry.name.endswith('.json'):
+                    continue
+                key = entry.name[:-len('.json')]
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    # evicted by another run sharing the cache meanwhile
+                    continue
+                try:
+                    size = stat.st_size + os.path.getsize(
+                        os.path.join(self.cache_dir, key + '.txt'))
+                except OSError:
+                    size = stat.st_size
+                entries.append((stat.st_mtime, size, key))
+        entries.sort()
+        total_size = sum(size for _, size, _ in entries)
+        cutoff = time.time() - self.max_age
+        evicted = 0
+        for used, size, key in entries:
+            if used >= cutoff and total_size <= self.max_size:
+                break
+            for extension in ('.json', '.txt'):
+                try:
+                    os.remove(os.path.join(self.cache_dir, key + extension))
+                except OSError:
+                    pass
+            total_size -= size
+            evicted += 1
+        if evicted:
+            self.logger.info("Evicted %s entries from pylint result cache", evicted)
+
+    def log_stats(self):
+        """ Logs the cache hits and misses of the current run"""
+        self.logger.info("Pylint result cache hits: %s, misses: %s", self.hits, self.misses)
@@ -0,0 +1,241 @@
+# -*- coding: utf-8 -*-
+
+# ------------------------------------------------------------------------------
+# Copyright Commvault Systems, Inc.
+# See LICENSE.txt in the project root for
+# license information.
+# ------------------------------------------------------------------------------
+
+r"""File for keeping the history of the pylint results of every file in a SQLite store.
+
+The report files under PATH\<formid> are the only record of the earlier runs, the
+score of a file in the previous build can not be found without reading the reports.
+ResultStore keeps a row per file of every form build in a SQLite database on the local
+disk, with the content hash, score, message counts, messages and lint duration of the
+file. The rows of a form build are inserted in a single transaction.
+
+Files are identified across builds by their source name, the module name for the
+Automation and cvpysdk trees, ex. AutomationUtils.machine, so the rows of different
+mount paths are compared.
+
+The previous score of every file is shown in the email of the form, and the history
+can be queried from the command line.
+
+ResultStore:
+
+    __init__()          -- Initialize instance of the ResultStore class
+
+    record()            -- Inserts the results of a form build
+
+    previous_scores()   -- Returns the latest score of given files in an earlier build
+
+    history()           -- Returns the results of a file across the builds
+
+    regressions()       -- Returns the files whose score dropped since their previous build
+
+source_name()           -- Returns the name identifying a python file across mount paths
+
+    Usage:
+
+    Score history of a file:
+    >>python result_store.py history AutomationUtils.machine -limit 10
+
+    Files whose score dropped by more than 0.5 in the last 7 days:
+    >>python result_store.py regressions -days 7 -threshold 0.5
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import time
+from constants import RESULT_STORE_PATH
+from import_graph import module_name
+
+SCHEMA = (
+    "create table if not exists results ("
+    "formid text not null, buildid text, path text not null, source text not null, "
+    "hash text, score real, convention integer, refactor integer, warning integer, "
+    "error integer, messages text, seconds real, reused_build text, linted_at real not null);"
+    "create index if not exists results_source on results (source, linted_at);"
+    "create index if not exists results_form on results (formid, buildid);"
+    "create index if not exists results_time on results (linted_at);")
+
+PREVIOUS_QUERY = (
+    "select score from results where source = ? and buildid != ? and score is not null "
+    "order by linted_at desc limit 1")
+
+REGRESSIONS_QUERY = (
+    "select * from (select current.formid, current.buildid, current.source, "
+    "current.score, (select previous.score from results previous where "
+    "previous.source = current.source and previous.buildid != current.buildid and "
+    "previous.linted_at < current.linted_at and previous.score is not null "
+    "order by previous.linted_at desc limit 1) as previous_score, current.linted_at "
+    "from results current where current.linted_at >= ? and current.score is not null "
+    "and current.reused_build is null) "
+    "where previous_score - score > ? order by previous_score - score desc")
+
+
+def source_name(path):
+    """ Returns the name identifying a python file across mount paths, the module name
+        for the Automation and cvpysdk trees and the normalized path otherwise"""
+    return module_name(path) or path.replace('\\', '/')
+
+
+class ResultStore:
+    """Class for the SQLite store of the pylint results of every form build."""
+
+    def __init__(self, db_file=RESULT_STORE_PATH, timeout=30):
+        """ Initialize instances of the ResultStore class
+
+            Args:
+                db_file(str)    -- SQLite database file of the store.
+
+                timeout(int)    -- Seconds to wait for the runs writing to the store
+                                   at the same time.
+        """
+        self.db_file = db_file
+        self.timeout = timeout
+
+    def __connect(self):
+        """ Opens a connection to the store and creates its tables if not present"""
+        os.makedirs(os.path.dirname(self.db_file), exist_ok=True)
+        connection = sqlite3.connect(self.db_file, timeout=self.timeout)
+        # readers do not wait for the runs writing their results
+        connection.execute("pragma journal_mode=wal")
+        connection.executescript(SCHEMA)
+        return connection
+
+    def record(self, formid, buildid, results):
+        """ Inserts the results of a form build in a single transaction.
+
+            Args:
+                formid(str)     -- Form id of the run.
+
+                buildid(str)    -- Build id of the run.
+
+                results(list)   -- (path, content hash, PylintResult, lint seconds,
+                                   build the result is reused from) of every file.
+        """
+        linted_at = time.time()
+        rows = []
+        for path, digest, result, seconds, reused_build in results:
+            if result is None:
+                continue
+            rows.append((formid, buildid, path, source_name(path), digest, result.score,
+                         result.counts['convention'], result.counts['refactor'],
+                         result.counts['warning'], result.counts['error'],
+                         json.dumps([list(message) for message in result.messages]),
+                         seconds, reused_build, linted_at))
+        connection = self.__connect()
+        try:
+            with connection:
+                connection.executemany("insert into results values (?, ?, ?, ?, ?, ?, ?, ?, "
+                                       "?, ?, ?, ?, ?, ?)", rows)
+        finally:
+            connection.close()
+
+    def previous_scores(self, paths, buildid):
+        """ Returns the latest score of given files in a build other than given build.
+
+            Args:
+                paths(list)     -- Python files of the form.
+
+                buildid(str)    -- Build id of the current run.
+
+            Returns:
+                dict - path to its previous score, files never scored before are left out
+        """
+        scores = {}
+        connection = self.__connect()
+        try:
+            for path in paths:
+                row = connection.execute(PREVIOUS_QUERY, (source_name(path), buildid)).fetchone()
+                if row:
+                    scores[path] = row[0]
+        finally:
+            connection.close()
+        return scores
+
+    def history(self, source, limit=20):
+        """ Returns the results of a file across the builds, latest first.
+
+            Args:
+                source(str)     -- Source name or path of the file.
+
+                limit(int)      -- Maximum number of results returned.
+
+            Returns:
+                list - (formid, buildid, score, error count, seconds, reused build, linted at)
+        """
+        connection = self.__connect()
+        try:
+            return connection.execute(
+                "select formid, buildid, score, error, seconds, reused_build, linted_at "
+                "from results where source = ? order by linted_at desc limit ?",
+                (source_name(source), limit)).fetchall()
+        finally:
+            connection.close()
+
+    def regressions(self, days=7, threshold=0.0):
+        """ Returns the files linted in the last days whose score dropped since the
+            previous build they were linted for.
+
+            Args:
+                days(float)         -- Number of days to look back.
+
+                threshold(float)    -- Minimum drop of the score reported.
+
+            Returns:
+                list - (formid, buildid, source, score, previous score, linted at),
+                       largest drop first
+        """
+        connection = self.__connect()
+        try:
+            return connection.execute(REGRESSIONS_QUERY,
+                                      (time.time() - days * 24 * 60 * 60,
+                                       threshold)).fetchall()
+        finally:
+            connection.close()
+
+
+def main():
+    """ Prints the score history of a file or the regressions as per the command line"""
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-store', help='SQLite database file of the store', dest='Store',
+                        default=RESULT_STORE_PATH)
+    commands = parser.add_subparsers(dest='Command')
+    history = commands.add_parser('history', help='Score history of a file')
+    history.add_argument('Source', help='Module name or path of the file')
+    history.add_argument('-limit', help='Number of builds shown', dest='Limit', type=int,
+                         default=20)
+    regressions = commands.add_parser('regressions', help='Files whose score dropped')
+    regressions.add_argument('-days', help='Number of days to look back', dest='Days',
+                             type=float, default=7)
+    regressions.add_argument('-threshold', help='Minimum drop of the score', dest='Threshold',
+                             type=float, default=0.0)
+    arguments = parser.parse_args()
+    store = ResultStore(arguments.Store)
+    if arguments.Command == 'history':
+        print("{0:<8} {1:<10} {2:>6} {3:>6} {4:>8}  {5}".format(
+            "formid", "buildid", "score", "errors", "seconds", "linted at"))
+        for formid, buildid, score, errors, seconds, reused_build, linted_at in store.history(
+                arguments.Source, arguments.Limit):
+            print("{0:<8} {1:<10} {2:>6} {3:>6} {4:>8}  {5}{6}".format(
+                formid, buildid, "-" if score is None else "{0:.2f}".format(score), errors,
+                "-" if seconds is None else "{0:.2f}".format(seconds),
+                time.strftime("%Y-%m-%d %H:%M", time.localtime(linted_at)),
+                " (reused from build {0})".format(reused_build) if reused_build else ""))
+    elif arguments.Command == 'regressions':
+        print("{0:<8} {1:<10} {2:>6} {3:>9}  {4}".format(
+            "formid", "buildid", "score", "previous", "file"))
+        for formid, buildid, source, score, previous, _ in store.regressions(
+                arguments.Days, arguments.Threshold):
+            print("{0:<8} {1:<10} {2:>6.2f} {3:>9.2f}  {4}".format(
+                formid, buildid, score, previous, source))
+    else:
+        parser.print_help()
+
+
+if __name__ == "__main__":
+    main()
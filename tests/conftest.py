@@ -0,0 +1,21 @@
+# -*- coding: utf-8 -*-
+
+# ------------------------------------------------------------------------------
+# Copyright Commvault Systems, Inc.
+# See LICENSE.txt in the project root for
+# license information.
+# ------------------------------------------------------------------------------
+
+"""Configuration of the tests of CVEmailPylint package.
+
+The modules of the package import each other by their file names, hence the
+project root is put on the path before the tests import them. The state of the
+runs, ex. the caches, is kept in a temporary folder of the test session.
+"""
+
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("CVEMAIL_PYLINT_HOME", tempfile.mkdtemp(prefix="cvemail_tests_"))
@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+
+# ------------------------------------------------------------------------------
+# Copyright Commvault Systems, Inc.
+# See LICENSE.txt in the project root for
+# license information.
+# ------------------------------------------------------------------------------
+
+"""Tests of BuildBatch reporting the forms of a build which failed."""
+
+import pytest
+
+pytest.importorskip("pyodbc")
+
+import build_batch  # pylint: disable=wrong-import-position
+
+
+class FakeHelper:
+    """UCHelper standing in for the form runs, fails the forms it is told to."""
+
+    failing = {}
+
+    def __init__(self, *args):
+        self.args = args
+
+    def execute(self, args):
+        """ Fails the run of the form by returning False or by raising"""
+        failure = self.failing.get(args[1])
+        if failure == "raise":
+            raise RuntimeError("form run crashed")
+        return failure is None
+
+
+@pytest.fixture
+def batch(monkeypatch):
+    """ Batch of three forms run through FakeHelper"""
+    monkeypatch.setattr(build_batch, "UCHelper", FakeHelper)
+    build = build_batch.BuildBatch("1100080", "/mount", ["50888", "50890", "50892"])
+    monkeypatch.setattr(build, "get_form_files",
+                        lambda: {"50888": [], "50890": [], "50892": []})
+    return build
+
+
+def test_batch_completes_when_all_forms_complete(batch):
+    """ The batch completes when every form completes"""
+    FakeHelper.failing = {}
+    assert batch.execute()
+
+
+def test_failed_forms_fail_the_batch(batch, capsys):
+    """ A form returning False or raising fails the batch and is printed"""
+    FakeHelper.failing = {"50890": "fail", "50892": "raise"}
+    assert not batch.execute()
+    output = capsys.readouterr().out
+    assert "Form 50890 failed" in output
+    assert "Form 50892 failed with error: form run crashed" in output
+    assert "Forms failed: ['50890', '50892']" in output
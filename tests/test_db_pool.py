@@ -0,0 +1,168 @@
+# -*- coding: utf-8 -*-
+
+# ------------------------------------------------------------------------------
+# Copyright Commvault Systems, Inc.
+# See LICENSE.txt in the project root for
+# license information.
+# ------------------------------------------------------------------------------
+
+"""Tests of ConnectionPool with SQLite standing in for UpdateCenter."""
+
+import functools
+import sqlite3
+import threading
+import time
+import pytest
+from db_pool import ConnectionPool
+
+
+class CountingConnect:
+    """Opens SQLite connections to given database and counts them."""
+
+    def __init__(self, db_file):
+        self.connect = functools.partial(sqlite3.connect, db_file, check_same_thread=False)
+        self.opened = []
+        self.lock = threading.Lock()
+
+    def __call__(self):
+        conn = self.connect()
+        with self.lock:
+            self.opened.append(conn)
+        return conn
+
+
+@pytest.fixture
+def db_file(tmp_path):
+    """ SQLite database with a MapFormToSourceFiles table"""
+    db_file = str(tmp_path / "uc.db")
+    conn = sqlite3.connect(db_file)
+    conn.executescript("create table MapFormToSourceFiles(nFormID integer, nBuildID integer, "
+                       "sSourceFileName text);"
+                       "insert into MapFormToSourceFiles values "
+                       "(5, 9, 'vaultcx/Source/tools/Automation/a.py');")
+    conn.commit()
+    conn.close()
+    return db_file
+
+
+def is_closed(conn):
+    """ Checks whether the SQLite connection was closed"""
+    try:
+        conn.execute("select 1")
+    except sqlite3.ProgrammingError:
+        return True
+    return False
+
+
+def test_connection_is_reused(db_file):
+    """ Connections return to the pool and are handed out to the following queries"""
+    connect = CountingConnect(db_file)
+    pool = ConnectionPool(connect)
+    for _ in range(3):
+        with pool.connection() as conn:
+            rows = conn.execute("select sSourceFileName from MapFormToSourceFiles where "
+                                "nFormID = ?", (5,)).fetchall()
+            assert rows == [('vaultcx/Source/tools/Automation/a.py',)]
+    assert len(connect.opened) == 1
+    pool.close()
+    assert is_closed(connect.opened[0])
+
+
+def test_connection_closed_on_error(db_file):
+    """ A connection whose block raised is closed instead of returned to the pool"""
+    connect = CountingConnect(db_file)
+    pool = ConnectionPool(connect, max_size=1)
+    with pytest.raises(sqlite3.OperationalError):
+        with pool.connection() as conn:
+            conn.execute("select * from missing_table")
+    assert is_closed(connect.opened[0])
+    with pool.connection() as conn:
+        assert conn is not connect.opened[0]
+    assert len(connect.opened) == 2
+
+
+def test_base_exception_releases_slot(db_file):
+    """ KeyboardInterrupt in the block closes the connection and frees its slot"""
+    connect = CountingConnect(db_file)
+    pool = ConnectionPool(connect, max_size=1)
+    with pytest.raises(KeyboardInterrupt):
+        with pool.connection():
+            raise KeyboardInterrupt()
+    assert is_closed(connect.opened[0])
+
+    acquired = threading.Event()
+
+    def query():
+        with pool.connection() as conn:
+            conn.execute("select 1")
+            acquired.set()
+
+    thread = threading.Thread(target=query, daemon=True)
+    thread.start()
+    assert acquired.wait(5), "slot of the interrupted block was not released"
+    thread.join(5)
+
+
+def test_failed_connect_releases_slot():
+    """ A connect failure does not hold a slot of the pool"""
+    def connect():
+        raise sqlite3.OperationalError("unable to open database file")
+
+    pool = ConnectionPool(connect, max_size=1)
+    for _ in range(2):
+        with pytest.raises(sqlite3.OperationalError):
+            with pool.connection():
+                pass
+
+
+def test_max_size_bounds_open_connections(db_file):
+    """ At most max_size connections are handed out at a time"""
+    connect = CountingConnect(db_file)
+    pool = ConnectionPool(connect, max_size=2)
+    in_use = []
+    peak = []
+    lock = threading.Lock()
+
+    def query():
+        with pool.connection() as conn:
+            with lock:
+                in_use.append(conn)
+                peak.append(len(in_use))
+            time.sleep(0.05)
+            conn.execute("select 1")
+            with lock:
+                in_use.remove(conn)
+
+    threads = [threading.Thread(target=query) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+    assert max(peak) <= 2
+    assert len(connect.opened) <= 2
+    pool.close()
+
+
+def test_broken_idle_connection_is_replaced(db_file):
+    """ An idle connection which does not answer any more is closed and replaced"""
+    connect = CountingConnect(db_file)
+    pool = ConnectionPool(connect, ping_seconds=0)
+    with pool.connection() as conn:
+        conn.execute("select 1")
+    # dropped by the server while idle
+    connect.opened[0].close()
+    with pool.connection() as conn:
+        assert conn.execute("select count(*) from MapFormToSourceFiles").fetchone() == (1,)
+    assert len(connect.opened) == 2
+    pool.close()
+
+
+def test_alive_idle_connection_is_reused(db_file):
+    """ An idle connection answering the check is handed out again"""
+    connect = CountingConnect(db_file)
+    pool = ConnectionPool(connect, ping_seconds=0)
+    for _ in range(3):
+        with pool.connection() as conn:
+            conn.execute("select 1")
+    assert len(connect.opened) == 1
+    pool.close()
@@ -0,0 +1,40 @@
+# -*- coding: utf-8 -*-
+
+# ------------------------------------------------------------------------------
+# Copyright Commvault Systems, Inc.
+# See LICENSE.txt in the project root for
+# license information.
+# ------------------------------------------------------------------------------
+
+"""Tests of HtmlReport rendering the rows of the files of a form."""
+
+from html_report import HtmlReport
+from pylint_parser import parse_pylint_output
+
+PYLINT_OUTPUT = ("************* Module machine\n"
+                 "machine.py:1:0: C0114: Missing module docstring (missing-module-docstring)\n"
+                 "Your code has been rated at 9.00/10\n")
+
+
+def test_missing_file_has_no_link():
+    """ A file missing on the mount path is reported as not existing, without a link
+        to a report file or the note of an unwritten report"""
+    report = HtmlReport()
+    report.add_file("Automation/missing.py", None, None)
+    page = report.render()
+    assert "Given python file does not exist" in page
+    assert "<a href" not in page
+    assert "could not be written" not in page
+
+
+def test_unwritten_report_is_noted():
+    """ The link to a report file which could not be written is replaced by a note"""
+    report = HtmlReport()
+    report.add_file("Automation/machine.py", parse_pylint_output(PYLINT_OUTPUT),
+                    r"\\devshare\50888\machine_pylint.txt")
+    report.add_file("Automation/missing.py", None, None)
+    assert report.drop_links([r"\\devshare\50888\machine_pylint.txt"]) == 1
+    page = report.render()
+    assert page.count("could not be written") == 1
+    assert "<a href" not in page
+    assert "Given python file does not exist" in page
@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+
+# ------------------------------------------------------------------------------
+# Copyright Commvault Systems, Inc.
+# See LICENSE.txt in the project root for
+# license information.
+# ------------------------------------------------------------------------------
+
+"""Tests of InProcessPylint linting the files of several builds in one process."""
+
+import logging
+import pytest
+from inprocess_pylint import InProcessPylint
+
+pytest.importorskip("pylint")
+
+USE_MODULE = '"""Uses the helper of pkg.mod"""\nfrom pkg import mod\nmod.helper()\n'
+
+
+def make_mount(root, with_helper):
+    """ Creates a mount with pkg/mod.py, defining helper() if set to, and the file
+        using it, returns the path of the file"""
+    tools = root / "vaultcx" / "Source" / "tools"
+    (tools / "pkg").mkdir(parents=True)
+    (tools / "pkg" / "__init__.py").write_text('"""pkg"""\n')
+    module = '"""mod"""\n'
+    if with_helper:
+        module += '\n\ndef helper():\n    """helper"""\n'
+    (tools / "pkg" / "mod.py").write_text(module)
+    (tools / "use.py").write_text(USE_MODULE)
+    return str(tools / "use.py")
+
+
+@pytest.mark.parametrize("second_build", ["1100080", "1100081"])
+def test_trees_of_previous_build_are_dropped(tmp_path, second_build):
+    """ A file of another mount is linted against the modules of its own mount, the
+        same as the pylint command line, even if the build is the same"""
+    first = make_mount(tmp_path / "first-mount", with_helper=True)
+    second = make_mount(tmp_path / "second-mount", with_helper=False)
+    engine = InProcessPylint(logging.getLogger("tests"))
+    assert 'E1101' not in engine.lint_file(first, build="1100080")
+    assert 'E1101' in engine.lint_file(second, build=second_build)
+    assert 'E1101' not in engine.lint_file(first, build="1100080")
+
+
+def test_trees_of_previous_build_on_same_mount_are_dropped(tmp_path):
+    """ A build reusing the mount path of an earlier build is linted against its own
+        modules"""
+    use_file = make_mount(tmp_path / "mount", with_helper=True)
+    engine = InProcessPylint(logging.getLogger("tests"))
+    assert 'E1101' not in engine.lint_file(use_file, build="1100080")
+    (tmp_path / "mount" / "vaultcx" / "Source" / "tools" / "pkg" / "mod.py").write_text(
+        '"""mod"""\n')
+    assert 'E1101' in engine.lint_file(use_file, build="1100081")
@@ -0,0 +1,157 @@
+# -*- coding: utf-8 -*-
+
+# ------------------------------------------------------------------------------
+# Copyright Commvault Systems, Inc.
+# See LICENSE.txt in the project root for
+# license information.
+# ------------------------------------------------------------------------------
+
+"""Tests of the shard spool protocol between ShardedLint and ShardWorker processes."""
+
+import json
+import logging
+import os
+import subprocess
+import sys
+import time
+import pytest
+import lint_shard
+
+pytest.importorskip("pylint")
+
+SHARD_SCRIPT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                            "lint_shard.py")
+
+PYLINT_OUTPUT = ("************* Module {0}\n"
+                 "{0}.py:1:0: C0114: Missing module docstring (missing-module-docstring)\n"
+                 "Your code has been rated at 5.00/10\n")
+
+
+class FakeLinter:
+    """CvemailPylint of a form linting the files not claimed by the workers."""
+
+    form_id = "50888"
+    build_id = "1100080"
+
+    def __init__(self, delay=0, on_lint=None):
+        self.delay = delay
+        self.on_lint = on_lint
+        self.linted = []
+        self.durations = {}
+
+    def lint_files(self, paths, spool_files=None):
+        """ Returns the pylint output of the file after the delay"""
+        if self.on_lint:
+            self.on_lint()
+        time.sleep(self.delay)
+        self.linted.extend(paths)
+        name = os.path.splitext(os.path.basename(paths[0]))[0]
+        return [PYLINT_OUTPUT.format(name)]
+
+
+def python_files(tmp_path, count):
+    """ Creates python files to be linted and returns their paths"""
+    source = tmp_path / "tools"
+    source.mkdir()
+    paths = []
+    for index in range(count):
+        path = source / "module_{0}.py".format(index)
+        path.write_text('"""Module {0}"""\n\nVALUE = {0}\n'.format(index))
+        paths.append(str(path))
+    return paths
+
+
+def start_workers(spool, count, idle=3):
+    """ Starts worker processes with the in-process engine on the spool"""
+    return [subprocess.Popen([sys.executable, SHARD_SCRIPT, '-spool', spool, '-jobs', '2',
+                              '-engine', 'inprocess', '-idle', str(idle)])
+            for _ in range(count)]
+
+
+def wait_workers(workers, timeout=120):
+    """ Waits for the worker processes to stop once idle"""
+    for worker in workers:
+        assert worker.wait(timeout) == 0
+
+
+def test_each_task_is_claimed_once(tmp_path):
+    """ Tasks processed by several workers are claimed once and their outputs are
+        written under the names of their claims"""
+    spool = str(tmp_path / "spool")
+    os.makedirs(spool)
+    paths = python_files(tmp_path, 8)
+    tasks = ["run_{0}".format(index) for index in range(len(paths))]
+    for task, path in zip(tasks, paths):
+        lint_shard._write_atomic(os.path.join(spool, task + ".task"),
+                                 json.dumps({"path": path, "build": "1100080"}))
+    workers = start_workers(spool, 3)
+    wait_workers(workers)
+    names = os.listdir(spool)
+    assert not [name for name in names if name.endswith((".task", ".running", ".tmp"))]
+    for task, path in zip(tasks, paths):
+        done_files = [name for name in names
+                      if name.startswith(task + ".") and name.endswith(".done")]
+        assert len(done_files) == 1
+        claim = done_files[0][:-len(".done")]
+        assert claim != task and claim + ".out" in names
+        with open(os.path.join(spool, done_files[0]), encoding='utf-8') as done_file:
+            done = json.load(done_file)
+        assert "error" not in done
+        assert claim[len(task) + 1:].startswith(done["worker"] + "-")
+        with open(os.path.join(spool, claim + ".out"), encoding='utf-8') as output_file:
+            assert "rated at 10.00/10" in output_file.read()
+    assert len([name for name in names if name.endswith(".done")]) == len(tasks)
+
+
+def test_form_is_linted_by_workers_and_coordinator(tmp_path):
+    """ The coordinator collects the outputs of the workers, lints the other tasks
+        itself and leaves nothing of the run in the spool"""
+    spool = str(tmp_path / "spool")
+    paths = python_files(tmp_path, 6)
+    workers = start_workers(spool, 2)
+    try:
+        linter = FakeLinter(delay=1)
+        shard = lint_shard.ShardedLint(spool, logging.getLogger("tests"), poll_interval=0.1)
+        results = shard.lint(linter, paths, [None] * len(paths))
+    finally:
+        wait_workers(workers)
+    assert len(results) == len(paths)
+    for path, (output, result) in zip(paths, results):
+        assert result is not None
+        if path in linter.linted:
+            assert "missing-module-docstring" in output
+        else:
+            assert "rated at 10.00/10" in output
+            assert path in linter.durations
+    assert shard.sharded > 0
+    assert shard.linted + shard.sharded == len(paths)
+    assert not os.listdir(spool)
+
+
+def test_stale_claims_are_queued_again(tmp_path):
+    """ Tasks claimed by a worker which stopped without completing them are queued
+        again and linted once they are stale"""
+    spool = str(tmp_path / "spool")
+    paths = python_files(tmp_path, 3)
+    stale_time = time.time() - 120
+    claimed = []
+
+    def stop_worker():
+        """ A worker claims the queued tasks and stops before completing them"""
+        if claimed:
+            return
+        for name in os.listdir(spool):
+            if name.endswith(".task"):
+                running_file = lint_shard._claim(os.path.join(spool, name), "stopped-1")
+                os.utime(running_file, (stale_time, stale_time))
+                claimed.append(running_file)
+
+    linter = FakeLinter(on_lint=stop_worker)
+    shard = lint_shard.ShardedLint(spool, logging.getLogger("tests"), poll_interval=0.05,
+                                   stale_seconds=60)
+    results = shard.lint(linter, paths, [None] * len(paths))
+    assert len(claimed) == 2
+    assert sorted(linter.linted) == sorted(paths)
+    assert all(result is not None for _, result in results)
+    assert not os.listdir(spool)
+
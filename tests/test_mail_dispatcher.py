@@ -0,0 +1,166 @@
+# -*- coding: utf-8 -*-
+
+# ------------------------------------------------------------------------------
+# Copyright Commvault Systems, Inc.
+# See LICENSE.txt in the project root for
+# license information.
+# ------------------------------------------------------------------------------
+
+"""Tests of MailDispatcher with an aiosmtpd server standing in for the mail server."""
+
+import email
+import smtplib
+import socket
+import time
+from email.mime.text import MIMEText
+import pytest
+from mail_dispatcher import MailDispatcher
+
+controller_module = pytest.importorskip("aiosmtpd.controller")
+
+
+class RecordingHandler:
+    """aiosmtpd handler recording the received emails and the client connections."""
+
+    def __init__(self):
+        self.messages = []
+        self.peers = set()
+        self.refuse = False
+
+    async def handle_RCPT(self, server, session, envelope, address, rcpt_options):
+        """ Accepts the recipient, or refuses it if set to"""
+        if self.refuse:
+            return '550 5.1.1 Unknown user'
+        envelope.rcpt_tos.append(address)
+        return '250 OK'
+
+    async def handle_DATA(self, server, session, envelope):
+        """ Records the email and the connection it was sent through"""
+        self.peers.add(session.peer)
+        self.messages.append(email.message_from_bytes(envelope.content))
+        return '250 Message accepted for delivery'
+
+
+@pytest.fixture
+def smtp_server():
+    """ SMTP server on a free local port, yields its handler and port"""
+    with socket.socket() as probe:
+        probe.bind(('127.0.0.1', 0))
+        port = probe.getsockname()[1]
+    handler = RecordingHandler()
+    controller = controller_module.Controller(handler, hostname='127.0.0.1', port=port)
+    controller.start()
+    yield handler, port
+    controller.stop()
+
+
+class SmtpFactory:
+    """Opens SMTP sessions to the local server, failing the first connects if set to."""
+
+    def __init__(self, port, failures=0):
+        self.port = port
+        self.failures = failures
+        self.calls = []
+
+    def __call__(self, server):
+        self.calls.append(time.time())
+        if len(self.calls) <= self.failures:
+            raise ConnectionRefusedError("mail server not reachable")
+        return smtplib.SMTP('127.0.0.1', self.port)
+
+
+def report(text, subject='Pylint Score', receivers='dev@commvault.com'):
+    """ Returns an html email as sent by CvemailPylint"""
+    body = MIMEText("<!DOCTYPE html><html><head><style></style></head><body>{0}</body>"
+                    "</html>".format(text), "html")
+    body['Subject'] = subject
+    body['From'] = 'automation@commvault.com'
+    body['To'] = receivers
+    return body
+
+
+def payload(message):
+    """ Returns the decoded html of a received email"""
+    return message.get_payload(decode=True).decode()
+
+
+def test_session_is_reused(smtp_server):
+    """ The emails of a process are sent through a single SMTP session"""
+    handler, port = smtp_server
+    factory = SmtpFactory(port)
+    dispatcher = MailDispatcher('mail', smtp_factory=factory)
+    futures = [dispatcher.send(report("form {0}".format(index))) for index in range(3)]
+    for future in futures:
+        assert future.result(5)
+    dispatcher.close()
+    assert len(handler.messages) == 3
+    assert len(handler.peers) == 1
+    assert len(factory.calls) == 1
+
+
+def test_failed_connect_is_retried_with_backoff(smtp_server):
+    """ A failed send is retried after the backoff, doubled for every retry"""
+    handler, port = smtp_server
+    factory = SmtpFactory(port, failures=2)
+    dispatcher = MailDispatcher('mail', retries=3, backoff=0.1, smtp_factory=factory)
+    assert dispatcher.send(report("form 1")).result(5)
+    dispatcher.close()
+    assert len(handler.messages) == 1
+    assert len(factory.calls) == 3
+    assert factory.calls[1] - factory.calls[0] >= 0.1
+    assert factory.calls[2] - factory.calls[1] >= 0.2
+
+
+def test_send_fails_once_retries_are_exhausted(smtp_server):
+    """ The future of an email fails once all the retries failed"""
+    handler, port = smtp_server
+    factory = SmtpFactory(port, failures=10)
+    dispatcher = MailDispatcher('mail', retries=2, backoff=0.01, smtp_factory=factory)
+    with pytest.raises(ConnectionRefusedError):
+        dispatcher.send(report("form 1")).result(5)
+    dispatcher.close()
+    assert not handler.messages
+    assert len(factory.calls) == 3
+
+
+def test_refused_recipients_are_not_retried(smtp_server):
+    """ Refused recipients fail the email without retrying it"""
+    handler, port = smtp_server
+    handler.refuse = True
+    factory = SmtpFactory(port)
+    dispatcher = MailDispatcher('mail', retries=3, backoff=0.01, smtp_factory=factory)
+    with pytest.raises(smtplib.SMTPRecipientsRefused):
+        dispatcher.send(report("form 1")).result(5)
+    dispatcher.close()
+    assert len(factory.calls) == 1
+
+
+def test_digest_merges_emails_of_window(smtp_server):
+    """ Emails with the same digest key within the window are merged into one email"""
+    handler, port = smtp_server
+    dispatcher = MailDispatcher('mail', smtp_factory=SmtpFactory(port))
+    key = ('50888', 'dev@commvault.com')
+    first = dispatcher.send(report("build 1100080"), key, 0.3)
+    second = dispatcher.send(report("build 1100081"), key, 0.3)
+    other = dispatcher.send(report("other form"), ('50890', 'dev@commvault.com'), 0.3)
+    for future in (first, second, other):
+        assert future.result(5)
+    dispatcher.close()
+    assert len(handler.messages) == 2
+    merged = [message for message in handler.messages if '(2 builds)' in message['Subject']]
+    assert len(merged) == 1
+    assert 'build 1100080' in payload(merged[0])
+    assert 'build 1100081' in payload(merged[0])
+    assert merged[0]['To'] == 'dev@commvault.com'
+
+
+def test_close_sends_held_digests(smtp_server):
+    """ Closing the dispatcher sends the digests before their window is over"""
+    handler, port = smtp_server
+    dispatcher = MailDispatcher('mail', smtp_factory=SmtpFactory(port))
+    future = dispatcher.send(report("build 1100080"), ('50888', 'dev'), 3600)
+    time.sleep(0.1)
+    assert not future.done()
+    dispatcher.close()
+    assert future.result(5)
+    assert len(handler.messages) == 1
@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+
+# ------------------------------------------------------------------------------
+# Copyright Commvault Systems, Inc.
+# See LICENSE.txt in the project root for
+# license information.
+# ------------------------------------------------------------------------------
+
+"""Tests of PylintDaemon processing the jobs of a spool directory."""
+
+import os
+import threading
+import time
+import pytest
+
+pytest.importorskip("pyodbc")
+
+import pylint_daemon  # pylint: disable=wrong-import-position
+
+
+class FakeHelper:
+    """UCHelper standing in for the form runs, completes as per the job options."""
+
+    runs = []
+
+    def __init__(self, *args):
+        self.args = args
+
+    def execute(self, args):
+        """ Records the run and fails it if -fail is given, as UCHelper does after
+            notifying the failure over email"""
+        self.runs.append(args)
+        return '-fail' not in args
+
+
+@pytest.fixture
+def daemon(tmp_path, monkeypatch):
+    """ Daemon on a temporary spool running the jobs through FakeHelper"""
+    FakeHelper.runs = []
+    monkeypatch.setattr(pylint_daemon, "UCHelper", FakeHelper)
+    spool = pylint_daemon.PylintDaemon(str(tmp_path), max_jobs=1, poll_interval=0.05,
+                                       stale_seconds=60)
+    yield spool
+    spool.stop()
+
+
+def run_until(daemon, condition, timeout=5):
+    """ Runs the daemon in a thread till the condition holds"""
+    thread = threading.Thread(target=daemon.run, daemon=True)
+    thread.start()
+    deadline = time.time() + timeout
+    while not condition() and time.time() < deadline:
+        time.sleep(0.05)
+    daemon.stop()
+    thread.join(timeout)
+    assert not thread.is_alive()
+    return condition()
+
+
+def test_completed_job_is_removed(daemon, tmp_path):
+    """ The job file of a completed run is removed"""
+    job_file = pylint_daemon.PylintDaemon.submit(str(tmp_path), "50888", "1100080", "/mount")
+    assert run_until(daemon, lambda: FakeHelper.runs and not os.listdir(str(tmp_path)))
+    assert not os.path.exists(job_file)
+    assert FakeHelper.runs[0][:6] == ['-formid', '50888', '-buildid', '1100080',
+                                      '-mountpath', '/mount']
+
+
+def test_failed_job_is_renamed(daemon, tmp_path):
+    """ The job of a run which failed without raising is renamed to .failed"""
+    job_file = pylint_daemon.PylintDaemon.submit(str(tmp_path), "50888", "1100080", "/mount",
+                                                 ['-fail'])
+    failed_file = job_file + ".failed"
+    assert run_until(daemon, lambda: os.path.exists(failed_file))
+    assert not os.path.exists(job_file)
+    assert not os.path.exists(job_file + ".running")
+
+
+def test_stale_running_job_is_queued_again(daemon, tmp_path):
+    """ A job left running by a stopped daemon is processed again"""
+    job_file = pylint_daemon.PylintDaemon.submit(str(tmp_path), "50888", "1100080", "/mount")
+    os.rename(job_file, job_file + ".running")
+    stale_time = time.time() - 120
+    os.utime(job_file + ".running", (stale_time, stale_time))
+    assert run_until(daemon, lambda: FakeHelper.runs and not os.listdir(str(tmp_path)))
+    assert len(FakeHelper.runs) == 1
+
+
+def test_recent_running_job_is_left(daemon, tmp_path):
+    """ A job running in another daemon sharing the spool is not taken over"""
+    job_file = pylint_daemon.PylintDaemon.submit(str(tmp_path), "50888", "1100080", "/mount")
+    os.rename(job_file, job_file + ".running")
+    run_until(daemon, lambda: False, timeout=0.5)
+    assert os.path.exists(job_file + ".running")
+    assert not FakeHelper.runs
@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+
+# ------------------------------------------------------------------------------
+# Copyright Commvault Systems, Inc.
+# See LICENSE.txt in the project root for
+# license information.
+# ------------------------------------------------------------------------------
+
+"""Tests of the parsers of pylint output capping the messages kept per file."""
+
+import io
+from constants import STREAM_MAX_MESSAGES
+from pylint_parser import SpoolingParser
+from pylint_parser import parse_pylint_output
+
+
+def pylint_output(conventions, errors):
+    """ Returns pylint output with given number of convention and error messages"""
+    lines = ["************* Module machine"]
+    lines += ["machine.py:{0}:0: C0103: Variable name doesn't conform "
+              "(invalid-name)".format(line) for line in range(1, conventions + 1)]
+    lines += ["machine.py:{0}:4: E0602: Undefined variable 'x' "
+              "(undefined-variable)".format(line) for line in range(1, errors + 1)]
+    lines += ["|convention |{0}      |NC       |NC         |".format(conventions),
+              "|error      |{0}      |NC       |NC         |".format(errors),
+              "Your code has been rated at 2.50/10"]
+    return "\n".join(lines) + "\n"
+
+
+def test_messages_are_capped_per_category():
+    """ At most max_messages of every category are kept, the errors after the cap of
+        the conventions and the counts are kept"""
+    result = parse_pylint_output(pylint_output(500, 7), max_messages=100)
+    categories = [message.category for message in result.messages]
+    assert categories.count('C') == 100
+    assert categories.count('E') == 7
+    assert result.counts['convention'] == 500
+    assert result.counts['error'] == 7
+    assert result.score == 2.5
+
+
+def test_messages_are_not_capped_by_default():
+    """ All the messages are kept when no cap is given"""
+    result = parse_pylint_output(pylint_output(500, 7))
+    assert len(result.messages) == 507
+
+
+def test_streaming_parser_caps_messages():
+    """ The streaming mode keeps at most STREAM_MAX_MESSAGES of every category while
+        the complete output is written to the spool file"""
+    output = pylint_output(STREAM_MAX_MESSAGES + 50, 3)
+    spool = io.StringIO()
+    parser = SpoolingParser(spool)
+    for start in range(0, len(output), 4096):
+        parser.write(output[start:start + 4096])
+    parser.close()
+    assert spool.getvalue() == output
+    assert len(parser.result.errors()) == 3
+    assert len(parser.result.messages) == STREAM_MAX_MESSAGES + 3
+    assert parser.result.counts['convention'] == STREAM_MAX_MESSAGES + 50
@@ -0,0 +1,43 @@
+# -*- coding: utf-8 -*-
+
+# ------------------------------------------------------------------------------
+# Copyright Commvault Systems, Inc.
+# See LICENSE.txt in the project root for
+# license information.
+# ------------------------------------------------------------------------------
+
+"""Tests of ReportWriter writing the report files through its background thread."""
+
+import logging
+from report_writer import ReportWriter
+
+
+class FailingArchive:
+    """ReportArchive failing every report with an error other than OSError."""
+
+    def write(self, name, text):
+        """ Fails to add the report"""
+        raise RuntimeError("archive closed")
+
+
+def test_reports_are_written_as_utf8(tmp_path):
+    """ Reports are written as utf-8 whatever the encoding of the platform"""
+    writer = ReportWriter(logging.getLogger("tests"))
+    report_file = tmp_path / "machine_pylint.txt"
+    writer.write(str(report_file), "Module Überprüfung: 10.00/10\n")
+    assert writer.close() == []
+    assert report_file.read_text(encoding='utf-8') == "Module Überprüfung: 10.00/10\n"
+
+
+def test_failed_report_does_not_stop_writer(tmp_path):
+    """ A report failing with any error is recorded as failed and the reports queued
+        after it are still written"""
+    writer = ReportWriter(logging.getLogger("tests"))
+    unencodable = str(tmp_path / "first_pylint.txt")
+    written = tmp_path / "second_pylint.txt"
+    # a lone surrogate can not be encoded in any encoding
+    writer.write(unencodable, "output \ud800\n")
+    writer.add(FailingArchive(), "third_pylint.txt", text="output\n")
+    writer.write(str(written), "output\n")
+    assert writer.close() == [unencodable, "third_pylint.txt"]
+    assert written.read_text(encoding='utf-8') == "output\n"
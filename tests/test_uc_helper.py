@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+
+# ------------------------------------------------------------------------------
+# Copyright Commvault Systems, Inc.
+# See LICENSE.txt in the project root for
+# license information.
+# ------------------------------------------------------------------------------
+
+"""Tests of the UpdateCenter and ENGWEBDB queries of UCHelper run through pooled
+SQLite connections standing in for the databases."""
+
+import functools
+import logging
+import sqlite3
+import pytest
+from db_pool import ConnectionPool
+
+pytest.importorskip("pyodbc")
+
+# pylint: disable=wrong-import-position
+from alias_cache import AliasCache
+from uc_helper import UCHelper
+from uc_helper import source_file_filter
+
+FORMID = 50888
+BUILDID = 1100080
+
+
+@pytest.fixture
+def pool(tmp_path):
+    """ Pool of connections to a SQLite database holding the tables of UpdateCenter and
+        ENGWEBDB queried by UCHelper"""
+    db_file = str(tmp_path / "updatecenter.db")
+    conn = sqlite3.connect(db_file)
+    conn.executescript(
+        "create table MapFormToSourceFiles(nFormID integer, nBuildID integer, "
+        "sSourceFileName text);"
+        "create table FormProperties(nFormID integer, nBuildID integer, "
+        "sPropertyName text, spropertyvalue text);"
+        "create table MapRestrictedRulesToFormCodeReviewers(nFormID integer, "
+        "nBuildID integer, sReviewerAlias text);"
+        "create table forminfo(nFormID integer, nBuildID integer, sCreatedBy text);"
+        "create table vwUsers(ProdcertName text, emailAlias text, isDeleted integer);")
+    conn.commit()
+    conn.close()
+    connection_pool = ConnectionPool(functools.partial(sqlite3.connect, db_file,
+                                                       check_same_thread=False))
+    yield connection_pool
+    connection_pool.close()
+
+
+def insert(pool, table, rows):
+    """ Inserts given rows in a table of the stand-in database"""
+    with pool.connection() as conn:
+        conn.executemany("insert into {0} values ({1})".format(
+            table, ", ".join("?" * len(rows[0]))), rows)
+        conn.commit()
+
+
+def helper(pool, tmp_path, prefixes):
+    """ UCHelper of the form querying the stand-in database"""
+    uc_helper = UCHelper(pool, pool, AliasCache(str(tmp_path / "aliases.json")))
+    uc_helper.logger = logging.getLogger("tests")
+    uc_helper.formid_no = FORMID
+    uc_helper.buildid_no = BUILDID
+    uc_helper.prefixes = prefixes
+    return uc_helper
+
+
+def test_source_file_filter_escapes_wildcards():
+    """ The wildcards of the folders and the extension are escaped with '!'"""
+    condition, params = source_file_filter(("tools/100%_[x]!/",), ".py")
+    assert condition.count("like ? escape '!'") == 2
+    assert params == ["tools/100!%!_![x]!!/%", "%.py"]
+
+
+def test_files_under_prefixes_are_fetched(pool, tmp_path):
+    """ Only the python files of the form build under the folders are fetched, the
+        wildcards in the folder names match themselves only"""
+    insert(pool, "MapFormToSourceFiles", [
+        (FORMID, BUILDID, "vaultcx/Source/tools/Auto_mation/a.py"),
+        (FORMID, BUILDID, "vaultcx/Source/tools/AutoXmation/b.py"),
+        (FORMID, BUILDID, "vaultcx/Source/tools/100%/c.py"),
+        (FORMID, BUILDID, "vaultcx/Source/tools/100abc/d.py"),
+        (FORMID, BUILDID, "vaultcx/Source/tools/Auto_mation/e.pyc"),
+        (FORMID, BUILDID, "vaultcx/Source/common/f.cpp"),
+        (FORMID, BUILDID + 1, "vaultcx/Source/tools/Auto_mation/g.py"),
+        (FORMID + 1, BUILDID, "vaultcx/Source/tools/Auto_mation/h.py")])
+    uc_helper = helper(pool, tmp_path, ("vaultcx/Source/tools/Auto_mation/",
+                                        "vaultcx/Source/tools/100%/"))
+    uc_helper.get_files_list()
+    assert sorted(row[0] for row in uc_helper.file_list) == [
+        "vaultcx/Source/tools/100%/c.py", "vaultcx/Source/tools/Auto_mation/a.py"]
+
+
+def test_receivers_are_fetched_in_one_query(pool, tmp_path):
+    """ The owners, the system enforced reviewers and the developer of the form build
+        are fetched in that order, the reviewers once each"""
+    insert(pool, "FormProperties", [
+        (FORMID, BUILDID, "DevOwner", "owner"),
+        (FORMID, BUILDID, "CodeRevDev1", "chosen"),
+        (FORMID, BUILDID, "Reviewed", "ignored"),
+        (FORMID, BUILDID + 1, "DevOwner", "other_build")])
+    insert(pool, "MapRestrictedRulesToFormCodeReviewers", [
+        (FORMID, BUILDID, "enforced"), (FORMID, BUILDID, "enforced")])
+    insert(pool, "forminfo", [(FORMID, BUILDID, "developer"),
+                              (FORMID + 1, BUILDID, "other_form")])
+    insert(pool, "vwUsers", [("owner", "owner.alias", 0), ("chosen", "chosen", 0),
+                             ("enforced", "enforced", 0), ("developer", "dev", 0),
+                             ("developer", "deleted", 1)])
+    uc_helper = helper(pool, tmp_path, ("vaultcx/Source/tools/Automation/",))
+    uc_helper.email_receiver()
+    assert sorted(uc_helper.receiver[:2]) == ["chosen", "owner"]
+    assert uc_helper.receiver[2:] == ["enforced", "developer"]
+    uc_helper.email_receivers_alias()
+    assert sorted(uc_helper.receiver.rstrip(",").split(",")) == [
+        "chosen@commvault.com", "dev@commvault.com", "enforced@commvault.com",
+        "owner.alias@commvault.com"]
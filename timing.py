@@ -0,0 +1,169 @@
+# -*- coding: utf-8 -*-
+
+# ------------------------------------------------------------------------------
+# Copyright Commvault Systems, Inc.
+# See LICENSE.txt in the project root for
+# license information.
+# ------------------------------------------------------------------------------
+
+"""File for measuring the time spent in the stages of a CVEmailPylint run.
+
+The duration and the number of calls of every stage of a run, ex. the UpdateCenter
+queries, the pylint run of every file or the email, are summed by a StageTimer.
+Stages nest, ex. lint_file is counted within run_pylint, hence the duration of a
+stage includes the stages called from it. Once the run completes the summary is:
+
+    a. appended as a json line to the timings file of the form, next to its
+       pylint_generator.log
+
+    b. optionally exported in the Prometheus text format to a directory read by
+       the textfile collector of node_exporter
+
+StageTimer:
+
+    __init__()          -- Initialize instance of the StageTimer class
+
+    stage()             -- Context manager timing the code run within it as given stage
+
+    add()               -- Adds a duration measured elsewhere to given stage
+
+    summary()           -- Returns the duration and count of every stage of the run
+
+    write()             -- Appends the summary of the run as a json line to given file
+
+    export_prometheus() -- Writes the summary of the run in Prometheus text format
+
+timed()                 -- Decorator timing a method as given stage through the
+                           timer of its object
+"""
+
+import contextlib
+import functools
+import json
+import os
+import threading
+import time
+from constants import PROMETHEUS_FILE_NAME
+
+
+def timed(stage):
+    """ Decorator timing every call of a method as given stage through the timer
+        held in the timer attribute of its object, the method runs untimed if the
+        object has no timer.
+
+        Args:
+            stage(str)  -- Name of the stage.
+    """
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            timer = getattr(self, "timer", None)
+            if timer is None:
+                return method(self, *args, **kwargs)
+            with timer.stage(stage):
+                return method(self, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+class StageTimer:
+    """Class for summing the duration and count of the stages of a run."""
+
+    def __init__(self):
+        """ Initialize instances of the StageTimer class"""
+        self.started = time.time()
+        self.__start = time.perf_counter()
+        self.__stages = {}
+        self.__lock = threading.Lock()
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        """ Times the code run within the context as given stage.
+
+            Args:
+                name(str)   -- Name of the stage.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start)
+
+    def add(self, name, seconds, count=1):
+        """ Adds a duration to given stage, stages timed from several threads at a
+            time add up their durations.
+
+            Args:
+                name(str)       -- Name of the stage.
+
+                seconds(float)  -- Duration to be added.
+
+                count(int)      -- Number of calls the duration covers.
+        """
+        with self.__lock:
+            total, calls = self.__stages.get(name, (0.0, 0))
+            self.__stages[name] = (total + seconds, calls + count)
+
+    def summary(self, **fields):
+        """ Returns the duration and count of every stage of the run.
+
+            Args:
+                fields(dict)    -- Fields of the run added to the summary, ex. formid.
+
+            Returns:
+                dict - Summary of the run
+        """
+        with self.__lock:
+            stages = {name: {"seconds": round(total, 4), "count": calls}
+                      for name, (total, calls) in sorted(self.__stages.items())}
+        summary = {"started": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(self.started)),
+                   "total_seconds": round(time.perf_counter() - self.__start, 4)}
+        summary.update(fields)
+        summary["stages"] = stages
+        return summary
+
+    def write(self, timings_file, **fields):
+        """ Appends the summary of the run as a json line to given file.
+
+            Args:
+                timings_file(str)   -- File holding a json line per run.
+
+                fields(dict)        -- Fields of the run added to the summary.
+        """
+        with open(timings_file, "a") as timings:
+            timings.write(json.dumps(self.summary(**fields)) + "\n")
+
+    def export_prometheus(self, textfile_dir, **labels):
+        """ Writes the summary of the run in the Prometheus text format. The file is
+            replaced by every run, so it always holds the stages of the last run.
+
+            Args:
+                textfile_dir(str)   -- Directory read by the node_exporter textfile
+                                       collector.
+
+                labels(dict)        -- Labels added to every sample, ex. formid.
+        """
+        summary = self.summary()
+        label_text = "".join(',{0}="{1}"'.format(key, str(value).replace('"', r'\"'))
+                             for key, value in sorted(labels.items()) if value is not None)
+        lines = ["# HELP cvemail_pylint_run_seconds Duration of the last CVEmailPylint run.",
+                 "# TYPE cvemail_pylint_run_seconds gauge",
+                 "cvemail_pylint_run_seconds{{{0}}} {1}".format(label_text.lstrip(","),
+                                                                summary["total_seconds"]),
+                 "# HELP cvemail_pylint_stage_seconds Time spent in a stage of the last run.",
+                 "# TYPE cvemail_pylint_stage_seconds gauge"]
+        lines.extend('cvemail_pylint_stage_seconds{{stage="{0}"{1}}} {2}'
+                     .format(name, label_text, stage["seconds"])
+                     for name, stage in summary["stages"].items())
+        lines.extend(["# HELP cvemail_pylint_stage_count Calls of a stage in the last run.",
+                      "# TYPE cvemail_pylint_stage_count gauge"])
+        lines.extend('cvemail_pylint_stage_count{{stage="{0}"{1}}} {2}'
+                     .format(name, label_text, stage["count"])
+                     for name, stage in summary["stages"].items())
+        os.makedirs(textfile_dir, exist_ok=True)
+        prom_file = os.path.join(textfile_dir, PROMETHEUS_FILE_NAME)
+        # the collector must never read a partially written file
+        temp_file = "{0}.{1}.{2}.tmp".format(prom_file, os.getpid(), threading.get_ident())
+        with open(temp_file, "w") as prom:
+            prom.write("\n".join(lines) + "\n")
+        os.replace(temp_file, prom_file)
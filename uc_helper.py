@@ -39,15 +39,16 @@ UCHelper:
 
     initialize_logger()         --  Initialize the logger object
 
-    read_args()                 --  Reads the arguments from command line as
+    read_args()                 --  Reads the arguments from command line or given list as
                                     formid, buildid and mountpath
 
-    query_uc_db(self, query)    --  Adds the logic to connect to UC db and return query output
+    query_uc_db(self, query)    --  Runs the query on UC db through a pooled connection and
+                                    return query output
 
     get_files_list()            --  Get all the files from given update forms by establishing
                                     database connection
 
-    validate_files()            --  Validate the path of files and python files
+    validate_files()            --  Keeps the python files present on the mount path
 
     email_receiver()            --  Get Developer, Additional developers and Code reviewers email id
                                     from given update form to send email
@@ -58,10 +59,23 @@ UCHelper:
 
     send_notification_email()   --  Send email if execute method gets failed
 
+    resolve_receivers()         --  Get email alias of all the receivers of the form
+
+    run_pipeline()              --  Resolves the receivers while the files are linted and
+                                    sends the email once both are complete
+
     execute()                   --  Main method which contains all the methods inside.
                                     Starts the UCHelper execution and also create object
                                     of CVEmailPylint class.
 
+    record_timings()            --  Records the time spent in every stage of the run
+
+    close()                     --  Closes the connection pools created by this run and
+                                    releases its logger
+
+source_file_filter()            --  Returns the condition selecting the python files to be
+                                    linted from MapFormToSourceFiles
+
     Usage:
 
     We can run the file by passing command line arguments as below. for ex.:
@@ -74,26 +88,131 @@ UCHelper:
 
     mountpath -- Path on the build machine where the source files specified in the form are mounted.
 
+    parallel  -- Optional, runs pylint over the form files through a pool of workers.
+
+    workers   -- Optional, number of pylint processes in parallel mode, defaults to no. of cores.
+
+    engine    -- Optional, "subprocess" (default) or "inprocess" to lint all files in one process.
+
+    cache     -- Optional, reuses the pylint output of files unchanged since they were last linted.
+
+    incremental -- Optional, lints only the files changed since the previous build of the form
+                   and the files importing them.
+
+    digest    -- Optional, minutes the email is held to be merged with other builds of the form,
+                 only effective in the daemon processing several builds of a form, a
+                 single form run sends its email when the process exits.
+
+    stream    -- Optional, parses the pylint output of every file while spooling it to disk
+                 instead of holding the reports of the whole form in memory.
+
+    astroidcache -- Optional, with the inprocess engine loads the astroid trees of the cvpysdk
+                    and AutomationUtils modules built by earlier runs on the same build.
+
+    metrics   -- Optional, directory of the node_exporter textfile collector where the time
+                 spent in every stage of the run is exported for Prometheus.
+
+    prefixes  -- Optional, folders of the source files linted, defaults to the Automation
+                 and cvpysdk folders, ex. -prefixes vaultcx/Source/tools/Automation/
+
+    archive   -- Optional, writes the report files of the form into a single compressed
+                 archive, read with report_archive.py.
+
+    shard     -- Optional, spool directory shared with the lint_shard.py workers of other
+                 build agents, the files of the form are linted by the workers.
+
+    The time spent in every stage of a run is appended as a json line to pylint_timings.jsonl
+    next to the pylint_generator.log of the form.
+
     """
 
-import smtplib
 import argparse
 import sys
 import os
 import os.path
 import traceback
+import functools
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from email.mime.text import MIMEText
 from logger import Logger
 import pyodbc
 from cvemail_pylint import CvemailPylint
+from lint_shard import ShardedLint
+from db_pool import ConnectionPool
+from alias_cache import AliasCache
+from mail_dispatcher import get_dispatcher
+from timing import StageTimer
+from timing import timed
+from constants import UC_CONNECTION
+from constants import ENGWEB_CONNECTION
+from constants import PATH
+from constants import MAIL_SERVER
+from constants import TIMINGS_NAME
+from constants import SOURCE_FILE_PREFIXES
+from constants import SOURCE_FILE_EXT
+
+
+def source_file_filter(prefixes=SOURCE_FILE_PREFIXES, extension=SOURCE_FILE_EXT):
+    """ Returns the condition on sSourceFileName selecting the files under given
+        folders with given extension, so the other source files of a form are never
+        fetched from UpdateCenter.
+
+        Args:
+            prefixes(tuple) -- Folders of the files, relative to the mount path.
+
+            extension(str)  -- Extension of the files.
+
+        Returns:
+            tuple - (condition with ? placeholders, list of its parameters)
+    """
+    def escape(text):
+        """ Escapes the wildcards of like patterns"""
+        for char in "!%_[":
+            text = text.replace(char, "!" + char)
+        return text
+
+    condition = ("({0}) and sSourceFileName like ? escape '!'".format(
+        " or ".join(["sSourceFileName like ? escape '!'"] * len(prefixes))))
+    params = [escape(prefix) + "%" for prefix in prefixes] + ["%" + escape(extension)]
+    return condition, params
 
 
 class UCHelper:
     """ Main file to load all the python files in an update form and pass the list
      to Pylint module to perform further operations."""
 
-    def __init__(self):
-        """ Initialize instances of the UCHelper class"""
+    def __init__(self, uc_pool=None, engweb_pool=None, alias_cache=None, shared_lint=None,
+                 source_files=None):
+        """ Initialize instances of the UCHelper class
+
+            Args:
+                uc_pool(object)     -- ConnectionPool to UpdateCenter, a pool owned by
+                                       this run is created if not given.
+
+                engweb_pool(object) -- ConnectionPool to ENGWEBDB, a pool owned by
+                                       this run is created if not given.
+
+                alias_cache(object) -- AliasCache of users email alias, loaded from
+                                       the local cache file if not given.
+
+                shared_lint(object) -- SharedLint of the build batch the form is run in.
+
+                source_files(list)  -- Source files rows of the form fetched by the build
+                                       batch, read from UpdateCenter if not given.
+        """
+        self.owned_pools = []
+        if uc_pool is None:
+            uc_pool = ConnectionPool(functools.partial(pyodbc.connect, UC_CONNECTION))
+            self.owned_pools.append(uc_pool)
+        if engweb_pool is None:
+            engweb_pool = ConnectionPool(functools.partial(pyodbc.connect, ENGWEB_CONNECTION))
+            self.owned_pools.append(engweb_pool)
+        self.uc_pool = uc_pool
+        self.engweb_pool = engweb_pool
+        self.alias_cache = alias_cache or AliasCache()
+        self.shared_lint = shared_lint
+        self.source_files = source_files
         self.file_list = []
         self.formid_no = None
         self.buildid_no = None
@@ -101,9 +220,27 @@ class UCHelper:
         self.json_data = {}
         self.receiver = []
         self.logger = None
-
-    def read_args(self):
+        self.log = None
+        self.parallel = False
+        self.workers = None
+        self.engine = None
+        self.cache = False
+        self.incremental = False
+        self.digest = 0
+        self.metrics = None
+        self.stream = False
+        self.astroid_cache = False
+        self.shard = None
+        self.archive = False
+        self.prefixes = SOURCE_FILE_PREFIXES
+        self.missing_files = []
+        self.timer = StageTimer()
+
+    def read_args(self, args=None):
         """ Reads the arguments from command line as formid, buildid and mountpath.
+            Args:
+                args(list)  -- Arguments to be read instead of the command line.
+
             Available Command Line Arguments:
             formid    -- Update Form ID for which the pylint score is to be determined.
 
@@ -111,125 +248,233 @@ class UCHelper:
 
             mountpath -- Path on the build machine where the source files specified
                          in the form are mounted.
+
+            parallel  -- Runs pylint over the form files in parallel.
+
+            workers   -- Number of pylint processes to run at a time in parallel mode.
+
+            engine    -- Runs pylint as one subprocess per file or in process over all files.
+
+            cache     -- Reuses the pylint output of files unchanged since they were last linted.
+
+            incremental -- Lints only the files changed since the previous build of the form
+                           and the files importing them.
+
+            digest    -- Minutes the email is held to be merged with other builds of the form,
+                         the email of a single form run is sent when the process exits.
+
+            metrics   -- Directory where the stage timings are exported for Prometheus.
+
+            stream    -- Parses the pylint output of every file while spooling it to disk.
+
+            astroidcache -- Shares the astroid trees of the base modules across the runs
+                            of a build in the inprocess engine.
+
+            prefixes  -- Folders of the source files linted, relative to the mount path.
+
+            archive   -- Writes the report files of the form into a single archive.
+
+            shard     -- Spool directory the files of the form are queued in for the
+                         shard workers.
         """
         try:
             parser = argparse.ArgumentParser()
             parser.add_argument('-formid', help='Form id  to be processed', dest='Formid')
             parser.add_argument('-buildid', help='Build id to be processed', dest='Buildid')
             parser.add_argument('-mountpath', help='Mount path to be processed', dest='Mountpath')
-            arguments = parser.parse_args()
+            parser.add_argument('-parallel', help='Run pylint over the files in parallel',
+                                dest='Parallel', action='store_true')
+            parser.add_argument('-workers', help='Number of parallel pylint processes',
+                                dest='Workers', type=int)
+            parser.add_argument('-engine', help='Pylint engine to be used',
+                                dest='Engine', choices=['subprocess', 'inprocess'],
+                                default='subprocess')
+            parser.add_argument('-cache', help='Reuse pylint output of unchanged files',
+                                dest='Cache', action='store_true')
+            parser.add_argument('-incremental', help='Lint only files changed since the '
+                                'previous build of the form', dest='Incremental',
+                                action='store_true')
+            parser.add_argument('-digest', help='Minutes to hold the email for merging it '
+                                'with other builds of the form', dest='Digest', type=int,
+                                default=0)
+            parser.add_argument('-metrics', help='Directory of the node_exporter textfile '
+                                'collector to export the stage timings to', dest='Metrics')
+            parser.add_argument('-stream', help='Parse pylint output while spooling it to '
+                                'disk instead of holding it in memory', dest='Stream',
+                                action='store_true')
+            parser.add_argument('-astroidcache', help='Share the astroid trees of the base '
+                                'modules across the runs of a build', dest='AstroidCache',
+                                action='store_true')
+            parser.add_argument('-prefixes', help='Folders of the source files linted',
+                                dest='Prefixes', nargs='+', default=list(SOURCE_FILE_PREFIXES))
+            parser.add_argument('-archive', help='Write the report files of the form into '
+                                'a single compressed archive', dest='Archive',
+                                action='store_true')
+            parser.add_argument('-shard', help='Spool directory shared with the shard workers '
+                                'linting the files', dest='Shard')
+            arguments = parser.parse_args(args)
             self.formid_no = arguments.Formid
             self.buildid_no = arguments.Buildid
             self.mount_path = arguments.Mountpath
-            self.logger = Logger(self.formid_no).get_log()
+            self.parallel = arguments.Parallel
+            self.workers = arguments.Workers
+            self.engine = arguments.Engine
+            self.cache = arguments.Cache
+            self.incremental = arguments.Incremental
+            self.digest = arguments.Digest
+            self.metrics = arguments.Metrics
+            self.stream = arguments.Stream
+            self.astroid_cache = arguments.AstroidCache
+            self.shard = arguments.Shard
+            self.archive = arguments.Archive
+            self.prefixes = tuple(arguments.Prefixes)
+            self.log = Logger(self.formid_no)
+            self.logger = self.log.get_log()
         except Exception as args_excep:
             self.logger.info("Passed arguments are not correct %s", str(args_excep))
             raise Exception("Passed arguments are not correct {0}".format(args_excep))
 
-    def query_uc_db(self, query):
-        """ add logic to connect to Updatecenter db and return query output"""
-        conn = None
+    @timed("query_uc_db")
+    def query_uc_db(self, query, params=()):
+        """ Runs the query on Updatecenter db through a pooled connection and return
+            query output.
+            Args:
+                query(str)      -- Query with ? placeholders for the parameters.
+
+                params(tuple)   -- Parameters of the query.
+            Returns:
+                list - Rows returned by the query
+        """
         try:
-            conn = pyodbc.connect("DRIVER={SQL Server};SERVER=UpdateCenter;"
-                                  "DATABASE=ProdUpdateCenter;"
-                                  "UID=umsuser;PWD=umsuser")
-            cursor = conn.cursor()
-            cursor.execute(query)
-            return cursor.fetchall()
+            with self.uc_pool.connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute(query, params)
+                return cursor.fetchall()
         except Exception as db_excep:
             self.logger.error("Failed to Connect to UpdateCenter with error: %s", db_excep)
             raise Exception("Failed to execute query on UpdateCenter with error:{0}"
                             .format(db_excep))
-        finally:
-            if conn:
-                conn.close()
 
     def get_files_list(self):
-        """ Get all the files from given update form by establishing database connection"""
+        """ Get the python files under the linted folders from given update form by
+        establishing database connection, the files fetched by the build batch are used
+        if given"""
+        if self.source_files is not None:
+            self.file_list = self.source_files
+            self.logger.info("All files list from build batch %s", self.file_list)
+            return
+        condition, params = source_file_filter(self.prefixes)
         get_files_list_query = ("select sSourceFileName from MapFormToSourceFiles where "
-                                "nBuildID =%s and nFormID =%s" % (self.buildid_no, self.formid_no))
-        self.file_list = self.query_uc_db(get_files_list_query)
-        self.logger.info("All files list from given update form %s", self.file_list)
+                                "nBuildID = ? and nFormID = ? and " + condition)
+        self.file_list = self.query_uc_db(get_files_list_query,
+                                          [self.buildid_no, self.formid_no] + params)
+        self.logger.info("Python files list from given update form %s", self.file_list)
 
+    @timed("validate_files")
     def validate_files(self):
-        """ Filters out the python files from the source files list which are
-        placed under Automation or cvpysdk directory."""
-        valid_files = []
+        """ Filters out the python files from the source files list which are placed
+        under the linted folders and present on the mount path. The files are looked up
+        with a single os.scandir pass over every folder of the mount holding them, the
+        files missing on the mount are kept in missing_files to be reported in the email."""
+        paths, folders = [], {}
         for file in self.file_list:
-            self.logger.info("File in a list %s", file)
             file = file[0]
-            if ((file.startswith('vaultcx/Source/tools/Automation/')
-                 or file.startswith('vaultcx/Source/tools/cvpysdk/'))
-                    and file.endswith('.py')):
-                self.logger.info("Given python file exists as--%s", file)
-                valid_files.append(os.path.join(self.mount_path, file))
+            # like in UpdateCenter may match the folders in another case
+            if file.startswith(self.prefixes) and file.endswith(SOURCE_FILE_EXT):
+                path = os.path.join(self.mount_path, file)
+                folder, name = os.path.split(path)
+                folders.setdefault(folder, {})[os.path.normcase(name)] = path
+                paths.append(path)
             else:
                 self.logger.info("Given file is not python file or wrong directory as--%s", file)
-                self.file_list = valid_files
+        sizes = {}
+        for folder, names in folders.items():
+            try:
+                with os.scandir(folder) as entries:
+                    for entry in entries:
+                        path = names.get(os.path.normcase(entry.name))
+                        if path is not None and entry.is_file():
+                            sizes[path] = entry.stat().st_size
+            except OSError as folder_excep:
+                self.logger.info("Folder not found on mount path as--%s", folder_excep)
+        self.file_list = [path for path in paths if path in sizes]
+        self.missing_files = [path for path in paths if path not in sizes]
+        self.logger.info("Python files to be linted: %s, %s bytes", len(self.file_list),
+                         sum(sizes.values()))
+        if self.missing_files:
+            self.logger.info("Python files not found on mount path: %s", self.missing_files)
 
     def email_receiver(self):
         """ Iterates over all the stake holders of the form and determines the users
-        list to whom the email is to be sent."""
-        # DevOwner, Additional developers and Code Reviewers(Developer Choice)
-        get_email_receiver = ("select spropertyvalue from FormProperties where "
-                              "nFormID = {0} and nBuildID = {1} and "
+        list to whom the email is to be sent. DevOwner, Additional developers and
+        Code Reviewers(Developer Choice), Code Reviewers(System Enforced) and the
+        Developer are fetched in a single query."""
+        get_email_receiver = ("select 1, spropertyvalue from FormProperties where "
+                              "nFormID = ? and nBuildID = ? and "
                               "(sPropertyName like 'DevOwner%' or"
                               " sPropertyName like 'Developer%' or"
-                              " sPropertyName like 'CodeRevDev%')"
-                              .format(self.formid_no, self.buildid_no))
-        to_list = self.query_uc_db(get_email_receiver)
-        # self.receiver = ''
-        for email_receiver in to_list:
-            self.receiver.append(email_receiver[0])
-        self.logger.info("Receivers List: %s", self.receiver)
-        # Code Reviewers(System Enforced)
-        system_enforced_cr = ("select distinct sReviewerAlias from "
+                              " sPropertyName like 'CodeRevDev%') "
+                              "union all "
+                              "select distinct 2, sReviewerAlias from "
                               "MapRestrictedRulesToFormCodeReviewers where "
-                              "nFormID =%s and nBuildID = %s" % (self.formid_no, self.buildid_no))
-        crs_list = self.query_uc_db(system_enforced_cr)
-        for crs in crs_list:
-            self.receiver.append(crs[0])
+                              "nFormID = ? and nBuildID = ? "
+                              "union all "
+                              "select 3, sCreatedBy from forminfo where "
+                              "nFormID = ? and nBuildID = ?")
+        receivers = self.query_uc_db(get_email_receiver,
+                                     (self.formid_no, self.buildid_no) * 3)
+        receivers = sorted(receivers, key=lambda receiver: receiver[0])
+        self.receiver.extend(receiver[1] for receiver in receivers if receiver[0] == 1)
+        self.logger.info("Receivers List: %s", self.receiver)
+        self.receiver.extend(receiver[1] for receiver in receivers if receiver[0] == 2)
         self.logger.info("System Enforced Code Reviewer's List:%s", self.receiver)
-        # Developer
-        dev_email = ("select sCreatedBy from forminfo where nFormID = %s and nBuildID = %s"
-                     % (self.formid_no, self.buildid_no))
-        dev_list = self.query_uc_db(dev_email)
-        self.receiver.append(dev_list[0][0])
+        developer = [receiver[1] for receiver in receivers if receiver[0] == 3]
+        self.receiver.append(developer[0])
         self.logger.info("Developer's Name:%s", self.receiver)
 
+    @timed("email_receivers_alias")
     def email_receivers_alias(self):
         """ Determine the full alias of email id's of all the users to whom the
-        email is to be sent."""
-        email_conn = None
-        try:
-            email_conn = pyodbc.connect(r"DRIVER={SQL Server};SERVER=ENGWEBAGL\ENGWEBDB;"
-                                        r"DATABASE=Resources;"
-                                        r"UID=readonly;PWD=readonly")
-            cursor_dev = email_conn.cursor()
-            new_receivers_list = ''
-            for single in self.receiver:
-                cursor_dev.execute("SELECT emailAlias FROM vwUsers WHERE isDeleted = 0 and "
-                                   "ProdcertName In (?);", single)
-                developer = cursor_dev.fetchall()
-                for dev in developer:
-                    new_receivers_list += (dev[0] + "@commvault.com,")
-            self.receiver = new_receivers_list
-            self.logger.info("All receivers:%s", self.receiver)
-        except Exception as alias_excep:
-            self.logger.error(r"Failed to connect to ENGWEBAGL\ENGWEBDB with error: %s",
-                              alias_excep)
-            raise Exception(r"Failed to connect to ENGWEBAGL\ENGWEBDB with error: {0}"
-                            .format(alias_excep))
-        finally:
-            if email_conn:
-                email_conn.close()
+        email is to be sent. Users not found in the alias cache are looked up
+        in a single query."""
+        users = list(dict.fromkeys(self.receiver))
+        aliases, missing = self.alias_cache.lookup(users)
+        self.logger.info("Email alias cached for %s of %s receivers",
+                         len(aliases), len(users))
+        if missing:
+            try:
+                with self.engweb_pool.connection() as email_conn:
+                    cursor_dev = email_conn.cursor()
+                    cursor_dev.execute("SELECT ProdcertName, emailAlias FROM vwUsers WHERE "
+                                       "isDeleted = 0 and ProdcertName In ({0});"
+                                       .format(", ".join("?" * len(missing))), missing)
+                    developers = cursor_dev.fetchall()
+            except Exception as alias_excep:
+                self.logger.error(r"Failed to connect to ENGWEBAGL\ENGWEBDB with error: %s",
+                                  alias_excep)
+                raise Exception(r"Failed to connect to ENGWEBAGL\ENGWEBDB with error: {0}"
+                                .format(alias_excep))
+            fetched = {}
+            users_by_name = {user.lower(): user for user in missing}
+            for dev in developers:
+                user = users_by_name.get(dev[0].lower(), dev[0])
+                fetched.setdefault(user, []).append(dev[1])
+            self.alias_cache.update(fetched)
+            try:
+                self.alias_cache.save()
+            except OSError as save_excep:
+                self.logger.error("Failed to save email alias cache: %s", save_excep)
+            aliases.update(fetched)
+        self.receiver = "".join(alias + "@commvault.com,"
+                                for user in users for alias in aliases.get(user, []))
+        self.logger.info("All receivers:%s", self.receiver)
 
     def generate_json(self):
         """ Generates dictionary containing files list in update form and email content"""
         self.json_data = {
             "path": self.file_list,
             "Email": {
-                "Server": "mail.commvault.com",
+                "Server": MAIL_SERVER,
                 "From": "automation@commvault.com",
                 "To":  self.receiver,  #"kdawkhar.cv@commvault.com",
                 "Bcc": "kdawkhar.cv@commvault.com",
@@ -249,29 +494,97 @@ class UCHelper:
         body['From'] = "automation@commvault.com"
         body['To'] = ("kdawkhar.cv@commvault.com,jgoel@commvault.com,"
                       "spakhare@commvault.com,kloganathan@commvault.com,") #"kdawkhar.cv@commvault.com"
-        server = smtplib.SMTP("mail.commvault.com")
-        server.send_message(body)
+        get_dispatcher(MAIL_SERVER).send(body).result()
 
-    def execute(self):
+    def execute(self, args=None):
         """ Main method which contains all the methods inside. Starts the UCHelper execution
-        and also create object of CvemailPylint class """
+        and also create object of CvemailPylint class
+            Args:
+                args(list)  -- Arguments of the run, read from command line if not given.
+
+            Returns:
+                bool - True if the run completed, False if it failed and the failure
+                       was notified over email
+        """
+        status = "failed"
         try:
-            self.read_args()
+            self.read_args(args)
             self.get_files_list()
             self.validate_files()
-            if self.file_list:
-                self.email_receiver()
-                # self.conn.close()
-                self.email_receivers_alias()
-                self.generate_json()
-                if self.json_data:
-                    obj = CvemailPylint(self.formid_no)
-                    obj.json_data = self.json_data
-                    obj.execute()
+            if self.file_list or self.missing_files:
+                loop = asyncio.new_event_loop()
+                try:
+                    loop.run_until_complete(self.run_pipeline())
+                finally:
+                    loop.close()
+            status = "completed"
         except Exception as execute_excep:
             self.logger.info("Failed to run execute method as %s", str(execute_excep))
             trace_back = traceback.format_exc()
             self.send_notification_email(trace_back)
+        finally:
+            self.record_timings(status)
+            self.close()
+        return status == "completed"
+
+    def resolve_receivers(self):
+        """ Determines the email alias of all the users to whom the email is to be sent"""
+        self.email_receiver()
+        self.email_receivers_alias()
+
+    async def run_pipeline(self):
+        """ Resolves the email receivers while the form files are being linted and
+            sends the email once both are complete. The blocking database and pylint
+            calls run in executor threads."""
+        shard = ShardedLint(self.shard, self.logger) if self.shard else None
+        obj = CvemailPylint(self.formid_no, self.parallel, self.workers,
+                            self.engine, self.cache, self.incremental, self.buildid_no,
+                            self.digest * 60, self.timer, self.stream, self.astroid_cache,
+                            self.shared_lint, shard, self.archive)
+        if self.shared_lint:
+            obj.spool_dir = self.shared_lint.spool_dir
+        obj.json_data = {"path": self.file_list}
+        obj.missing_files = self.missing_files
+        loop = asyncio.get_event_loop()
+        try:
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                results = await asyncio.gather(
+                    loop.run_in_executor(executor, self.resolve_receivers),
+                    loop.run_in_executor(executor, obj.lint),
+                    return_exceptions=True)
+                for result in results:
+                    if isinstance(result, Exception):
+                        raise result
+                self.generate_json()
+                obj.json_data = self.json_data
+                await loop.run_in_executor(executor, obj.mail_pylint)
+        finally:
+            obj.close()
+
+    def record_timings(self, status):
+        """ Appends the time spent in every stage of the run to the timings file of the
+            form and exports it for Prometheus if a metrics directory is given.
+            Args:
+                status(str) -- Outcome of the run, completed or failed.
+        """
+        if self.formid_no is None:
+            return
+        fields = {"formid": self.formid_no, "buildid": self.buildid_no, "status": status,
+                  "files": len(self.file_list)}
+        try:
+            self.timer.write(os.path.join(PATH, self.formid_no, TIMINGS_NAME), **fields)
+            if self.metrics:
+                self.timer.export_prometheus(self.metrics, formid=self.formid_no)
+        except OSError as timing_excep:
+            self.logger.error("Failed to record stage timings: %s", timing_excep)
+        self.logger.info("Stage timings: %s", self.timer.summary()["stages"])
+
+    def close(self):
+        """ Closes the connection pools created by this run and releases its logger"""
+        for pool in self.owned_pools:
+            pool.close()
+        if self.log:
+            self.log.close()
 
 
 if __name__ == "__main__":